@@ -1,9 +1,10 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+from utils.soft_delete import SoftDeleteAdminMixin
 from .models import CustomUser
 
 @admin.register(CustomUser)
-class CustomUserAdmin(UserAdmin):
+class CustomUserAdmin(SoftDeleteAdminMixin, UserAdmin):
     """
     Custom User model administration interface
 
@@ -11,6 +12,7 @@ class CustomUserAdmin(UserAdmin):
     - Email-based authentication
     - Custom field ordering and display
     - Localization for admin labels
+    - Soft-deleted users listed, filterable on deleted_at
     """
     model = CustomUser
     ordering = ('email',)
@@ -1,29 +1,87 @@
-from django.core.management.base import BaseCommand
+import os
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Length, Trim
 from accounts.models import CustomUser
-from utils.encryption import generate_and_encrypt_key
+from utils.encryption import encrypt_many
+
+MIN_KEY_LENGTH = 40
+"""Keys shorter than this (once stripped) are invalid and regenerated."""
+
+def users_without_key(after_pk, batch_size):
+    """
+    Next batch of active users without a valid user_key, walked in primary key order.
+    Only the primary key is loaded: the key is generated, never read.
+    """
+    return list(
+        CustomUser.objects
+        .filter(is_active=True, pk__gt=after_pk)
+        .annotate(key_length=Length(Trim('user_key')))
+        .filter(Q(user_key__isnull=True) | Q(key_length__lt=MIN_KEY_LENGTH))
+        .order_by('pk')
+        .only('pk')[:batch_size]
+    )
+
+def read_checkpoint(path):
+    try:
+        with open(path) as checkpoint:
+            return int(checkpoint.read().strip() or 0)
+    except FileNotFoundError:
+        return 0
+    except ValueError:
+        raise CommandError(f"Point de reprise illisible : {path}.")
+
+def write_checkpoint(path, last_pk):
+    """Record the last user processed; the file is replaced atomically."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as checkpoint:
+        checkpoint.write(str(last_pk))
+    os.replace(tmp_path, path)
 
 class Command(BaseCommand):
-    help = "Génère une user_key sécurisée pour chaque utilisateur actif sans clé, avec clé vide ou clé invalide (ex : trop courte)."
+    help = (
+        "Génère une user_key sécurisée pour chaque utilisateur actif sans clé, avec clé vide ou clé invalide "
+        "(ex : trop courte), par lots. Un point de reprise permet de relancer une exécution interrompue."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Nombre d'utilisateurs mis à jour par transaction.")
+        parser.add_argument(
+            '--checkpoint', default='fix_user_keys.checkpoint',
+            help="Fichier du point de reprise (dernier utilisateur traité), supprimé en fin d'exécution.",
+        )
+        parser.add_argument('--restart', action='store_true', help="Ignore le point de reprise et repart du début.")
 
     def handle(self, *args, **options):
-        users = CustomUser.objects.filter(is_active=True)
-        if users.count() == 0:
-            self.stdout.write(self.style.WARNING(
-                "Aucun utilisateur actif dans la base."
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError("--batch-size doit être strictement positif.")
+        checkpoint = options['checkpoint']
+        last_pk = 0 if options['restart'] else read_checkpoint(checkpoint)
+        if last_pk:
+            self.stdout.write(f"Reprise après l'utilisateur {last_pk}.")
+
+        updated = 0
+        while users := users_without_key(last_pk, batch_size):
+            for user, user_key in zip(users, encrypt_many(len(users))):
+                user.user_key = user_key
+            with transaction.atomic():
+                CustomUser.objects.bulk_update(users, ['user_key'])
+            # The checkpoint only moves once the batch is committed
+            last_pk = users[-1].pk
+            write_checkpoint(checkpoint, last_pk)
+            updated += len(users)
+            if options['verbosity']:
+                self.stdout.write(f"{updated} user_key générées (dernier utilisateur : {last_pk}).")
+
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        if not updated:
+            self.stdout.write(self.style.SUCCESS(
+                "Tous les utilisateurs actifs possèdent déjà une user_key valide."
             ))
         else:
-            to_update = []
-            for user in users:
-                if not user.user_key or len(user.user_key.strip()) < 40:
-                    user.user_key = generate_and_encrypt_key()
-                    user.save(update_fields=['user_key'])
-                    to_update.append(user.email)
-            if not to_update:
-                self.stdout.write(self.style.SUCCESS(
-                    "Tous les utilisateurs actifs possèdent déjà une user_key valide."
-                ))
-            else:
-                self.stdout.write(self.style.SUCCESS(
-                    f"{len(to_update)} utilisateurs actifs ont reçu une user_key générée avec succès :\n" +
-                    ", ".join(to_update)
-                ))
+            self.stdout.write(self.style.SUCCESS(
+                f"{updated} utilisateurs actifs ont reçu une user_key générée avec succès."
+            ))
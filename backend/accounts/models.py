@@ -1,9 +1,10 @@
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
 from django.utils import timezone
+from utils.soft_delete import SoftDeleteManager, SoftDeleteQuerySet
 
-class CustomUserManager(BaseUserManager):
-    """Custom user manager for email-based authentication"""
+class CustomUserManager(SoftDeleteManager, BaseUserManager):
+    """Custom user manager for email-based authentication, excluding soft-deleted users"""
 
     def create_user(self, email: str, password: str = None, **extra_fields) -> 'CustomUser':
         """
@@ -70,6 +71,7 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     deleted_at = models.DateTimeField(null=True, blank=True)
 
     objects = CustomUserManager()
+    all_objects = SoftDeleteQuerySet.as_manager()
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['first_name', 'last_name']
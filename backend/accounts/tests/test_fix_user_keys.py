@@ -0,0 +1,66 @@
+"""Test module for the fix_user_keys management command.
+
+Verifies that the backfill:
+- Generates a key for active users without a valid one, in batches
+- Leaves valid keys and inactive users untouched
+- Resumes after the last user recorded in its checkpoint
+"""
+
+import os
+import tempfile
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from accounts.models import CustomUser
+from utils.encryption import generate_and_encrypt_key
+
+
+class FixUserKeysTest(TestCase):
+    """Test case for the chunked and resumable user key backfill."""
+
+    def setUp(self):
+        """Create users with a missing, empty, short or valid key, and an inactive one."""
+        self.valid_key = generate_and_encrypt_key()
+        self.users = [
+            CustomUser.objects.create_user(email=f'user{i}@example.com', is_active=True, user_key=key)
+            for i, key in enumerate([None, '', '  short  ', self.valid_key, None])
+        ]
+        self.inactive = CustomUser.objects.create_user(email='inactive@example.com')
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.checkpoint = os.path.join(tmp_dir.name, 'fix_user_keys.checkpoint')
+
+    def run_command(self, **options):
+        """Run the command with the test checkpoint and return its output."""
+        out = StringIO()
+        call_command('fix_user_keys', checkpoint=self.checkpoint, stdout=out, **options)
+        return out.getvalue()
+
+    def keys(self):
+        return {
+            user.pk: user.user_key
+            for user in CustomUser.objects.filter(pk__in=[u.pk for u in self.users] + [self.inactive.pk])
+        }
+
+    def test_backfills_invalid_keys_by_batch(self):
+        """Test that the four invalid keys are replaced and the valid one is kept."""
+        output = self.run_command(batch_size=2)
+        self.assertIn("4 utilisateurs actifs ont reçu une user_key", output)
+        keys = self.keys()
+        self.assertEqual(keys[self.users[3].pk], self.valid_key)
+        self.assertIsNone(keys[self.inactive.pk])
+        for user in self.users:
+            self.assertGreaterEqual(len(keys[user.pk]), 40)
+        self.assertFalse(os.path.exists(self.checkpoint))
+        self.assertIn("possèdent déjà une user_key valide", self.run_command())
+
+    def test_resumes_after_checkpoint(self):
+        """Test that users up to the checkpoint are skipped."""
+        with open(self.checkpoint, 'w') as checkpoint:
+            checkpoint.write(str(self.users[1].pk))
+        output = self.run_command()
+        self.assertIn(f"Reprise après l'utilisateur {self.users[1].pk}", output)
+        self.assertIn("2 utilisateurs actifs", output)
+        keys = self.keys()
+        self.assertIsNone(keys[self.users[0].pk])
+        self.assertEqual(keys[self.users[1].pk], '')
@@ -0,0 +1,69 @@
+"""Test module for soft-deleted users.
+
+Verifies that a soft-deleted user:
+- Is left out of the default manager but kept in the database
+- Can no longer log in
+- Keeps its email reserved at registration
+- Stays listed in the admin
+"""
+
+from rest_framework import status
+from rest_framework.test import APITestCase
+from accounts.models import CustomUser
+
+
+class SoftDeletedUserTest(APITestCase):
+    """Test case for the soft-delete aware user manager."""
+
+    def setUp(self):
+        """Create an active user, then soft-delete it."""
+        self.user = CustomUser.objects.create_user(
+            email='deleted@example.com',
+            password='Pass1234!',
+            is_active=True
+        )
+        self.user.delete()
+
+    def test_deleted_user_is_hidden_but_kept(self):
+        """Test that the default manager excludes the user and all_objects keeps it."""
+        self.assertFalse(CustomUser.objects.filter(pk=self.user.pk).exists())
+        self.assertTrue(CustomUser.all_objects.filter(pk=self.user.pk).exists())
+
+    def test_deleted_user_cannot_log_in(self):
+        """Test that a deleted user gets no token."""
+        response = self.client.post(
+            '/api/auth/jwt/create/',
+            {"email": self.user.email, "password": "Pass1234!"},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_registration_rejects_email_of_deleted_user(self):
+        """Test that registering with the email of a deleted user is refused without a second account."""
+        response = self.client.post(
+            '/api/auth/users/',
+            {
+                "first_name": "Test",
+                "last_name": "User",
+                "email": self.user.email,
+                "password": "Pass1234!",
+                "re_password": "Pass1234!"
+            },
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(CustomUser.all_objects.filter(email=self.user.email).count(), 1)
+
+    def test_admin_lists_deleted_user(self):
+        """Test that the admin changelist shows the deleted user and filters on deleted_at."""
+        admin_user = CustomUser.objects.create_superuser(
+            email='admin@example.com',
+            password='Pass1234!'
+        )
+        self.client.force_login(admin_user)
+
+        response = self.client.get('/admin/accounts/customuser/', {'deleted_at__isempty': '0'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertContains(response, self.user.email)
+        self.assertNotContains(response, 'admin@example.com</a>')
@@ -4,3 +4,29 @@ from django.apps import AppConfig
 class CartConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "cart"
+
+    def ready(self):
+        """
+        Keep the totals of a cart in line with its items whenever they are deleted:
+        one by one, by a queryset delete, or by cascade from their offer or event,
+        including deletions made from the admin.
+        """
+        from django.db.models import QuerySet
+        from django.db.models.signals import pre_delete, post_delete
+        from .models import Cart, CartItem
+
+        def deleted_with_cart(origin):
+            # Items deleted along with their cart leave no totals to maintain
+            model = origin.model if isinstance(origin, QuerySet) else type(origin)
+            return model is Cart
+
+        def lock_cart(sender, instance, origin=None, **kwargs):
+            if not deleted_with_cart(origin):
+                Cart.objects.lock(instance.cart_id)
+
+        def recompute_totals(sender, instance, origin=None, **kwargs):
+            if not deleted_with_cart(origin):
+                Cart.objects.recompute_totals(instance.cart_id)
+
+        pre_delete.connect(lock_cart, sender=CartItem, weak=False, dispatch_uid="cart_lock_cart_on_item_delete")
+        post_delete.connect(recompute_totals, sender=CartItem, weak=False, dispatch_uid="cart_recompute_totals_on_item_delete")
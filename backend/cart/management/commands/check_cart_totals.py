@@ -0,0 +1,58 @@
+from decimal import Decimal
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from cart.models import Cart, item_totals
+
+ZERO = Value(Decimal('0'))
+
+def drifted_carts(after_pk, batch_size):
+  """
+  Next batch of open carts whose denormalised totals differ from their items,
+  walked in primary key order. Ordered carts are frozen and keep the amount set at checkout.
+  """
+  return list(
+    Cart.objects
+    .filter(pk__gt=after_pk, ordered_at__isnull=True)
+    .annotate(
+      real_amount=Coalesce(Sum('items__amount'), ZERO),
+      real_count=Count('items'),
+      stored_amount=Coalesce(F('amount'), ZERO),
+    )
+    .filter(~Q(stored_amount=F('real_amount')) | ~Q(items_count=F('real_count')))
+    .order_by('pk')
+    .values_list('pk', 'stored_amount', 'real_amount', 'items_count', 'real_count')[:batch_size]
+  )
+
+class Command(BaseCommand):
+  help = "Vérifie que le montant et le nombre de lignes des paniers ouverts correspondent à leurs lignes, et les corrige avec --fix."
+
+  def add_arguments(self, parser):
+    parser.add_argument('--fix', action='store_true', help="Recalcule les totaux des paniers incohérents.")
+    parser.add_argument('--batch-size', type=int, default=1000, help="Nombre de paniers incohérents traités par lot.")
+
+  def handle(self, *args, **options):
+    if options['batch_size'] < 1:
+      raise CommandError("--batch-size doit être strictement positif.")
+
+    drifted, last_pk = 0, 0
+    while batch := drifted_carts(last_pk, options['batch_size']):
+      last_pk = batch[-1][0]
+      drifted += len(batch)
+      if options['verbosity'] > 1:
+        for pk, stored_amount, real_amount, items_count, real_count in batch:
+          self.stdout.write(
+            f"Panier #{pk} : montant {stored_amount} au lieu de {real_amount}, "
+            f"{items_count} lignes au lieu de {real_count}."
+          )
+      if options['fix']:
+        # Totals are recomputed within the UPDATE itself, so concurrent item changes are not overwritten
+        amount, count = item_totals()
+        Cart.objects.filter(pk__in=[row[0] for row in batch]).update(amount=amount, items_count=count)
+
+    if not drifted:
+      self.stdout.write(self.style.SUCCESS("Les totaux de tous les paniers ouverts sont cohérents."))
+    elif options['fix']:
+      self.stdout.write(self.style.SUCCESS(f"{drifted} paniers incohérents corrigés."))
+    else:
+      self.stdout.write(self.style.WARNING(f"{drifted} paniers incohérents (relancer avec --fix pour les corriger)."))
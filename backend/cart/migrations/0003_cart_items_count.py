@@ -0,0 +1,37 @@
+# Generated by Django 5.1.6 on 2026-10-18 15:45
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def fill_cart_totals(apps, schema_editor):
+    """Count the items of every cart, and total the open ones (ordered carts got their amount at checkout)."""
+    Cart = apps.get_model("cart", "Cart")
+    CartItem = apps.get_model("cart", "CartItem")
+    items = CartItem.objects.filter(cart=OuterRef("pk")).order_by().values("cart")
+    Cart.objects.update(
+        items_count=Coalesce(Subquery(items.annotate(count=Count("pk")).values("count")), 0)
+    )
+    Cart.objects.filter(ordered_at__isnull=True).update(
+        amount=Subquery(items.annotate(total=Sum("amount")).values("total"))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cart", "0002_cart_unique_open_cart_per_user"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cart",
+            name="items_count",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="Nombre de lignes du panier, tenu à jour avec amount",
+            ),
+        ),
+        migrations.RunPython(fill_cart_totals, migrations.RunPython.noop),
+    ]
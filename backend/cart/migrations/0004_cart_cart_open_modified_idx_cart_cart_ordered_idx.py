@@ -0,0 +1,31 @@
+# Generated by Django 5.1.6 on 2026-10-18 16:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cart", "0003_cart_items_count"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="cart",
+            index=models.Index(
+                condition=models.Q(("ordered_at__isnull", True)),
+                fields=["modified_at"],
+                name="cart_open_modified_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="cart",
+            index=models.Index(
+                condition=models.Q(("ordered_at__isnull", False)),
+                fields=["ordered_at"],
+                name="cart_ordered_idx",
+            ),
+        ),
+    ]
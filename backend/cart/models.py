@@ -1,5 +1,60 @@
-from django.db import models
+from decimal import Decimal
+from django.db import models, transaction
 from django.conf import settings
+from django.db.models import Count, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+def item_totals():
+  """
+  Subqueries of the total amount and the number of items of the cart of the outer query.
+  """
+  items = CartItem.objects.filter(cart=OuterRef('pk')).order_by().values('cart')
+  return (
+    Coalesce(Subquery(items.annotate(total=Sum('amount')).values('total')), Value(Decimal('0'))),
+    Coalesce(Subquery(items.annotate(count=Count('pk')).values('count')), 0),
+  )
+
+class CartManager(models.Manager):
+
+  def lock(self, cart_id):
+    """
+    Lock the row of a cart until the end of the transaction.
+    Item changes lock their cart before touching the items, so that they are
+    serialised per cart and always take their locks in the same order.
+
+    @param cart_id: Primary key of the cart.
+    """
+    list(self.select_for_update().filter(pk=cart_id).values_list('pk', flat=True))
+
+  def recompute_totals(self, cart_id):
+    """
+    Set the denormalised totals of a cart from its items.
+    The cart must be locked first (see lock), so that the sums read the items
+    as committed by the changes that held the lock before.
+
+    @param cart_id: Primary key of the cart.
+    """
+    amount, count = item_totals()
+    self.filter(pk=cart_id).update(amount=amount, items_count=count, modified_at=timezone.now())
+
+  def add_to_totals(self, cart_id, amount, count):
+    """
+    Shift the denormalised totals of a cart with an atomic UPDATE.
+    Must run in the transaction changing the items, so that totals and items
+    are committed together. The cart modification date is bumped too: it is the
+    last activity from which abandoned carts are expired.
+
+    @param cart_id: Primary key of the cart.
+    @param amount: Amount added to the cart total (negative to subtract).
+    @param count: Number of items added (negative for removed items).
+    """
+    if amount or count:
+      self.filter(pk=cart_id).update(
+        amount=Coalesce(F('amount'), Value(Decimal('0'))) + amount,
+        items_count=F('items_count') + count,
+        modified_at=timezone.now(),
+      )
 
 class Cart(models.Model):
   custom_user = models.ForeignKey(
@@ -8,10 +63,13 @@ class Cart(models.Model):
     related_name='carts'
   )
   amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+  items_count = models.PositiveIntegerField(default=0, help_text="Nombre de lignes du panier, tenu à jour avec amount")
   created_at = models.DateTimeField(auto_now_add=True)
   modified_at = models.DateTimeField(auto_now=True)
   ordered_at = models.DateTimeField(null=True, blank=True)
 
+  objects = CartManager()
+
   class Meta:
     constraints = [
         models.UniqueConstraint(
@@ -20,6 +78,20 @@ class Cart(models.Model):
             name='unique_open_cart_per_user'
         )
     ]
+    # The open cart of a user is found with the unique_open_cart_per_user index;
+    # these ones serve the stale carts sweep (cart.tasks)
+    indexes = [
+      models.Index(
+        fields=['modified_at'],
+        name='cart_open_modified_idx',
+        condition=models.Q(ordered_at__isnull=True)
+      ),
+      models.Index(
+        fields=['ordered_at'],
+        name='cart_ordered_idx',
+        condition=models.Q(ordered_at__isnull=False)
+      ),
+    ]
 
   def __str__(self):
     status = '✓' if self.ordered_at else '•'
@@ -40,5 +112,26 @@ class CartItem(models.Model):
   class Meta:
     unique_together = [['cart', 'offer', 'olympic_event']]
 
+  def save(self, *args, **kwargs):
+    """
+    Save the item and keep the totals of its cart in line.
+    A new item is added to the totals; a changed one locks its cart and has the
+    totals recomputed, so that copies loaded before another change cannot make
+    them drift. Saves leaving the amount out of update_fields keep the totals.
+    Deletions are handled by the receivers connected in CartConfig.ready().
+    """
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and 'amount' not in update_fields:
+      return super().save(*args, **kwargs)
+    with transaction.atomic(savepoint=False):
+      if self._state.adding:
+        super().save(*args, **kwargs)
+        amount = self._meta.get_field('amount').to_python(self.amount)
+        Cart.objects.add_to_totals(self.cart_id, amount, 1)
+      else:
+        Cart.objects.lock(self.cart_id)
+        super().save(*args, **kwargs)
+        Cart.objects.recompute_totals(self.cart_id)
+
   def __str__(self):
     return f"{self.quantity} x {self.offer} in Cart #{self.cart.pk}"
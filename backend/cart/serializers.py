@@ -4,8 +4,9 @@ from offers.models import Offer
 from olympic_events.models import OlympicEvent
 from offers.serializers import OfferSerializer
 from olympic_events.serializers import OlympicEventSerializer
+from utils.sparse_fields import SparseFieldsMixin
 
-class CartItemSerializer(serializers.ModelSerializer):
+class CartItemSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     offer = OfferSerializer(read_only=True)
     offer_id = serializers.PrimaryKeyRelatedField(queryset=Offer.objects.all(), write_only=True, source='offer')
     olympic_event = OlympicEventSerializer(read_only=True)
@@ -47,12 +48,40 @@ class CartItemSerializer(serializers.ModelSerializer):
                 })
         return data
 
-class CartSerializer(serializers.ModelSerializer):
+class CartSerializer(SparseFieldsMixin, serializers.ModelSerializer):
   items = CartItemSerializer(many=True, read_only=True)
   class Meta:
     model = Cart
     fields = [
-      'id', 'custom_user', 'amount', 'created_at',
+      'id', 'custom_user', 'amount', 'items_count', 'created_at',
       'modified_at', 'ordered_at', 'items'
     ]
-    read_only_fields = ['id', 'custom_user', 'created_at', 'modified_at', 'ordered_at']
+    read_only_fields = ['id', 'custom_user', 'amount', 'items_count', 'created_at', 'modified_at', 'ordered_at']
+
+
+class CartSummarySerializer(serializers.ModelSerializer):
+    """
+    Totals of the open cart, read from its denormalised columns. The number of
+    seats, `items_quantity`, is annotated by the summary action.
+    """
+    items_quantity = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Cart
+        fields = ['id', 'amount', 'items_count', 'items_quantity']
+
+
+class CartMergeItemSerializer(serializers.Serializer):
+    """
+    One line of a guest cart. Offers and events are checked in bulk by the
+    merge action, so ids are plain integers here.
+    """
+    offer_id = serializers.IntegerField(min_value=1)
+    olympic_event_id = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=1)
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+
+
+class CartMergeSerializer(serializers.Serializer):
+    """Guest cart sent at login, merged into the open cart of the user."""
+    items = CartMergeItemSerializer(many=True)
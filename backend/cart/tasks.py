@@ -0,0 +1,68 @@
+import logging
+from datetime import timedelta
+from celery import shared_task
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import Cart
+
+logger = logging.getLogger(__name__)
+
+def delete_carts(carts, batch_size):
+  """
+  Delete a batch of carts, with their items.
+  Carts locked by a concurrent transaction (an item being changed, a checkout)
+  are skipped until the next batch. The filters of `carts` are applied again by
+  the DELETE, so a cart used again meanwhile is kept.
+
+  @param carts: Queryset of the carts to delete.
+  @param batch_size: Maximum number of carts deleted.
+  @return: Number of carts deleted.
+  """
+  with transaction.atomic():
+    cart_ids = list(
+      carts
+      .select_for_update(skip_locked=True)
+      .order_by('pk')
+      .values_list('pk', flat=True)[:batch_size]
+    )
+    if not cart_ids:
+      return 0
+    _, deleted = carts.filter(pk__in=cart_ids).delete()
+    return deleted.get(Cart._meta.label, 0)
+
+@shared_task
+def sweep_stale_carts_task():
+  """
+  Periodic sweep (Celery beat) of the carts nobody will use again.
+  Open carts without activity for CART_RETENTION_DAYS are deleted, and so are
+  ordered carts older than ORDERED_CART_RETENTION_DAYS, their order keeping the
+  purchased items. Each kind runs at most SWEEP_MAX_BATCHES deletions of
+  SWEEP_BATCH_SIZE carts; what is left is swept by the next run.
+
+  @return: Number of carts deleted per kind.
+  """
+  batch_size, max_batches = settings.SWEEP_BATCH_SIZE, settings.SWEEP_MAX_BATCHES
+  now = timezone.now()
+  stale_carts = {
+    'abandoned_carts_deleted': Cart.objects.filter(
+      ordered_at__isnull=True, modified_at__lt=now - timedelta(days=settings.CART_RETENTION_DAYS)
+    ),
+    'ordered_carts_deleted': Cart.objects.filter(
+      ordered_at__lt=now - timedelta(days=settings.ORDERED_CART_RETENTION_DAYS)
+    ),
+  }
+
+  metrics = dict.fromkeys(stale_carts, 0)
+  for key, carts in stale_carts.items():
+    for _ in range(max_batches):
+      deleted = delete_carts(carts, batch_size)
+      metrics[key] += deleted
+      if deleted < batch_size:
+        break
+
+  logger.info(
+    "Stale carts sweep: %(abandoned_carts_deleted)s abandoned and %(ordered_carts_deleted)s ordered carts deleted.",
+    metrics,
+  )
+  return metrics
@@ -1,9 +1,15 @@
+from decimal import Decimal
+from io import StringIO
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 from cart.models import Cart, CartItem
+from order.models import Order
 from offers.models import Offer
 from olympic_events.models import OlympicEvent
 
@@ -191,3 +197,275 @@ class CartAPITestCase(APITestCase):
         response = self.client.post(checkout_url)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn('Panier déjà validé.', response.data.get('detail', ''))
+
+    def test_checkout_query_count_does_not_grow_with_cart_size(self):
+        """
+        Test that checkout runs the same number of queries whatever the cart size.
+        """
+        def checkout_queries(nb_items):
+            cart = Cart.objects.create(custom_user=self.user)
+            for i in range(nb_items):
+                offer = Offer.objects.create(name=f'Offre {nb_items}-{i}', price=10)
+                event = OlympicEvent.objects.create(name=f'Event {nb_items}-{i}', date_time=timezone.now())
+                CartItem.objects.create(cart=cart, offer=offer, olympic_event=event, quantity=1, amount=10)
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.post(reverse('cart-checkout', args=[cart.pk]))
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(len(response.data['items']), nb_items)
+            # Close the open cart created by checkout before the next run
+            Cart.objects.filter(custom_user=self.user, ordered_at__isnull=True).delete()
+            return len(ctx.captured_queries)
+
+        self.assertEqual(checkout_queries(1), checkout_queries(6))
+        self.assertEqual(Order.objects.filter(user=self.user).count(), 2)
+
+    def test_list_query_count_does_not_grow_with_cart_size(self):
+        """
+        Test that listing the open cart runs the same number of queries whatever its number of items.
+        """
+        cart = Cart.objects.create(custom_user=self.user)
+
+        def list_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(self.list_url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(response.data[0]['items']), len(ctx.captured_queries)
+
+        def add_item(i):
+            offer = Offer.objects.create(name=f'Offre {i}', price=10)
+            event = OlympicEvent.objects.create(name=f'Event {i}', date_time=timezone.now())
+            CartItem.objects.create(cart=cart, offer=offer, olympic_event=event, quantity=1, amount=10)
+
+        add_item(0)
+        _, queries = list_queries()
+        for i in range(1, 6):
+            add_item(i)
+        self.assertEqual(list_queries(), (6, queries))
+
+    def test_merge_guest_cart(self):
+        """
+        Test that merging a guest cart adds up quantities of existing lines and creates the others.
+        """
+        cart = Cart.objects.create(custom_user=self.user)
+        offers = [Offer.objects.create(name=f'Offre {i}', price=10 * (i + 1)) for i in range(2)]
+        event = OlympicEvent.objects.create(name='Event 1', date_time=timezone.now())
+        CartItem.objects.create(cart=cart, offer=offers[0], olympic_event=event, quantity=1, amount=10)
+
+        response = self.client.post(reverse('cart-merge'), {'items': [
+            {'offer_id': offers[0].id, 'olympic_event_id': event.id, 'quantity': 2, 'amount': '20.00'},
+            {'offer_id': offers[1].id, 'olympic_event_id': event.id, 'quantity': 1},
+            {'offer_id': offers[1].id, 'olympic_event_id': event.id, 'quantity': 2, 'amount': '40.00'},
+        ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['id'], cart.id)
+        lines = {item['offer']['id']: (item['quantity'], item['amount']) for item in response.data['items']}
+        self.assertEqual(lines, {offers[0].id: (3, '30.00'), offers[1].id: (3, '60.00')})
+        self.assertEqual(CartItem.objects.filter(cart=cart).count(), 2)
+
+    def test_merge_query_count_does_not_grow_with_cart_size(self):
+        """
+        Test that merging a guest cart runs the same number of queries whatever its size.
+        """
+        Cart.objects.create(custom_user=self.user)
+        event = OlympicEvent.objects.create(name='Event 1', date_time=timezone.now())
+
+        def merge_queries(nb_items):
+            offers = [Offer.objects.create(name=f'Offre {nb_items}-{i}', price=10) for i in range(nb_items)]
+            items = [{'offer_id': offer.id, 'olympic_event_id': event.id, 'quantity': 1} for offer in offers]
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.post(reverse('cart-merge'), {'items': items}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(merge_queries(1), merge_queries(8))
+
+    def test_merge_skips_unknown_ids_and_wrong_amounts(self):
+        """
+        Test that lines with an unknown offer or a stale amount are reported and the others merged.
+        """
+        offer = Offer.objects.create(name='Offre 1', price=15)
+        event = OlympicEvent.objects.create(name='Event 1', date_time=timezone.now())
+        response = self.client.post(reverse('cart-merge'), {'items': [
+            {'offer_id': offer.id, 'olympic_event_id': event.id, 'quantity': 2, 'amount': '20.00'},
+            {'offer_id': offer.id + 1, 'olympic_event_id': event.id, 'quantity': 1},
+            {'offer_id': offer.id, 'olympic_event_id': event.id, 'quantity': 1},
+        ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['skipped']), 2)
+        self.assertEqual([(item['quantity'], item['amount']) for item in response.data['items']], [(1, '15.00')])
+        self.assertEqual(response.data['amount'], '15.00')
+
+    def test_cart_totals_follow_item_changes(self):
+        """
+        Test that the cart amount and item count follow item creation, update, merge and deletion.
+        """
+        cart = Cart.objects.create(custom_user=self.user)
+        offers = [Offer.objects.create(name=f'Offre {i}', price=15) for i in range(2)]
+        event = OlympicEvent.objects.create(name='Event 1', date_time=timezone.now())
+
+        def totals():
+            cart.refresh_from_db()
+            return cart.amount, cart.items_count
+
+        self.assertEqual(totals(), (None, 0))
+        response = self.client.post(reverse('cart-item-list'), {
+            'offer_id': offers[0].id, 'olympic_event_id': event.id, 'quantity': 2, 'amount': 30,
+        }, format='json')
+        url = reverse('cart-item-detail', args=[response.data['id']])
+        self.assertEqual(totals(), (Decimal('30.00'), 1))
+
+        self.client.patch(url, {'quantity': 3}, format='json')
+        self.assertEqual(totals(), (Decimal('45.00'), 1))
+
+        self.client.post(reverse('cart-merge'), {'items': [
+            {'offer_id': offers[0].id, 'olympic_event_id': event.id, 'quantity': 1},
+            {'offer_id': offers[1].id, 'olympic_event_id': event.id, 'quantity': 2},
+        ]}, format='json')
+        self.assertEqual(totals(), (Decimal('90.00'), 2))
+
+        self.client.patch(url, {'quantity': 0}, format='json')
+        self.assertEqual(totals(), (Decimal('30.00'), 1))
+        response = self.client.get(self.list_url)
+        self.assertEqual((response.data[0]['amount'], response.data[0]['items_count']), ('30.00', 1))
+
+    def test_cart_totals_do_not_drift_with_stale_items(self):
+        """
+        Test that changes made from copies of an item loaded before another change keep the totals exact.
+        """
+        cart = Cart.objects.create(custom_user=self.user)
+        offer = Offer.objects.create(name='Offre 1', price=10)
+        event = OlympicEvent.objects.create(name='Event 1', date_time=timezone.now())
+        item = CartItem.objects.create(cart=cart, offer=offer, olympic_event=event, quantity=1, amount=10)
+        first, second, third, fourth = (CartItem.objects.get(pk=item.pk) for _ in range(4))
+
+        first.quantity, first.amount = 3, 30
+        first.save()
+        second.quantity, second.amount = 5, 50
+        second.save()
+        cart.refresh_from_db()
+        self.assertEqual((cart.amount, cart.items_count), (Decimal('50.00'), 1))
+
+        third.delete()
+        cart.refresh_from_db()
+        self.assertEqual((cart.amount, cart.items_count), (Decimal('0.00'), 0))
+        fourth.delete()
+        cart.refresh_from_db()
+        self.assertEqual((cart.amount, cart.items_count), (Decimal('0.00'), 0))
+
+    def test_cart_totals_follow_bulk_and_cascade_deletes(self):
+        """
+        Test that queryset deletes and deletes cascading from an offer or an event keep the totals exact,
+        and that saves leaving the amount out of update_fields do not touch them.
+        """
+        cart = Cart.objects.create(custom_user=self.user)
+        offers = [Offer.objects.create(name=f'Offre {i}', price=10) for i in range(2)]
+        events = [OlympicEvent.objects.create(name=f'Event {i}', date_time=timezone.now()) for i in range(2)]
+        items = [
+            CartItem.objects.create(cart=cart, offer=offer, olympic_event=event, quantity=1, amount=10)
+            for offer in offers for event in events
+        ]
+
+        def totals():
+            cart.refresh_from_db()
+            return cart.amount, cart.items_count
+
+        self.assertEqual(totals(), (Decimal('40.00'), 4))
+        items[0].quantity = 2
+        items[0].save(update_fields=['quantity'])
+        self.assertEqual(totals(), (Decimal('40.00'), 4))
+
+        CartItem.objects.filter(pk=items[0].pk).delete()
+        self.assertEqual(totals(), (Decimal('30.00'), 3))
+        offers[1].delete()
+        self.assertEqual(totals(), (Decimal('10.00'), 1))
+        events[1].delete()
+        self.assertEqual(totals(), (Decimal('0.00'), 0))
+
+    def test_deleting_carts_skips_the_totals_of_their_items(self):
+        """
+        Test that deleting carts removes their items without recomputing totals of the deleted carts.
+        """
+        cart = Cart.objects.create(custom_user=self.user)
+        offer = Offer.objects.create(name='Offre 1', price=10)
+        events = [OlympicEvent.objects.create(name=f'Event {i}', date_time=timezone.now()) for i in range(3)]
+        for event in events:
+            CartItem.objects.create(cart=cart, offer=offer, olympic_event=event, quantity=1, amount=10)
+
+        with CaptureQueriesContext(connection) as queries:
+            Cart.objects.filter(pk=cart.pk).delete()
+
+        self.assertFalse(CartItem.objects.filter(cart_id=cart.pk).exists())
+        self.assertFalse(any(query['sql'].startswith('UPDATE') for query in queries))
+
+    def test_check_cart_totals_detects_and_fixes_drift(self):
+        """
+        Test that the consistency checker reports carts whose totals drifted and fixes them with --fix.
+        """
+        cart = Cart.objects.create(custom_user=self.user)
+        offer = Offer.objects.create(name='Offre 1', price=10)
+        event = OlympicEvent.objects.create(name='Event 1', date_time=timezone.now())
+        CartItem.objects.create(cart=cart, offer=offer, olympic_event=event, quantity=1, amount=10)
+        Cart.objects.filter(pk=cart.pk).update(amount=99, items_count=3)
+
+        def check(**options):
+            out = StringIO()
+            call_command('check_cart_totals', stdout=out, **options)
+            return out.getvalue()
+
+        self.assertIn("1 paniers incohérents", check())
+        self.assertIn("1 paniers incohérents corrigés", check(fix=True))
+        cart.refresh_from_db()
+        self.assertEqual((cart.amount, cart.items_count), (Decimal('10.00'), 1))
+        self.assertIn("sont cohérents", check())
+
+    def test_summary_reads_the_open_cart_in_one_query(self):
+        """
+        Test that the summary returns the totals of the open cart with one query, and never creates a cart.
+        """
+        response = self.client.get(reverse('cart-summary'))
+        self.assertEqual(response.data, {'id': None, 'amount': None, 'items_count': 0, 'items_quantity': 0})
+        self.assertFalse(Cart.objects.exists())
+
+        cart = Cart.objects.create(custom_user=self.user)
+        offer = Offer.objects.create(name='Offre 1', price=15)
+        event = OlympicEvent.objects.create(name='Event 1', date_time=timezone.now())
+        CartItem.objects.create(cart=cart, offer=offer, olympic_event=event, quantity=2, amount=30)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('cart-summary'))
+        self.assertEqual(response.data, {'id': cart.id, 'amount': '30.00', 'items_count': 1, 'items_quantity': 2})
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+    def test_list_sparse_fields(self):
+        """
+        Test that ?fields= prunes the cart representation, nested items being collapsed
+        to primary keys unless expanded.
+        """
+        cart = Cart.objects.create(custom_user=self.user)
+        offer = Offer.objects.create(name='Offre 1', price=15)
+        event = OlympicEvent.objects.create(name='Event 1', date_time=timezone.now())
+        item = CartItem.objects.create(cart=cart, offer=offer, olympic_event=event, quantity=2, amount=30)
+
+        response = self.client.get(self.list_url, {'fields': 'id,amount,items'})
+        self.assertEqual(response.data[0], {'id': cart.id, 'amount': '30.00', 'items': [item.id]})
+
+        response = self.client.get(self.list_url, {'fields': 'id,items.quantity,items.offer.name'})
+        self.assertEqual(response.data[0], {'id': cart.id, 'items': [{'quantity': 2, 'offer': {'name': 'Offre 1'}}]})
+
+        response = self.client.get(self.list_url, {'fields': 'items', 'expand': 'items'})
+        self.assertEqual(response.data[0]['items'][0]['olympic_event']['id'], event.id)
+
+    def test_sparse_fields_do_not_prune_writes(self):
+        """
+        Test that ?fields= is ignored on writes, so that writable fields left out of the selection still apply.
+        """
+        cart = Cart.objects.create(custom_user=self.user)
+        offer = Offer.objects.create(name='Offre 1', price=15)
+        event = OlympicEvent.objects.create(name='Event 1', date_time=timezone.now())
+        item = CartItem.objects.create(cart=cart, offer=offer, olympic_event=event, quantity=2, amount=30)
+
+        url = reverse('cart-item-detail', args=[item.pk]) + '?fields=id'
+        response = self.client.patch(url, {'quantity': 4, 'amount': 60}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['quantity'], 4)
+        item.refresh_from_db()
+        self.assertEqual((item.quantity, item.amount), (4, Decimal('60.00')))
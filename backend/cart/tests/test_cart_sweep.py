@@ -0,0 +1,63 @@
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from cart.models import Cart, CartItem
+from cart.tasks import sweep_stale_carts_task
+from offers.models import Offer
+from olympic_events.models import OlympicEvent
+
+User = get_user_model()
+
+@override_settings(CART_RETENTION_DAYS=30, ORDERED_CART_RETENTION_DAYS=7, SWEEP_BATCH_SIZE=2, SWEEP_MAX_BATCHES=2)
+class StaleCartsSweepTestCase(TestCase):
+    """
+    Test case for the periodic deletion of abandoned and ordered carts.
+    """
+    def setUp(self):
+        self.offer = Offer.objects.create(name='Solo', price=10)
+        self.event = OlympicEvent.objects.create(name='Finale 100m', date_time=timezone.now())
+
+    def create_cart(self, email, days_idle, ordered=False):
+        """
+        Create a cart with one item, last modified `days_idle` days ago.
+        @return: The created cart.
+        """
+        cart = Cart.objects.create(custom_user=User.objects.create_user(email=email, password='securepass'))
+        CartItem.objects.create(cart=cart, offer=self.offer, olympic_event=self.event, quantity=1, amount=10)
+        past = timezone.now() - timedelta(days=days_idle)
+        Cart.objects.filter(pk=cart.pk).update(modified_at=past, ordered_at=past if ordered else None)
+        return cart
+
+    def test_stale_carts_are_deleted(self):
+        """
+        Test that abandoned open carts and old ordered carts are deleted with their items, others being kept.
+        """
+        abandoned = self.create_cart('abandoned@example.com', days_idle=40)
+        active = self.create_cart('active@example.com', days_idle=2)
+        ordered = self.create_cart('ordered@example.com', days_idle=10, ordered=True)
+        just_ordered = self.create_cart('just-ordered@example.com', days_idle=1, ordered=True)
+
+        metrics = sweep_stale_carts_task()
+        self.assertEqual(metrics, {'abandoned_carts_deleted': 1, 'ordered_carts_deleted': 1})
+        self.assertEqual(set(Cart.objects.values_list('pk', flat=True)), {active.pk, just_ordered.pk})
+        self.assertFalse(CartItem.objects.filter(cart_id__in=[abandoned.pk, ordered.pk]).exists())
+
+    def test_item_changes_keep_the_cart_alive(self):
+        """
+        Test that changing an item counts as cart activity.
+        """
+        cart = self.create_cart('busy@example.com', days_idle=40)
+        item = cart.items.get()
+        item.quantity, item.amount = 2, 20
+        item.save()
+        self.assertEqual(sweep_stale_carts_task()['abandoned_carts_deleted'], 0)
+
+    def test_sweep_is_bounded(self):
+        """
+        Test that a run deletes at most SWEEP_MAX_BATCHES batches of carts.
+        """
+        for i in range(5):
+            self.create_cart(f'user{i}@example.com', days_idle=40)
+        self.assertEqual(sweep_stale_carts_task()['abandoned_carts_deleted'], 4)
+        self.assertEqual(sweep_stale_carts_task()['abandoned_carts_deleted'], 1)
@@ -1,21 +1,30 @@
-from django.db.models import Sum, F
+from decimal import Decimal
+from django.db.models import OuterRef, Prefetch, Subquery, Sum, prefetch_related_objects
+from django.db.models.functions import Coalesce
+from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from .models import Cart, CartItem
-from .serializers import CartSerializer, CartItemSerializer
+from .serializers import CartSerializer, CartItemSerializer, CartMergeSerializer, CartSummarySerializer
 from order.models import Order, OrderItem
 from order.serializers import OrderSerializer
 from rest_framework import serializers
 from django.db import IntegrityError, transaction
 from .utils import check_cart_not_ordered
+from utils.sparse_fields import eager_load_sparse
+from inventory.models import SeatReservation, SeatsUnavailable
+from offers.models import Offer
+from olympic_events.models import OlympicEvent
 
 class CartViewSet(viewsets.ModelViewSet):
     """
     ViewSet for handling CRUD operations on the Cart model.
-    Includes a custom `checkout` action to finalize the cart and create an order.
+    Includes a custom `checkout` action to finalize the cart and create an order,
+    a `merge` action importing a guest cart at login and a `summary` action
+    returning the totals of the open cart.
     """
     serializer_class = CartSerializer
     permission_classes = [IsAuthenticated]
@@ -23,9 +32,13 @@ class CartViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """
         Retrieve the queryset of carts for the authenticated user.
+        Items are eager loaded, except for checkout which locks the cart row only.
         @return: QuerySet of Cart objects filtered by the current user.
         """
-        return Cart.objects.filter(custom_user=self.request.user)
+        queryset = Cart.objects.filter(custom_user=self.request.user)
+        if self.action == 'checkout':
+            return queryset
+        return eager_load_sparse(queryset, self)
 
     def perform_create(self, serializer):
         """
@@ -38,58 +51,182 @@ class CartViewSet(viewsets.ModelViewSet):
     def checkout(self, request, pk=None):
         """
         Custom action to checkout a cart and create an order.
+        The cart row is locked for the whole operation so that concurrent
+        checkouts of the same cart cannot create duplicate orders, and the seats
+        of every event with a limited capacity are held for the order.
         @param request: The request object.
         @param pk: The primary key of the cart.
         @return: Response with the created order data or error message.
         """
-        cart = self.get_object()
-        if cart.ordered_at:
-            return Response(
-                {"detail": "Panier déjà validé."},
-                status=status.HTTP_400_BAD_REQUEST
+        with transaction.atomic():
+            cart = get_object_or_404(
+                self.get_queryset().select_for_update(),
+                pk=pk
             )
+            if cart.ordered_at:
+                return Response(
+                    {"detail": "Panier déjà validé."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
 
-        cart_items = cart.items.all()
-        if not cart_items.exists():
-            return Response({"detail": "Panier vide."}, status=status.HTTP_400_BAD_REQUEST)
-
-        # Calculate the total amount
-        total = cart.items.aggregate(total=Sum('amount'))['total'] or 0
+            # Load every item together with its offer and event in a single query
+            cart_items = list(cart.items.select_related('offer', 'olympic_event'))
+            if not cart_items:
+                return Response({"detail": "Panier vide."}, status=status.HTTP_400_BAD_REQUEST)
 
-        order = Order.objects.create(
-            user=request.user,
-            amount=total,
-            status='pending'
-        )
+            total = sum((item.amount for item in cart_items), Decimal('0'))
 
-        for item in cart_items:
-            OrderItem.objects.create(
-                order=order,
-                offer=item.offer,
-                olympic_event=item.olympic_event,
-                quantity=item.quantity,
-                price=item.offer.price,  # Set the price
-                amount=item.amount,
+            order = Order.objects.create(
+                user=request.user,
+                amount=total,
+                status='pending'
             )
+            OrderItem.objects.bulk_create([
+                OrderItem(
+                    order=order,
+                    offer=item.offer,
+                    olympic_event_id=item.olympic_event_id,
+                    quantity=item.quantity,
+                    price=item.offer.price,
+                    amount=item.amount,
+                )
+                for item in cart_items
+            ])
 
-        cart.ordered_at = timezone.now()
-        cart.amount = total
-        cart.save()
+            # Events are reserved in id order so that concurrent checkouts lock shards in the same order
+            seats_by_event = {}
+            for item in cart_items:
+                if item.olympic_event.capacity is None:
+                    continue
+                seats_by_event[item.olympic_event] = seats_by_event.get(item.olympic_event, 0) + item.quantity * item.offer.nb_place
+            for olympic_event in sorted(seats_by_event, key=lambda event: event.pk):
+                try:
+                    SeatReservation.objects.reserve(olympic_event.pk, seats_by_event[olympic_event], order=order)
+                except SeatsUnavailable:
+                    transaction.set_rollback(True)
+                    return Response(
+                        {"detail": f"Plus assez de places disponibles pour « {olympic_event} »."},
+                        status=status.HTTP_409_CONFLICT
+                    )
 
-        Cart.objects.create(custom_user=request.user)
+            cart.ordered_at = timezone.now()
+            cart.amount = total
+            cart.save(update_fields=['ordered_at', 'amount', 'modified_at'])
 
+            Cart.objects.create(custom_user=request.user)
+
+        prefetch_related_objects(
+            [order],
+            Prefetch('items', queryset=OrderItem.objects.select_related('offer', 'olympic_event'))
+        )
         return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
 
+    @action(detail=False, methods=['post'])
+    def merge(self, request):
+        """
+        Merge a guest cart into the open cart of the authenticated user.
+        Quantities of lines already in the cart are added up. Offers and events are
+        loaded with one query each, amounts are recomputed from the offer prices and
+        every line is written with a single upsert on (cart, offer, olympic_event).
+        Lines with an unknown offer or event, or a stale amount, are skipped and
+        reported in `skipped`; the other lines are merged.
+        @param request: The request object, with the guest cart as `items`.
+        @return: Response with the merged cart data and the skipped lines.
+        """
+        serializer = CartMergeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        lines = serializer.validated_data['items']
+        offers = Offer.objects.in_bulk({line['offer_id'] for line in lines})
+        event_ids = set(
+            OlympicEvent.objects.filter(pk__in={line['olympic_event_id'] for line in lines}).values_list('pk', flat=True)
+        )
+        skipped, quantities = [], {}
+        for line in lines:
+            offer = offers.get(line['offer_id'])
+            if offer is None:
+                skipped.append(f"Offre {line['offer_id']} introuvable.")
+            elif line['olympic_event_id'] not in event_ids:
+                skipped.append(f"Épreuve {line['olympic_event_id']} introuvable.")
+            elif 'amount' in line and line['amount'] != offer.price * line['quantity']:
+                skipped.append(
+                    f"Montant incorrect pour « {offer} » : attendu {offer.price * line['quantity']}, "
+                    f"reçu {line['amount']}. L'offre a peut-être changé, veuillez vérifier votre panier."
+                )
+            else:
+                key = (line['offer_id'], line['olympic_event_id'])
+                quantities[key] = quantities.get(key, 0) + line['quantity']
+
+        with transaction.atomic():
+            # The open cart is locked so that concurrent merges cannot lose quantities
+            cart, _ = Cart.objects.select_for_update().get_or_create(
+                custom_user=request.user,
+                ordered_at__isnull=True
+            )
+            existing = {
+                (offer_id, event_id): (quantity, amount)
+                for offer_id, event_id, quantity, amount
+                in cart.items.values_list('offer_id', 'olympic_event_id', 'quantity', 'amount')
+            }
+            merged, amount_delta, count_delta = [], Decimal('0'), 0
+            for (offer_id, event_id), quantity in quantities.items():
+                existing_quantity, existing_amount = existing.get((offer_id, event_id), (0, None))
+                quantity += existing_quantity
+                amount_delta += offers[offer_id].price * quantity - (existing_amount or 0)
+                count_delta += existing_amount is None
+                merged.append(CartItem(
+                    cart=cart,
+                    offer_id=offer_id,
+                    olympic_event_id=event_id,
+                    quantity=quantity,
+                    amount=offers[offer_id].price * quantity,
+                ))
+            CartItem.objects.bulk_create(
+                merged,
+                update_conflicts=True,
+                unique_fields=['cart', 'offer', 'olympic_event'],
+                update_fields=['quantity', 'amount'],
+            )
+            # The upsert bypasses CartItem.save(): totals are shifted here, in the same transaction
+            Cart.objects.add_to_totals(cart.pk, amount_delta, count_delta)
+
+        cart = self.get_queryset().get(pk=cart.pk)
+        return Response({**self.get_serializer(cart).data, 'skipped': skipped})
+
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        """
+        Return the amount, the number of items and the number of seats of the open cart.
+        The amount and items count are read from the cart row, where they are maintained
+        with its items; the quantities are summed by a subquery of the same query.
+        @param request: The request object.
+        @return: Response with the cart id, amount, items count and items quantity, empty if there is no open cart.
+        """
+        quantities = (
+            CartItem.objects
+            .filter(cart=OuterRef('pk'))
+            .values('cart')
+            .annotate(total=Sum('quantity'))
+            .values('total')
+        )
+        cart = (
+            Cart.objects
+            .filter(custom_user=request.user, ordered_at__isnull=True)
+            .only('id', 'amount', 'items_count')
+            .annotate(items_quantity=Coalesce(Subquery(quantities), 0))
+            .first()
+        )
+        if cart is None:
+            return Response({'id': None, 'amount': None, 'items_count': 0, 'items_quantity': 0})
+        return Response(CartSummarySerializer(cart).data)
+
     def list(self, request, *args, **kwargs):
         """
         List the current open cart for the authenticated user.
         @param request: The request object.
         @return: Response with the cart data.
         """
-        cart = Cart.objects.filter(
-            custom_user=self.request.user,
-            ordered_at__isnull=True
-        ).first()
+        cart = self.get_queryset().filter(ordered_at__isnull=True).first()
 
         if not cart:
             cart = Cart.objects.create(custom_user=self.request.user)
@@ -110,10 +247,11 @@ class CartItemViewSet(viewsets.ModelViewSet):
     @return: QuerySet of CartItem objects filtered by the current user's open cart.
     """
     # Show only items from the user's current "open" cart
-    return CartItem.objects.filter(
+    queryset = CartItem.objects.filter(
         cart__custom_user=self.request.user,
         cart__ordered_at__isnull=True
     )
+    return eager_load_sparse(queryset, self)
 
   def perform_create(self, serializer):
     """
@@ -0,0 +1,14 @@
+from django.contrib import admin
+from .models import SeatInventory, SeatReservation
+
+@admin.register(SeatInventory)
+class SeatInventoryAdmin(admin.ModelAdmin):
+    list_display = ['olympic_event', 'shard', 'available']
+    list_filter = ['olympic_event']
+    readonly_fields = ['olympic_event', 'shard', 'available']
+
+@admin.register(SeatReservation)
+class SeatReservationAdmin(admin.ModelAdmin):
+    list_display = ['id', 'olympic_event', 'order', 'seats', 'status', 'created_at', 'expires_at']
+    list_filter = ['status', 'olympic_event']
+    raw_id_fields = ['order']
@@ -0,0 +1,25 @@
+from django.apps import AppConfig
+
+
+class InventoryConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "inventory"
+
+    def ready(self):
+        """
+        Keep the seat counters of an event in line with its capacity
+        whenever it is saved with a new capacity, including edits made from the admin.
+        """
+        from django.db.models.signals import post_save
+        from olympic_events.models import OlympicEvent
+        from .models import SeatInventory
+
+        def sync_capacity(sender, instance, created, update_fields=None, **kwargs):
+            if update_fields is not None and 'capacity' not in update_fields:
+                return
+            # A new event without capacity has no shard to create
+            if instance.capacity is not None if created else instance.capacity_changed():
+                SeatInventory.objects.sync_capacity(instance)
+            instance._stored_capacity = instance.capacity
+
+        post_save.connect(sync_capacity, sender=OlympicEvent, weak=False, dispatch_uid="inventory_sync_capacity_on_event_save")
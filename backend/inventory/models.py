@@ -0,0 +1,301 @@
+"""
+Seat inventory of the events with a limited capacity.
+
+The remaining seats of an event are spread over SEAT_INVENTORY_SHARDS counter
+rows. Seats are taken with conditional UPDATEs (`available = available - n
+WHERE available >= n`), so a counter can never go below zero, and a checkout
+tries the shards from a random starting point: concurrent checkouts of the same
+event lock different rows instead of queueing on a single one.
+Held seats are given back when their hold expires without the order being paid.
+"""
+import logging
+import random
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class SeatsUnavailable(Exception):
+    """Raised when an event has fewer seats left than requested."""
+
+    def __init__(self, olympic_event_id, seats):
+        self.olympic_event_id = olympic_event_id
+        self.seats = seats
+        super().__init__(f"Not enough seats left for event {olympic_event_id} ({seats} requested).")
+
+
+def _load_shards(olympic_event_id):
+    return list(
+        SeatInventory.objects
+        .filter(olympic_event_id=olympic_event_id)
+        .order_by('pk')
+        .values_list('pk', 'available')
+    )
+
+def _take_seats(shards, seats):
+    """
+    Decrement the given shards by `seats` in total.
+    A single shard holding enough seats is tried first, picked at random so that
+    concurrent checkouts spread over the shards; otherwise the seats are taken from
+    several shards, in primary key order to avoid deadlocks between checkouts.
+    Nothing is taken when the shards do not hold enough seats.
+
+    @param shards: (pk, available) pairs, as read by _load_shards().
+    @param seats: Number of seats to take.
+    @return: True if the seats were taken.
+    """
+    candidates = [pk for pk, available in shards if available >= seats]
+    random.shuffle(candidates)
+    for pk in candidates:
+        if SeatInventory.objects.filter(pk=pk, available__gte=seats).update(available=F('available') - seats):
+            return True
+
+    if sum(available for _, available in shards) < seats:
+        return False
+    with transaction.atomic():
+        remaining = seats
+        for pk, available in shards:
+            take = min(remaining, available)
+            if take and SeatInventory.objects.filter(pk=pk, available__gte=take).update(available=F('available') - take):
+                remaining -= take
+                if not remaining:
+                    return True
+        # Roll back the seats taken from the first shards
+        transaction.set_rollback(True)
+    return False
+
+
+class SeatInventoryManager(models.Manager):
+
+    def sync_capacity(self, olympic_event):
+        """
+        Spread the remaining seats of an event over its shards.
+        Remaining seats are the capacity minus the seats of paid orders and the
+        seats held by pending ones. An event without capacity is unlimited and
+        has no shard.
+
+        @param olympic_event: The OlympicEvent instance.
+        """
+        from order.models import OrderItem
+        with transaction.atomic():
+            # Locking the shards first waits for in-flight reservations to commit
+            shards = {s.shard: s for s in self.select_for_update().filter(olympic_event=olympic_event).order_by('pk')}
+            if olympic_event.capacity is None:
+                if shards:
+                    self.filter(olympic_event=olympic_event).delete()
+                return
+
+            sold = OrderItem.objects.filter(
+                olympic_event=olympic_event, order__status='paid'
+            ).aggregate(seats=Sum(F('quantity') * F('offer__nb_place')))['seats'] or 0
+            held = SeatReservation.objects.filter(
+                olympic_event=olympic_event, status='held'
+            ).aggregate(seats=Sum('seats'))['seats'] or 0
+            remaining = max(olympic_event.capacity - sold - held, 0)
+
+            count = settings.SEAT_INVENTORY_SHARDS
+            to_update, to_create = [], []
+            for number in range(count):
+                available = remaining // count + (1 if number < remaining % count else 0)
+                if number in shards:
+                    shards[number].available = available
+                    to_update.append(shards[number])
+                else:
+                    to_create.append(SeatInventory(olympic_event=olympic_event, shard=number, available=available))
+            self.bulk_update(to_update, ['available'])
+            self.bulk_create(to_create)
+            self.filter(olympic_event=olympic_event, shard__gte=count).delete()
+
+    def give_back(self, olympic_event_id, seats):
+        """
+        Return seats to a random shard of an event. No-op for unlimited events.
+        """
+        shards = _load_shards(olympic_event_id)
+        if shards:
+            pk, _ = random.choice(shards)
+            self.filter(pk=pk).update(available=F('available') + seats)
+
+    def available(self, olympic_event_id):
+        """
+        Number of seats left for an event, or None if its capacity is unlimited.
+        """
+        shards = _load_shards(olympic_event_id)
+        return sum(available for _, available in shards) if shards else None
+
+
+class SeatInventory(models.Model):
+    """
+    One shard of the remaining seat counter of an event.
+    """
+    olympic_event = models.ForeignKey(
+        'olympic_events.OlympicEvent',
+        on_delete=models.CASCADE,
+        related_name='seat_inventory'
+    )
+    shard = models.PositiveSmallIntegerField()
+    available = models.PositiveIntegerField(default=0)
+
+    objects = SeatInventoryManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['olympic_event', 'shard'], name='unique_event_seat_shard'),
+        ]
+
+    def __str__(self):
+        return f"{self.olympic_event} #{self.shard}: {self.available}"
+
+
+class SeatReservationManager(models.Manager):
+
+    def reserve(self, olympic_event_id, seats, order=None):
+        """
+        Hold seats of an event until SEAT_HOLD_TTL minutes from now.
+        When the shards look too low, holds that have expired are released and
+        the shards are read again before giving up.
+
+        @param olympic_event_id: Primary key of the OlympicEvent.
+        @param seats: Number of seats to hold.
+        @param order: The Order the seats are held for, if any.
+        @raises SeatsUnavailable: If the event has fewer seats left.
+        @return: The held SeatReservation, or None if the event capacity is unlimited.
+        """
+        shards = _load_shards(olympic_event_id)
+        if not shards:
+            return None
+        if not _take_seats(shards, seats):
+            self.release_expired(olympic_event_id=olympic_event_id)
+            if not _take_seats(_load_shards(olympic_event_id), seats):
+                raise SeatsUnavailable(olympic_event_id, seats)
+        return self.create(
+            olympic_event_id=olympic_event_id,
+            order=order,
+            seats=seats,
+            expires_at=timezone.now() + timedelta(minutes=settings.SEAT_HOLD_TTL),
+        )
+
+    def confirm_for_order(self, order):
+        """
+        Confirm the seats held for a paid order.
+        Seats whose hold expired before the payment are taken again if still
+        available; the payment being captured already, a sold-out event is only logged.
+
+        @param order: The paid Order.
+        """
+        self.filter(order=order, status='held').update(status='confirmed')
+        for reservation in self.filter(order=order, status='released'):
+            if _take_seats(_load_shards(reservation.olympic_event_id), reservation.seats):
+                self.filter(pk=reservation.pk, status='released').update(status='confirmed')
+            else:
+                logger.warning(
+                    "Order %s paid after its hold expired: event %s oversold by %s seats.",
+                    order.pk, reservation.olympic_event_id, reservation.seats,
+                )
+
+    def release_expired(self, olympic_event_id=None, now=None, batch_size=500):
+        """
+        Release a batch of holds past their expiry and give their seats back.
+        Rows locked by a concurrent release are skipped.
+
+        @param olympic_event_id: Restrict to one event.
+        @param now: Reference time, defaults to now.
+        @param batch_size: Maximum number of holds released.
+        @return: Number of holds released.
+        """
+        expired = self.select_for_update(skip_locked=True).filter(
+            status='held', expires_at__lte=now or timezone.now()
+        )
+        if olympic_event_id is not None:
+            expired = expired.filter(olympic_event_id=olympic_event_id)
+        with transaction.atomic():
+            rows = list(expired.order_by('expires_at').values_list('pk', 'olympic_event_id', 'seats')[:batch_size])
+            self._release(rows)
+        return len(rows)
+
+    def release_for_orders(self, order_ids):
+        """
+        Release the seats still held for the given orders, expired or not.
+        Must run in the transaction cancelling the orders.
+
+        @param order_ids: Primary keys of the orders.
+        @return: Number of holds released.
+        """
+        rows = list(
+            self.select_for_update()
+            .filter(order_id__in=order_ids, status='held')
+            .order_by('pk')
+            .values_list('pk', 'olympic_event_id', 'seats')
+        )
+        self._release(rows)
+        return len(rows)
+
+    def _release(self, rows):
+        """
+        Flag locked holds as released and give their seats back, one update per event.
+
+        @param rows: (pk, olympic_event_id, seats) tuples of held reservations.
+        """
+        if not rows:
+            return
+        self.filter(pk__in=[pk for pk, _, _ in rows]).update(status='released')
+        seats_by_event = defaultdict(int)
+        for _, event_id, seats in rows:
+            seats_by_event[event_id] += seats
+        for event_id, seats in seats_by_event.items():
+            SeatInventory.objects.give_back(event_id, seats)
+
+
+class SeatReservation(models.Model):
+    """
+    Seats of an event held for an order between checkout and payment.
+    """
+    STATUS_CHOICES = [
+        ('held', 'Réservées'),
+        ('confirmed', 'Confirmées'),
+        ('released', 'Libérées'),
+    ]
+    olympic_event = models.ForeignKey(
+        'olympic_events.OlympicEvent',
+        on_delete=models.PROTECT,
+        related_name='seat_reservations'
+    )
+    order = models.ForeignKey(
+        'order.Order',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='reservations'
+    )
+    seats = models.PositiveIntegerField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='held')
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    objects = SeatReservationManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'expires_at'], name='seat_resa_status_expiry_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.seats} x {self.olympic_event} ({self.status})"
+
+    def release(self):
+        """
+        Give the seats of a held reservation back to the inventory.
+        Confirmed or already released reservations are left untouched.
+
+        @return: True if the seats were given back.
+        """
+        with transaction.atomic():
+            if not SeatReservation.objects.filter(pk=self.pk, status='held').update(status='released'):
+                return False
+            SeatInventory.objects.give_back(self.olympic_event_id, self.seats)
+        self.status = 'released'
+        return True
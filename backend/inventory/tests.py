@@ -0,0 +1,185 @@
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from cart.models import Cart, CartItem
+from offers.models import Offer
+from olympic_events.models import OlympicEvent
+from order.models import Order, OrderItem
+from .models import SeatInventory, SeatReservation, SeatsUnavailable
+
+User = get_user_model()
+
+def total_available(event):
+    return SeatInventory.objects.filter(olympic_event=event).aggregate(total=Sum('available'))['total']
+
+@override_settings(SEAT_INVENTORY_SHARDS=4, SEAT_HOLD_TTL=15)
+class SeatInventoryTestCase(TestCase):
+    """
+    Test case for the sharded seat counters and the seat reservations.
+    """
+    def setUp(self):
+        self.event = OlympicEvent.objects.create(name='Finale 100m', date_time=timezone.now(), capacity=10)
+
+    def test_capacity_is_spread_over_shards(self):
+        """
+        Saving an event with a capacity creates its shards, holding the whole capacity.
+        """
+        shards = list(SeatInventory.objects.filter(olympic_event=self.event).order_by('shard'))
+        self.assertEqual([s.available for s in shards], [3, 3, 2, 2])
+
+    def test_unlimited_event_has_no_shard(self):
+        """
+        An event without capacity has no shard and reservations are not tracked.
+        """
+        event = OlympicEvent.objects.create(name='Marathon', date_time=timezone.now())
+        self.assertFalse(SeatInventory.objects.filter(olympic_event=event).exists())
+        self.assertIsNone(SeatReservation.objects.reserve(event.pk, 1000))
+        self.assertIsNone(SeatInventory.objects.available(event.pk))
+
+    def test_reserve_spans_shards_and_never_oversells(self):
+        """
+        A reservation larger than any shard takes seats from several shards,
+        and a reservation above the remaining seats takes nothing.
+        """
+        reservation = SeatReservation.objects.reserve(self.event.pk, 7)
+        self.assertEqual(reservation.status, 'held')
+        self.assertEqual(total_available(self.event), 3)
+        self.assertGreater(reservation.expires_at, timezone.now() + timedelta(minutes=14))
+
+        with self.assertRaises(SeatsUnavailable):
+            SeatReservation.objects.reserve(self.event.pk, 4)
+        self.assertEqual(total_available(self.event), 3)
+        self.assertEqual(SeatReservation.objects.count(), 1)
+
+        SeatReservation.objects.reserve(self.event.pk, 3)
+        self.assertEqual(total_available(self.event), 0)
+
+    def test_release_gives_seats_back_once(self):
+        """
+        Releasing a hold gives its seats back; releasing it again is a no-op.
+        """
+        reservation = SeatReservation.objects.reserve(self.event.pk, 4)
+        self.assertTrue(reservation.release())
+        self.assertFalse(reservation.release())
+        self.assertEqual(total_available(self.event), 10)
+
+    def test_expired_holds_are_released_when_sold_out(self):
+        """
+        A reservation on a sold-out event reclaims the seats of expired holds.
+        """
+        expired = SeatReservation.objects.reserve(self.event.pk, 10)
+        SeatReservation.objects.filter(pk=expired.pk).update(expires_at=timezone.now() - timedelta(minutes=1))
+
+        reservation = SeatReservation.objects.reserve(self.event.pk, 6)
+        self.assertEqual(reservation.seats, 6)
+        expired.refresh_from_db()
+        self.assertEqual(expired.status, 'released')
+        self.assertEqual(total_available(self.event), 4)
+
+    def test_release_expired_is_bounded(self):
+        """
+        release_expired() releases at most batch_size holds past their expiry.
+        """
+        for _ in range(3):
+            SeatReservation.objects.reserve(self.event.pk, 1)
+        later = timezone.now() + timedelta(minutes=20)
+        self.assertEqual(SeatReservation.objects.release_expired(now=later, batch_size=2), 2)
+        self.assertEqual(SeatReservation.objects.release_expired(now=later), 1)
+        self.assertEqual(SeatReservation.objects.release_expired(now=later), 0)
+        self.assertEqual(total_available(self.event), 10)
+
+    def test_capacity_change_accounts_for_sold_and_held_seats(self):
+        """
+        Changing the capacity keeps the seats already sold or held out of the shards.
+        """
+        user = User.objects.create_user(email='buyer@example.com', password='securepass')
+        offer = Offer.objects.create(name='Duo', price=20, nb_place=2)
+        order = Order.objects.create(user=user, amount=40, status='paid')
+        OrderItem.objects.create(order=order, offer=offer, olympic_event=self.event, quantity=2, price=20, amount=40)
+        SeatReservation.objects.reserve(self.event.pk, 1)
+
+        self.event.capacity = 20
+        self.event.save()
+        self.assertEqual(total_available(self.event), 15)
+
+        self.event.capacity = None
+        self.event.save()
+        self.assertFalse(SeatInventory.objects.filter(olympic_event=self.event).exists())
+
+    def test_seats_are_only_resynchronised_when_the_capacity_changes(self):
+        """
+        Saving an event without changing its capacity leaves the shards untouched.
+        """
+        event = OlympicEvent.objects.get(pk=self.event.pk)
+        # The UPDATE of the event only
+        with self.assertNumQueries(1):
+            event.name = 'Finale 200m'
+            event.save()
+        with self.assertNumQueries(1):
+            event.save(update_fields=['name'])
+        event.capacity = 12
+        event.save()
+        self.assertEqual(total_available(event), 12)
+
+
+@override_settings(SEAT_INVENTORY_SHARDS=4)
+class CheckoutReservationTestCase(APITestCase):
+    """
+    Test case for the seat holds taken at checkout.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(email='checkout@example.com', password='securepass')
+        self.client.force_authenticate(user=self.user)
+        self.event = OlympicEvent.objects.create(name='Finale judo', date_time=timezone.now(), capacity=4)
+        self.offer = Offer.objects.create(name='Duo', price=20, nb_place=2)
+
+    def checkout(self, quantity):
+        cart = Cart.objects.create(custom_user=self.user)
+        CartItem.objects.create(cart=cart, offer=self.offer, olympic_event=self.event, quantity=quantity, amount=20 * quantity)
+        return cart, self.client.post(reverse('cart-checkout', args=[cart.pk]))
+
+    def test_checkout_holds_seats_until_payment(self):
+        """
+        Checkout holds quantity x nb_place seats, confirmed when the order is paid.
+        """
+        cart, response = self.checkout(2)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        order = Order.objects.get(pk=response.data['id'])
+        reservation = order.reservations.get()
+        self.assertEqual((reservation.seats, reservation.status), (4, 'held'))
+        self.assertEqual(total_available(self.event), 0)
+
+        order.mark_as_paid()
+        reservation.refresh_from_db()
+        self.assertEqual(reservation.status, 'confirmed')
+
+    def test_sold_out_checkout_is_rolled_back(self):
+        """
+        Checkout of more seats than left returns 409 and saves nothing.
+        """
+        cart, response = self.checkout(3)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertIn('Finale judo', response.data['detail'])
+        cart.refresh_from_db()
+        self.assertIsNone(cart.ordered_at)
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(total_available(self.event), 4)
+
+    def test_payment_after_expiry_takes_seats_again(self):
+        """
+        An order paid after its hold expired takes its seats again if still available.
+        """
+        cart, response = self.checkout(1)
+        order = Order.objects.get(pk=response.data['id'])
+        SeatReservation.objects.filter(order=order).update(expires_at=timezone.now() - timedelta(minutes=1))
+        SeatReservation.objects.release_expired()
+        self.assertEqual(total_available(self.event), 4)
+
+        order.mark_as_paid()
+        self.assertEqual(order.reservations.get().status, 'confirmed')
+        self.assertEqual(total_available(self.event), 2)
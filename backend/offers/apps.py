@@ -4,3 +4,16 @@ from django.apps import AppConfig
 class OffersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "offers"
+
+    def ready(self):
+        """
+        Invalidate the cached catalog whenever an Offer is saved or deleted,
+        including edits made from the admin.
+        """
+        from django.db.models.signals import post_save, post_delete
+        from utils.http_cache import invalidate_catalog_on_change
+        from .models import Offer
+
+        receiver = invalidate_catalog_on_change('offers')
+        post_save.connect(receiver, sender=Offer, weak=False, dispatch_uid="offers_invalidate_catalog_on_save")
+        post_delete.connect(receiver, sender=Offer, weak=False, dispatch_uid="offers_invalidate_catalog_on_delete")
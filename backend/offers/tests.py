@@ -1,8 +1,11 @@
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
+from django.contrib.auth import get_user_model
+from django.test import override_settings
 from .models import Offer
 
+@override_settings(CATALOG_CACHE_ENABLED=True)
 class OfferAPITests(APITestCase):
     def setUp(self):
         """
@@ -56,3 +59,89 @@ class OfferAPITests(APITestCase):
         """
         self.assertEqual(str(self.offer1), self.offer1.name)
 
+    def test_offers_are_served_with_validators_and_cache_control(self):
+        """
+        Ensure the offer list carries ETag, Last-Modified and a public Cache-Control,
+        and that a conditional request gets a 304 without body.
+        """
+        url = reverse('offers_list')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('s-maxage', response['Cache-Control'])
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+
+    @override_settings(CATALOG_CACHE_ENABLED=False)
+    def test_offers_are_not_cached_without_shared_cache(self):
+        """
+        Ensure the offer list is served fresh, without validators, when the catalog cache is disabled.
+        """
+        url = reverse('offers_list')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('ETag', response)
+
+        Offer.objects.filter(pk=self.offer1.pk).update(price=55)
+        solo = [o for o in self.client.get(url).json() if o['id'] == self.offer1.id][0]
+        self.assertEqual(solo['price'], '55.00')
+
+    def test_offer_changes_invalidate_cached_list(self):
+        """
+        Ensure saving or deleting an offer invalidates the cached list.
+        """
+        url = reverse('offers_list')
+        etag = self.client.get(url)['ETag']
+
+        self.offer1.price = 55
+        self.offer1.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        solo = [o for o in response.json() if o['id'] == self.offer1.id][0]
+        self.assertEqual(solo['price'], '55.00')
+
+        self.offer2.delete()
+        ids = [o['id'] for o in self.client.get(url).json()]
+        self.assertNotIn(self.offer2.id, ids)
+
+    def test_invalidations_within_a_second_change_last_modified(self):
+        """
+        Ensure a client sending only If-Modified-Since sees every change, even several in the same second.
+        """
+        url = reverse('offers_list')
+        for price in (51, 52):
+            last_modified = self.client.get(url)['Last-Modified']
+            self.offer1.price = price
+            self.offer1.save()
+            response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_admin_list_editable_price_change_invalidates_cached_list(self):
+        """
+        Ensure a price edited from the admin change list is served immediately.
+        """
+        url = reverse('offers_list')
+        self.client.get(url)
+        admin = get_user_model().objects.create_superuser(email='admin@example.com', password='adminpass')
+        self.client.force_login(admin)
+        response = self.client.post(reverse('admin:offers_offer_changelist'), {
+            'form-TOTAL_FORMS': '2',
+            'form-INITIAL_FORMS': '2',
+            'form-MIN_NUM_FORMS': '0',
+            'form-MAX_NUM_FORMS': '1000',
+            'form-0-id': self.offer1.id,
+            'form-0-price': '42.00',
+            'form-0-nb_place': '1',
+            'form-1-id': self.offer2.id,
+            'form-1-price': '90.00',
+            'form-1-nb_place': '2',
+            '_save': 'Enregistrer',
+        })
+        self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+        self.client.logout()
+        solo = [o for o in self.client.get(url).json() if o['id'] == self.offer1.id][0]
+        self.assertEqual(solo['price'], '42.00')
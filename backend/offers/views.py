@@ -2,8 +2,10 @@ from rest_framework import generics
 from rest_framework.permissions import AllowAny
 from .models import Offer
 from .serializers import OfferSerializer
+from utils.http_cache import CachedCatalogMixin
 
-class OfferListAPIView(generics.ListAPIView):
+class OfferListAPIView(CachedCatalogMixin, generics.ListAPIView):
+    cache_namespace = 'offers'
     permission_classes = [AllowAny]
     queryset = Offer.objects.all()
     serializer_class = OfferSerializer
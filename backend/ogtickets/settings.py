@@ -92,6 +92,7 @@ INSTALLED_APPS = [
     'order',
     'payment',
     'tickets',
+    'inventory',
 ]
 """List of installed applications."""
 
@@ -235,6 +236,43 @@ REST_FRAMEWORK = {
 }
 """REST framework configuration."""
 
+# ====================== #
+#  CACHE SETTINGS        #
+# ====================== #
+
+CACHE_URL = os.getenv('CACHE_URL', '')
+"""Redis URL of the shared cache. Empty string uses a per-process memory cache."""
+
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+"""Cache configuration. A shared cache is required when several processes serve the API."""
+
+CATALOG_CACHE_ENABLED = os.getenv('CATALOG_CACHE_ENABLED', str(bool(CACHE_URL))).lower() in ['true', '1', 'yes']
+"""
+Serve the catalog from pre-rendered cached responses. On by default only with the shared cache:
+with the per-process memory cache, the invalidations of one gunicorn worker would not reach the others.
+"""
+
+CATALOG_CACHE_TIMEOUT = int(os.getenv('CATALOG_CACHE_TIMEOUT', 3600))
+"""Lifetime (seconds) of pre-rendered catalog responses in the cache."""
+
+CATALOG_CACHE_MAX_AGE = int(os.getenv('CATALOG_CACHE_MAX_AGE', 30))
+"""Browser cache lifetime (seconds) of catalog responses (Cache-Control max-age)."""
+
+CATALOG_CACHE_S_MAXAGE = int(os.getenv('CATALOG_CACHE_S_MAXAGE', 60))
+"""Edge (Cloudflare) cache lifetime (seconds) of catalog responses (Cache-Control s-maxage)."""
+
 # ====================== #
 #  INTERNATIONALIZATION  #
 # ====================== #
@@ -274,6 +312,55 @@ STRIPE_SECRET_KEY = os.getenv('STRIPE_SECRET_KEY', 'sk_test_123:#mockedstripe!45
 STRIPE_WEBHOOK_SECRET = os.getenv('STRIPE_WEBHOOK_SECRET', 'whsec_1234567890abcdefg')
 """Stripe webhook secret for verifying webhook events."""
 
+PAYMENT_GATEWAY = os.getenv('PAYMENT_GATEWAY', 'payment.gateways.StripeGateway')
+"""Dotted path of the payment gateway class.
+'payment.gateways.FakeStripeGateway' runs payments offline, for local benchmarks."""
+
+# ====================== #
+#  SEAT INVENTORY SETTINGS
+# ====================== #
+
+SEAT_HOLD_TTL = int(os.getenv('SEAT_HOLD_TTL', 15))
+"""Minutes during which the seats of a checked out order stay held while awaiting payment."""
+
+SEAT_INVENTORY_SHARDS = int(os.getenv('SEAT_INVENTORY_SHARDS', 8))
+"""Number of counter rows the remaining seats of an event are spread over.
+More shards mean less lock contention between concurrent checkouts of the same event."""
+
+# ====================== #
+#  DATA RETENTION SETTINGS
+# ====================== #
+
+CART_RETENTION_DAYS = int(os.getenv('CART_RETENTION_DAYS', 30))
+"""Days without activity after which an open cart is considered abandoned and deleted."""
+
+ORDERED_CART_RETENTION_DAYS = int(os.getenv('ORDERED_CART_RETENTION_DAYS', 7))
+"""Days an ordered cart is kept after its checkout; its order keeps the purchased items."""
+
+PENDING_ORDER_RETENTION_HOURS = int(os.getenv('PENDING_ORDER_RETENTION_HOURS', 24))
+"""Hours after which an order still awaiting payment is cancelled and its held seats released.
+A payment captured later still marks the order as paid."""
+
+SWEEP_BATCH_SIZE = int(os.getenv('SWEEP_BATCH_SIZE', 500))
+"""Number of rows expired per transaction by the periodic sweeps."""
+
+SWEEP_MAX_BATCHES = int(os.getenv('SWEEP_MAX_BATCHES', 20))
+"""Maximum number of batches per sweep run; the remaining rows are left to the next run."""
+
+SWEEP_INTERVAL = int(os.getenv('SWEEP_INTERVAL', 15))
+"""Minutes between two runs of the periodic sweeps."""
+
+# ====================== #
+#  TICKET VALIDATION SETTINGS
+# ====================== #
+
+TICKET_SCAN_MAX_BATCH_SIZE = int(os.getenv('TICKET_SCAN_MAX_BATCH_SIZE', 500))
+"""Maximum number of scans accepted in one batch from a gate device."""
+
+TICKET_SYNC_OVERLAP = int(os.getenv('TICKET_SYNC_OVERLAP', 60))
+"""Seconds the bundle and delta-sync watermarks are moved back, so that tickets changed by
+transactions committing after the watermark is read are sent by the next delta anyway."""
+
 # ====================== #
 #  CELERY & BACKGROUND TASKS
 # ====================== #
@@ -311,6 +398,18 @@ CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 """Celery worker timezone."""
 
+CELERY_BEAT_SCHEDULE = {
+    'sweep-stale-orders': {
+        'task': 'order.tasks.sweep_stale_orders_task',
+        'schedule': timedelta(minutes=SWEEP_INTERVAL),
+    },
+    'sweep-stale-carts': {
+        'task': 'cart.tasks.sweep_stale_carts_task',
+        'schedule': timedelta(minutes=SWEEP_INTERVAL),
+    },
+}
+"""Periodic tasks run by Celery beat (started with the worker, see scripts/celery-cmd.sh)."""
+
 # ====================== #
 #  MISCELLANEOUS SETTINGS
 # ====================== #
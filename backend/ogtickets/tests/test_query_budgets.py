@@ -0,0 +1,289 @@
+"""
+Performance regression suite: SQL query and wall-time budgets of the API endpoints.
+
+Every endpoint is called against realistic volumes (a user with 50 tickets, a
+cart of 30 items, 500 events) and must stay within its budget. When a budget is
+exceeded, the queries run are printed grouped by pattern, so an N+1 shows up as
+one pattern repeated once per row.
+"""
+import json
+import os
+import re
+import time
+from collections import Counter
+from datetime import timedelta
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, NoReverseMatch, resolve, reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from cart.models import Cart, CartItem
+from offers.models import Offer
+from ogtickets import api_urls
+from olympic_events.models import OlympicEvent
+from order.models import Order, OrderItem
+from payment.gateways import get_gateway
+from payment.tasks import process_stripe_event_task
+from tickets.models import Ticket
+from tickets.tests.test_ticket_api import create_paid_order, create_ticket_owner
+from utils.encryption import generate_ticket_hmac
+
+TIME_FACTOR = float(os.getenv('PERF_TIME_FACTOR', 1))
+"""Multiplier of the wall-time budgets, for slow CI machines."""
+
+BUDGETS = {
+    # label: (max queries, max milliseconds)
+    'GET olympic_events_list': (1, 1500),
+    'GET olympic_events_list page': (1, 300),
+    'GET olympic_events_detail': (1, 200),
+    'GET offers_list': (1, 200),
+    'GET cart-list': (2, 300),
+    'GET cart-list fields': (2, 200),  # Items collapsed to primary keys: no offer or event join
+    'GET cart-detail': (2, 300),
+    'GET cart-summary': (1, 200),
+    'GET cart-item-list': (1, 300),
+    'POST cart-item-list': (9, 300),
+    'GET cart-item-detail': (1, 200),
+    'PATCH cart-item-detail': (10, 300),  # The cart row is locked, then its totals recomputed
+    'DELETE cart-item-detail': (5, 300),  # Same lock and recompute, from the delete receivers
+    'POST cart-merge': (10, 500),
+    'POST cart-checkout': (9, 1000),
+    'GET order-list': (2, 500),
+    'GET order-detail': (2, 300),
+    'POST create-payment-intent': (3, 300),
+    'POST stripe-webhook': (3, 300),
+    'TASK stripe-webhook': (14, 1000),
+    'GET ticket-list': (1, 500),
+    'GET ticket-detail': (1, 200),
+    'GET ticket-qr': (1, 200),
+    'GET ticket-qr-batch': (1, 500),
+    'POST ticket-scan': (51, 1000),  # 50 scans: one load, then one conditional update per accepted ticket
+    'GET ticket-bundle': (2, 500),
+    'GET ticket-sync': (2, 500),
+    'POST jwt-create': (2, 1500),  # Dominated by password hashing
+    'POST jwt-refresh': (13, 300),  # Token rotation and blacklisting by simplejwt
+    'POST jwt-logout': (8, 300),  # Blacklisting of the refresh token
+    'GET customuser-me': (1, 200),
+}
+
+def api_route_names(patterns=api_urls.urlpatterns):
+    """
+    Names of the API routes served by project views.
+    Routes of third-party apps and routes shadowed by an earlier one are skipped.
+    """
+    names = set()
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            names |= api_route_names(pattern.url_patterns)
+            continue
+        module = getattr(pattern.callback, '__module__', '')
+        if not pattern.name or module.startswith(('djoser', 'rest_framework')):
+            continue
+        try:
+            path = reverse(pattern.name, kwargs={key: '1' for key in pattern.pattern.regex.groupindex if key != 'format'})
+        except NoReverseMatch:
+            continue
+        if resolve(path).url_name == pattern.name:
+            names.add(pattern.name)
+    return names
+
+def query_patterns(queries):
+    """Group queries by their SQL with literals replaced, most repeated first."""
+    normalize = lambda sql: re.sub(r"'[^']*'|\b\d+(\.\d+)?\b", '?', sql)
+    return Counter(normalize(query['sql']) for query in queries).most_common()
+
+@override_settings(
+    PAYMENT_GATEWAY='payment.gateways.FakeStripeGateway',
+    CELERY_TASK_ALWAYS_EAGER=True,
+    CELERY_TASK_EAGER_PROPAGATES=True,
+)
+class QueryBudgetTestCase(APITestCase):
+    """
+    Query and wall-time budgets of every API endpoint.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Seed 500 events, a user with 50 tickets and an open cart of 30 items.
+        """
+        now = timezone.now()
+        OlympicEvent.objects.bulk_create([
+            OlympicEvent(
+                sport=f'Sport {i % 20}', name=f'Épreuve {i}', description='Description',
+                date_time=now + timedelta(hours=i), location=f'Site {i % 10}',
+            )
+            for i in range(500)
+        ])
+        cls.events = list(OlympicEvent.objects.order_by('id')[:5])
+        cls.offers = [
+            Offer.objects.create(name=f'Offre {i}', description='Offre', price=10 * (i + 1), nb_place=i + 1)
+            for i in range(6)
+        ]
+        cls.user = create_ticket_owner('budget@example.com', first_name='Budget')
+        cls.staff = create_ticket_owner('staff@example.com', is_staff=True)
+        for i in range(10):
+            create_paid_order(cls.user, 5, offer=cls.offers[i % 6], event=cls.events[i % 5])
+        cls.cart = Cart.objects.create(custom_user=cls.user)
+        CartItem.objects.bulk_create([
+            CartItem(cart=cls.cart, offer=offer, olympic_event=event, quantity=2, amount=offer.price * 2)
+            for offer in cls.offers for event in cls.events
+        ])
+        cls.ticket = Ticket.objects.filter(user=cls.user).order_by('created_at', 'id').first()
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(user=self.user)
+
+    def assertWithinBudget(self, label, request, status=200):
+        """
+        Run a request and check its status and its query and wall-time budgets.
+        @param label: Key of the budget in BUDGETS.
+        @param request: Callable running the request.
+        @param status: Expected status code, None for a Celery task.
+        @return: The response, or the task result.
+        """
+        max_queries, max_ms = BUDGETS[label]
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            response = request()
+            if getattr(response, 'streaming', False):
+                # Streamed bodies are only built (and queried) while being consumed
+                b''.join(response.streaming_content)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+        if status is not None:
+            self.assertEqual(response.status_code, status, f"{label}: {getattr(response, 'data', '')}")
+        if len(ctx.captured_queries) > max_queries:
+            patterns = '\n'.join(f"  {count} x {sql}" for count, sql in (
+                (count, sql) for sql, count in query_patterns(ctx.captured_queries)
+            ))
+            self.fail(f"{label}: {len(ctx.captured_queries)} queries, budget {max_queries}. Queries by pattern:\n{patterns}")
+        self.assertLessEqual(elapsed_ms, max_ms * TIME_FACTOR, f"{label}: {elapsed_ms:.0f} ms, budget {max_ms} ms")
+        return response
+
+    def test_every_route_has_a_budget(self):
+        """
+        Every API route served by the project has at least one budget.
+        """
+        budgeted = {label.split()[1] for label in BUDGETS}
+        self.assertEqual(api_route_names() - budgeted, set())
+
+    def test_catalog(self):
+        """
+        Catalog endpoints, with 500 events.
+        """
+        response = self.assertWithinBudget('GET olympic_events_list', lambda: self.client.get(reverse('olympic_events_list')))
+        self.assertEqual(len(response.json()), 500)
+        self.assertWithinBudget('GET olympic_events_list page', lambda: self.client.get(
+            reverse('olympic_events_list'), {'page_size': 50, 'sport': 'Sport 1'}
+        ))
+        self.assertWithinBudget('GET olympic_events_detail', lambda: self.client.get(
+            reverse('olympic_events_detail', args=[self.events[0].pk])
+        ))
+        self.assertWithinBudget('GET offers_list', lambda: self.client.get(reverse('offers_list')))
+
+    def test_cart(self):
+        """
+        Cart and cart item endpoints, with a cart of 30 items.
+        """
+        response = self.assertWithinBudget('GET cart-list', lambda: self.client.get(reverse('cart-list')))
+        self.assertEqual(len(response.data[0]['items']), 30)
+        response = self.assertWithinBudget('GET cart-list fields', lambda: self.client.get(
+            reverse('cart-list'), {'fields': 'id,amount,items_count,items'}
+        ))
+        self.assertEqual(len(response.data[0]['items']), 30)
+        self.assertWithinBudget('GET cart-detail', lambda: self.client.get(reverse('cart-detail', args=[self.cart.pk])))
+        response = self.assertWithinBudget('GET cart-summary', lambda: self.client.get(reverse('cart-summary')))
+        self.assertEqual(response.data['id'], self.cart.pk)
+        self.assertWithinBudget('GET cart-item-list', lambda: self.client.get(reverse('cart-item-list')))
+
+        event = OlympicEvent.objects.order_by('-id').first()
+        response = self.assertWithinBudget('POST cart-item-list', lambda: self.client.post(reverse('cart-item-list'), {
+            'offer_id': self.offers[0].pk, 'olympic_event_id': event.pk, 'quantity': 1, 'amount': '10.00',
+        }, format='json'), status=201)
+        url = reverse('cart-item-detail', args=[response.data['id']])
+        self.assertWithinBudget('GET cart-item-detail', lambda: self.client.get(url))
+        self.assertWithinBudget('PATCH cart-item-detail', lambda: self.client.patch(url, {'quantity': 3}, format='json'))
+        self.assertWithinBudget('DELETE cart-item-detail', lambda: self.client.delete(url), status=204)
+
+        response = self.assertWithinBudget('POST cart-merge', lambda: self.client.post(reverse('cart-merge'), {'items': [
+            {'offer_id': self.offers[0].pk, 'olympic_event_id': self.events[0].pk, 'quantity': 1},
+            {'offer_id': self.offers[0].pk, 'olympic_event_id': event.pk, 'quantity': 2},
+        ]}, format='json'))
+        self.assertEqual(len(response.data['items']), 31)
+        CartItem.objects.filter(cart=self.cart, olympic_event=event).delete()
+
+        response = self.assertWithinBudget('POST cart-checkout', lambda: self.client.post(
+            reverse('cart-checkout', args=[self.cart.pk])
+        ), status=201)
+        self.assertEqual(len(response.data['items']), 30)
+
+    def test_orders_and_payment(self):
+        """
+        Order history, payment intent, webhook acknowledgement and its processing task.
+        """
+        response = self.assertWithinBudget('GET order-list', lambda: self.client.get(reverse('order-list')))
+        self.assertEqual(len(response.data), 10)
+        order = Order.objects.filter(user=self.user).first()
+        self.assertWithinBudget('GET order-detail', lambda: self.client.get(reverse('order-detail', args=[order.pk])))
+
+        pending = Order.objects.create(user=self.user, amount=sum(offer.price for offer in self.offers))
+        OrderItem.objects.bulk_create([
+            OrderItem(order=pending, offer=offer, olympic_event=self.events[0], quantity=1, price=offer.price, amount=offer.price)
+            for offer in self.offers
+        ])
+        response = self.assertWithinBudget('POST create-payment-intent', lambda: self.client.post(
+            reverse('create-payment-intent'), {'order_id': pending.pk}, format='json'
+        ))
+        payload, signature = get_gateway().succeed(response.data['clientSecret'].split('_secret_')[0])
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.assertWithinBudget('POST stripe-webhook', lambda: self.client.post(
+                reverse('stripe-webhook'), data=payload, content_type='application/json', HTTP_STRIPE_SIGNATURE=signature,
+            ))
+        self.assertEqual(len(callbacks), 1)
+
+        event_id = json.loads(payload)['id']
+        result = self.assertWithinBudget('TASK stripe-webhook', lambda: process_stripe_event_task.apply(args=[event_id]), status=None)
+        self.assertTrue(result.successful())
+        self.assertEqual(Ticket.objects.filter(order_item__order=pending).count(), 6)
+
+    def test_tickets(self):
+        """
+        Ticket wallet endpoints with 50 tickets, and the staff gate endpoints.
+        """
+        response = self.assertWithinBudget('GET ticket-list', lambda: self.client.get(reverse('ticket-list')))
+        self.assertEqual(len(response.data), 50)
+        self.assertWithinBudget('GET ticket-detail', lambda: self.client.get(reverse('ticket-detail', args=[self.ticket.pk])))
+        self.assertWithinBudget('GET ticket-qr', lambda: self.client.get(reverse('ticket-qr', args=[self.ticket.pk])))
+        response = self.assertWithinBudget('GET ticket-qr-batch', lambda: self.client.get(reverse('ticket-qr-batch')))
+        self.assertEqual(len(response.data), 50)
+
+        self.client.force_authenticate(user=self.staff)
+        tickets = list(Ticket.objects.filter(user=self.user).select_related('user'))
+        scans = [{'ticket_id': str(ticket.id), 'hmac': generate_ticket_hmac(ticket)} for ticket in tickets]
+        response = self.assertWithinBudget('POST ticket-scan', lambda: self.client.post(
+            reverse('ticket-scan'), {'scans': scans}, format='json'
+        ))
+        self.assertEqual({result['result'] for result in response.data}, {'accepted'})
+        self.assertWithinBudget('GET ticket-bundle', lambda: self.client.get(
+            reverse('ticket-bundle'), {'olympic_event': self.events[0].pk}
+        ))
+        self.assertWithinBudget('GET ticket-sync', lambda: self.client.get(
+            reverse('ticket-sync'), {'olympic_event': self.events[0].pk, 'since': (timezone.now() - timedelta(days=1)).isoformat()}
+        ))
+
+    def test_auth(self):
+        """
+        JWT login, refresh and logout, and the current user endpoint.
+        """
+        self.user.set_password('budget-password')
+        self.user.save(update_fields=['password'])
+        self.client.force_authenticate(user=None)
+        response = self.assertWithinBudget('POST jwt-create', lambda: self.client.post(
+            reverse('jwt-create'), {'email': self.user.email, 'password': 'budget-password'}, format='json'
+        ))
+        self.assertWithinBudget('POST jwt-refresh', lambda: self.client.post(reverse('jwt-refresh')))
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        self.assertWithinBudget('GET customuser-me', lambda: self.client.get(reverse('customuser-me')))
+        self.assertWithinBudget('POST jwt-logout', lambda: self.client.post(reverse('jwt-logout')), status=205)
@@ -0,0 +1,154 @@
+"""
+Query plan suite: the hot-path queries must be served by their index.
+
+Each index declared for a query shape is checked with EXPLAIN on seeded data
+(5000 orders and tickets, 2200 carts): the test fails if PostgreSQL falls back
+to a sequential scan or picks another index. Plans are only meaningful on
+PostgreSQL, the suite is skipped on other databases.
+"""
+from datetime import timedelta
+from unittest import skipUnless
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+from cart.models import Cart
+from offers.models import Offer
+from olympic_events.models import OlympicEvent
+from order.models import Order, OrderItem
+from tickets.bundle import bundle_tickets
+from tickets.models import Ticket
+
+User = get_user_model()
+
+USERS = 200
+ORDERS_PER_USER = 25
+EVENTS = 20
+
+@skipUnless(connection.vendor == 'postgresql', "Query plans are checked on PostgreSQL only.")
+class QueryPlanTestCase(TestCase):
+    """
+    Test case for the indexes of the hot-path queries.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Seed 200 users with 25 orders and tickets each, one open and 10 ordered carts each.
+        Few orders are pending, few tickets are valid and few carts are stale, as in production.
+        """
+        now = timezone.now()
+        offer = Offer.objects.create(name='Solo', price=10)
+        events = OlympicEvent.objects.bulk_create(
+            OlympicEvent(name=f'Event {i}', date_time=now) for i in range(EVENTS)
+        )
+        cls.event = events[0]
+        users = User.objects.bulk_create(User(email=f'plan{i}@example.com') for i in range(USERS))
+        cls.user = users[0]
+
+        orders = Order.objects.bulk_create(
+            Order(user=user, amount=10, status='pending' if i % 100 == 0 else 'paid')
+            for user in users for i in range(ORDERS_PER_USER)
+        )
+        items = OrderItem.objects.bulk_create(
+            OrderItem(order=order, offer=offer, olympic_event=events[i % EVENTS], quantity=1, price=10, amount=10)
+            for i, order in enumerate(orders)
+        )
+        Ticket.objects.bulk_create(
+            Ticket(
+                user_id=item.order.user_id, order_item=item, olympic_event_id=item.olympic_event_id,
+                nb_place=1, ticket_key=f'key-{i}', status='valid' if i % 10 == 0 else 'used',
+            )
+            for i, item in enumerate(items)
+        )
+
+        Cart.objects.bulk_create(
+            Cart(custom_user=user, ordered_at=None if i == 0 else now)
+            for user in users for i in range(11)
+        )
+        old = now - timedelta(days=60)
+        Cart.objects.filter(ordered_at__isnull=True, custom_user__in=users[:10]).update(modified_at=old)
+        Cart.objects.filter(ordered_at__isnull=False, custom_user__in=users[:2]).update(ordered_at=old)
+        cls.stale_before = now - timedelta(days=30)
+
+        with connection.cursor() as cursor:
+            for model in (User, Order, OrderItem, Ticket, Cart):
+                cursor.execute(f'ANALYZE {model._meta.db_table}')
+
+    def assertUsesIndex(self, queryset, index_name):
+        """
+        Check that the plan of a queryset reads its table through the given index.
+        @param queryset: The queryset to explain.
+        @param index_name: Name of the index expected in the plan.
+        """
+        plan = queryset.explain()
+        self.assertNotIn(f'Seq Scan on {queryset.model._meta.db_table}', plan, plan)
+        self.assertIn(index_name, plan, plan)
+
+    def test_order_list(self):
+        """
+        The orders of a user, newest first (order list).
+        """
+        self.assertUsesIndex(
+            Order.objects.filter(user=self.user).order_by('-created_at', '-id')[:20],
+            'order_user_created_idx',
+        )
+
+    def test_stale_pending_orders(self):
+        """
+        The oldest pending orders (stale orders sweep).
+        """
+        self.assertUsesIndex(
+            Order.all_objects
+            .filter(status='pending', created_at__lt=timezone.now())
+            .order_by('created_at', 'pk')
+            .values_list('pk', flat=True)[:500],
+            'order_pending_created_idx',
+        )
+
+    def test_open_cart(self):
+        """
+        The open cart of a user (cart list, summary, item changes).
+        """
+        self.assertUsesIndex(
+            Cart.objects.filter(custom_user=self.user, ordered_at__isnull=True),
+            'unique_open_cart_per_user',
+        )
+
+    def test_abandoned_carts(self):
+        """
+        Open carts without recent activity (stale carts sweep).
+        """
+        self.assertUsesIndex(
+            Cart.objects
+            .filter(ordered_at__isnull=True, modified_at__lt=self.stale_before)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:500],
+            'cart_open_modified_idx',
+        )
+
+    def test_old_ordered_carts(self):
+        """
+        Carts ordered long ago (stale carts sweep).
+        """
+        self.assertUsesIndex(
+            Cart.objects
+            .filter(ordered_at__lt=self.stale_before)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:500],
+            'cart_ordered_idx',
+        )
+
+    def test_ticket_list(self):
+        """
+        The tickets of a user, newest first (ticket wallet).
+        """
+        self.assertUsesIndex(
+            Ticket.objects.filter(user=self.user).order_by('-created_at', '-id')[:20],
+            'ticket_user_created_idx',
+        )
+
+    def test_validation_bundle(self):
+        """
+        The valid tickets of an event, in id order (validation bundle).
+        """
+        self.assertUsesIndex(bundle_tickets(self.event.pk), 'ticket_event_valid_idx')
@@ -4,3 +4,16 @@ from django.apps import AppConfig
 class OlympicEventsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "olympic_events"
+
+    def ready(self):
+        """
+        Invalidate the cached catalog whenever an OlympicEvent is saved or deleted,
+        including edits made from the admin.
+        """
+        from django.db.models.signals import post_save, post_delete
+        from utils.http_cache import invalidate_catalog_on_change
+        from .models import OlympicEvent
+
+        receiver = invalidate_catalog_on_change('olympic_events')
+        post_save.connect(receiver, sender=OlympicEvent, weak=False, dispatch_uid="olympic_events_invalidate_catalog_on_save")
+        post_delete.connect(receiver, sender=OlympicEvent, weak=False, dispatch_uid="olympic_events_invalidate_catalog_on_delete")
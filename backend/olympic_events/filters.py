@@ -0,0 +1,68 @@
+from datetime import datetime, time
+from django.contrib.postgres.search import SearchQuery, SearchVector
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import serializers
+
+SEARCH_VECTOR = SearchVector('name', 'description', config='french')
+"""Full-text document of an event; must match the expression of the GIN index."""
+
+def parse_bound(value, param, end_of_day=False):
+    """
+    Parses a date or datetime query parameter into an aware datetime.
+    A bare date stands for the start of the day (or its end for upper bounds).
+
+    @param value: The raw query parameter value.
+    @param param: Name of the parameter, used in the error message.
+    @param end_of_day: Whether a bare date is an upper bound.
+    @raises serializers.ValidationError: If the value is not a valid date or datetime.
+    @return: The aware datetime.
+    """
+    try:
+        day = parse_date(value)
+        moment = parse_datetime(value.replace(' ', '+')) if day is None else None
+    except ValueError:
+        day = moment = None
+    if day is not None:
+        moment = datetime.combine(day, time.max if end_of_day else time.min)
+    elif moment is None:
+        raise serializers.ValidationError({param: "Date invalide (format attendu : AAAA-MM-JJ ou ISO 8601)."})
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+def search_filter(query):
+    """
+    Builds the search condition: name prefix or full-text match on name and description.
+    Full-text search uses PostgreSQL (backed by a GIN index); other databases fall back to icontains.
+    """
+    condition = Q(name__istartswith=query)
+    if connection.vendor == 'postgresql':
+        return condition | Q(search=SearchQuery(query, config='french', search_type='websearch'))
+    return condition | Q(description__icontains=query)
+
+def filter_olympic_events(queryset, params):
+    """
+    Applies the catalog filters to an OlympicEvent queryset.
+
+    Supported parameters: `sport` and `location` (exact, comma-separated values
+    allowed), `date_from` / `date_to` (date or datetime bounds) and `q` (search).
+
+    @param queryset: OlympicEvent queryset.
+    @param params: The request query parameters.
+    @return: The filtered queryset.
+    """
+    for field in ('sport', 'location'):
+        if values := [v for v in params.get(field, '').split(',') if v]:
+            queryset = queryset.filter(**{f'{field}__in': values})
+    if date_from := params.get('date_from'):
+        queryset = queryset.filter(date_time__gte=parse_bound(date_from, 'date_from'))
+    if date_to := params.get('date_to'):
+        queryset = queryset.filter(date_time__lte=parse_bound(date_to, 'date_to', end_of_day=True))
+    if query := params.get('q', '').strip():
+        if connection.vendor == 'postgresql':
+            queryset = queryset.annotate(search=SEARCH_VECTOR)
+        queryset = queryset.filter(search_filter(query))
+    return queryset
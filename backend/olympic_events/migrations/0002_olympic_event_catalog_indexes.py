@@ -0,0 +1,64 @@
+# Generated by Django 5.1.6 on 2026-10-18 15:09
+
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+from django.db.models.functions import Upper
+
+# Search indexes only exist on PostgreSQL: a GIN index on the full-text document
+# used by the `q` filter and a pattern index for case-insensitive name prefixes.
+POSTGRES_INDEXES = [
+    GinIndex(
+        SearchVector("name", "description", config="french"),
+        name="olympic_event_search_idx",
+    ),
+    models.Index(
+        OpClass(Upper("name"), name="text_pattern_ops"),
+        name="olympic_event_name_prefix_idx",
+    ),
+]
+
+
+def add_postgres_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    model = apps.get_model("olympic_events", "OlympicEvent")
+    for index in POSTGRES_INDEXES:
+        schema_editor.add_index(model, index)
+
+
+def remove_postgres_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    model = apps.get_model("olympic_events", "OlympicEvent")
+    for index in POSTGRES_INDEXES:
+        schema_editor.remove_index(model, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("olympic_events", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="olympicevent",
+            index=models.Index(
+                fields=["date_time", "id"], name="olympic_event_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="olympicevent",
+            index=models.Index(
+                fields=["sport", "date_time"], name="olympic_event_sport_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="olympicevent",
+            index=models.Index(
+                fields=["location", "date_time"], name="olympic_event_loc_date_idx"
+            ),
+        ),
+        migrations.RunPython(add_postgres_indexes, remove_postgres_indexes),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.6 on 2026-10-18 15:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("olympic_events", "0002_olympic_event_catalog_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="olympicevent",
+            name="capacity",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Nombre total de places (vide : illimité)",
+                null=True,
+            ),
+        ),
+    ]
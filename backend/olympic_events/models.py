@@ -6,6 +6,30 @@ class OlympicEvent(models.Model):
     description = models.TextField()
     date_time = models.DateTimeField()
     location = models.CharField(max_length=200)
+    capacity = models.PositiveIntegerField(null=True, blank=True, help_text="Nombre total de places (vide : illimité)")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['date_time', 'id'], name='olympic_event_date_idx'),
+            models.Index(fields=['sport', 'date_time'], name='olympic_event_sport_date_idx'),
+            models.Index(fields=['location', 'date_time'], name='olympic_event_loc_date_idx'),
+        ]
 
     def __str__(self):
         return self.name
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Capacity as stored, to resynchronise the seat inventory only when it changes
+        instance._stored_capacity = instance.__dict__.get('capacity')
+        return instance
+
+    def capacity_changed(self):
+        """
+        Tell whether the capacity differs from the one loaded from the database.
+        @return: True if it changed, or if the stored capacity is unknown (instance not loaded or field deferred).
+        """
+        if not hasattr(self, '_stored_capacity') or 'capacity' not in self.__dict__:
+            return True
+        return self.capacity != self._stored_capacity
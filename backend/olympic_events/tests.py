@@ -1,6 +1,7 @@
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
+from django.test import override_settings
 from django.utils import timezone
 from datetime import datetime
 from .models import OlympicEvent
@@ -50,3 +51,90 @@ class OlympicEventAPITests(APITestCase):
         Ensure the model's __str__ method returns the event name.
         """
         self.assertEqual(str(self.event1), self.event1.name)
+
+    @override_settings(CATALOG_CACHE_ENABLED=True)
+    def test_olympic_events_conditional_get(self):
+        """
+        Ensure the event list supports conditional requests and is invalidated on change.
+        """
+        url = reverse('olympic_events_list')
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertIn('public', response['Cache-Control'])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.event1.name = "Hommes, quart de finale"
+        self.event1.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("Hommes, quart de finale", [e['name'] for e in response.json()])
+
+    @override_settings(CATALOG_CACHE_ENABLED=True, ALLOWED_HOSTS=['a.example.com', 'b.example.com'])
+    def test_cached_pages_keep_the_host_of_their_links(self):
+        """
+        Ensure a cached page is not served to another host, its pagination links being absolute.
+        """
+        url = reverse('olympic_events_list')
+        for host in ('a.example.com', 'b.example.com'):
+            response = self.client.get(url, {'page_size': 1}, HTTP_HOST=host)
+            self.assertTrue(response.json()['next'].startswith(f'http://{host}/'))
+
+    def test_get_olympic_event_detail(self):
+        """
+        Ensure the detail route returns a single event and 404 for unknown ids.
+        """
+        response = self.client.get(reverse('olympic_events_detail', args=[self.event2.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['name'], self.event2.name)
+        response = self.client.get(reverse('olympic_events_detail', args=[999999]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_filter_olympic_events(self):
+        """
+        Ensure events can be filtered by sport, location, date range and search.
+        """
+        url = reverse('olympic_events_list')
+
+        def names(**params):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return [e['name'] for e in response.json()]
+
+        self.assertEqual(names(sport='Judo'), [self.event2.name])
+        self.assertEqual(names(sport='Judo,Basketball'), [self.event2.name, self.event1.name])
+        self.assertEqual(names(location='Stade Pierre Mauroy'), [self.event1.name])
+        self.assertEqual(names(date_from='2024-07-28'), [self.event1.name])
+        self.assertEqual(names(date_to='2024-07-27'), [self.event2.name])
+        self.assertEqual(names(date_from='2024-07-27T09:00:00+02:00', date_to='2024-07-27T11:00:00+02:00'), [self.event2.name])
+        self.assertEqual(names(q='hommes'), [self.event1.name])
+        self.assertEqual(names(q='finale'), [self.event2.name])
+
+        response = self.client.get(url, {'date_from': 'demain'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('date_from', response.json())
+
+    def test_cursor_pagination(self):
+        """
+        Ensure events are paginated by date when a page size or cursor is requested.
+        """
+        for day in range(1, 4):
+            OlympicEvent.objects.create(
+                sport="Escrime",
+                name=f"Épée, tour {day}",
+                description="Tableau principal",
+                date_time=timezone.make_aware(datetime(2024, 8, day, 9, 0)),
+                location="Grand Palais"
+            )
+        url = reverse('olympic_events_list')
+        response = self.client.get(url, {'page_size': 2})
+        page = response.json()
+        self.assertEqual([e['name'] for e in page['results']], [self.event2.name, self.event1.name])
+        self.assertIsNotNone(page['next'])
+
+        names = []
+        next_url = page['next']
+        while next_url:
+            page = self.client.get(next_url).json()
+            names += [e['name'] for e in page['results']]
+            next_url = page['next']
+        self.assertEqual(names, ["Épée, tour 1", "Épée, tour 2", "Épée, tour 3"])
@@ -1,6 +1,7 @@
 from django.urls import path
-from .views import OlympicEventListAPIView
+from .views import OlympicEventListAPIView, OlympicEventDetailAPIView
 
 urlpatterns = [
     path('', OlympicEventListAPIView.as_view(), name='olympic_events_list'),
+    path('<int:pk>/', OlympicEventDetailAPIView.as_view(), name='olympic_events_detail'),
 ]
@@ -2,8 +2,30 @@ from rest_framework import generics
 from rest_framework.permissions import AllowAny
 from .models import OlympicEvent
 from .serializers import OlympicEventSerializer
+from .filters import filter_olympic_events
+from utils.http_cache import CachedCatalogMixin
+from utils.pagination import OptionalCursorPagination
 
-class OlympicEventListAPIView(generics.ListAPIView):
+class OlympicEventPagination(OptionalCursorPagination):
+    ordering = ('date_time', 'id')
+
+class OlympicEventListAPIView(CachedCatalogMixin, generics.ListAPIView):
+    """
+    Public catalog of olympic events.
+    Supports filtering by sport, location and date range, search (`q`) and,
+    when `cursor` or `page_size` is given, keyset pagination ordered by date_time.
+    """
+    cache_namespace = 'olympic_events'
+    permission_classes = [AllowAny]
+    serializer_class = OlympicEventSerializer
+    pagination_class = OlympicEventPagination
+
+    def get_queryset(self):
+        queryset = OlympicEvent.objects.order_by('date_time', 'id')
+        return filter_olympic_events(queryset, self.request.query_params)
+
+class OlympicEventDetailAPIView(CachedCatalogMixin, generics.RetrieveAPIView):
+    cache_namespace = 'olympic_events'
     permission_classes = [AllowAny]
     queryset = OlympicEvent.objects.all()
     serializer_class = OlympicEventSerializer
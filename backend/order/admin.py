@@ -1,4 +1,5 @@
 from django.contrib import admin
+from utils.soft_delete import SoftDeleteAdminMixin
 from .models import Order, OrderItem
 
 class OrderItemInline(admin.TabularInline):
@@ -6,7 +7,7 @@ class OrderItemInline(admin.TabularInline):
     extra = 0
 
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(SoftDeleteAdminMixin, admin.ModelAdmin):
     list_display = ['id', 'user', 'amount', 'status', 'created_at', 'paid_at', 'deleted_at']
     list_filter = ['status', 'created_at', 'paid_at']
     search_fields = ['user__email']
@@ -14,7 +15,7 @@ class OrderAdmin(admin.ModelAdmin):
     inlines = [OrderItemInline]
 
 @admin.register(OrderItem)
-class OrderItemAdmin(admin.ModelAdmin):
+class OrderItemAdmin(SoftDeleteAdminMixin, admin.ModelAdmin):
     list_display = ['id', 'order', 'offer', 'olympic_event', 'quantity', 'amount', 'deleted_at']
     list_filter = ['offer', 'olympic_event']
     search_fields = ['offer__name', 'olympic_event__name']
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.6 on 2026-10-18 15:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("order", "0002_order_deleted_at_order_paid_at_orderitem_deleted_at_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="order",
+            name="payment_intent_id",
+            field=models.CharField(
+                blank=True,
+                help_text="Identifiant du PaymentIntent Stripe réglant la commande",
+                max_length=255,
+                null=True,
+                unique=True,
+            ),
+        ),
+    ]
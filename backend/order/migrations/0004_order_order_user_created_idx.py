@@ -0,0 +1,33 @@
+# Generated by Django 5.1.6 on 2026-10-18 15:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("offers", "0002_offer_nb_place"),
+        ("olympic_events", "0003_olympicevent_capacity"),
+        ("order", "0003_order_payment_intent_id"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                condition=models.Q(("deleted_at__isnull", True)),
+                fields=["user", "created_at", "id"],
+                name="order_user_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="orderitem",
+            index=models.Index(
+                condition=models.Q(("deleted_at__isnull", True)),
+                fields=["olympic_event", "order"],
+                name="orderitem_event_live_idx",
+            ),
+        ),
+    ]
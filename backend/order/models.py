@@ -2,6 +2,8 @@ from django.db import models
 from django.conf import settings
 from django.utils import timezone
 from django.db import transaction
+from django.db.models import Q
+from utils.soft_delete import SoftDeleteManager, SoftDeleteQuerySet
 
 class Order(models.Model):
   STATUS_CHOICES = [
@@ -18,8 +20,33 @@ class Order(models.Model):
   status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
   created_at = models.DateTimeField(auto_now_add=True)
   paid_at = models.DateTimeField(null=True, blank=True)
+  payment_intent_id = models.CharField(
+    max_length=255,
+    unique=True,
+    null=True,
+    blank=True,
+    help_text="Identifiant du PaymentIntent Stripe réglant la commande"
+  )
   deleted_at = models.DateTimeField(null=True, blank=True) # soft-delete
 
+  objects = SoftDeleteManager()
+  all_objects = SoftDeleteQuerySet.as_manager()
+
+  class Meta:
+    indexes = [
+      models.Index(
+        fields=['user', 'created_at', 'id'],
+        name='order_user_created_idx',
+        condition=Q(deleted_at__isnull=True)
+      ),
+      # Stale pending orders sweep (order.tasks), deleted orders included
+      models.Index(
+        fields=['created_at', 'id'],
+        name='order_pending_created_idx',
+        condition=Q(status='pending')
+      ),
+    ]
+
   def delete(self, using=None, keep_parents=False):
     """Soft delete : mark the order as deleted instead of removing it."""
     self.deleted_at = timezone.now()
@@ -30,25 +57,30 @@ class Order(models.Model):
     super().delete(using=using, keep_parents=keep_parents)
 
   def mark_as_paid(self):
-    """Update the order status to 'paid' and set the paid_at timestamp."""
-    self.status = 'paid'
-    self.paid_at = timezone.now()
-    self.save(update_fields=['status', 'paid_at'])
-    self.generate_tickets()
+    """
+    Mark the order as paid, confirm its held seats and issue its tickets.
+    The status change is a conditional update, so an order that is already paid
+    is left untouched and never gets a second set of tickets.
+    @return: True if the order was marked as paid by this call.
+    """
+    from inventory.models import SeatReservation
+    paid_at = timezone.now()
+    with transaction.atomic():
+      # The payment is captured: an order deleted meanwhile is still recorded as paid
+      if not Order.all_objects.filter(pk=self.pk).exclude(status='paid').update(status='paid', paid_at=paid_at):
+        return False
+      self.status = 'paid'
+      self.paid_at = paid_at
+      SeatReservation.objects.confirm_for_order(self)
+      self.generate_tickets()
+    return True
 
   def generate_tickets(self):
-    """Create tickets for each order item."""
+    """Create tickets for each order item, one ticket per unit of quantity."""
     from tickets.models import Ticket
+    items = self.items.select_related('offer')
     with transaction.atomic():
-      for item in self.items.all():
-        for i in range(item.quantity): # create a ticket for each quantity
-          Ticket.objects.create(
-            user=self.user,
-            order_item=item,
-            olympic_event=item.olympic_event,
-            nb_place=item.offer.nb_place,
-            status='valid',
-          )
+      Ticket.objects.bulk_issue((item, item.quantity) for item in items)
 
 class OrderItem(models.Model):
   order = models.ForeignKey(
@@ -69,6 +101,18 @@ class OrderItem(models.Model):
   amount = models.DecimalField(max_digits=10, decimal_places=2)
   deleted_at = models.DateTimeField(null=True, blank=True) # soft-delete
 
+  objects = SoftDeleteManager()
+  all_objects = SoftDeleteQuerySet.as_manager()
+
+  class Meta:
+    indexes = [
+      models.Index(
+        fields=['olympic_event', 'order'],
+        name='orderitem_event_live_idx',
+        condition=Q(deleted_at__isnull=True)
+      ),
+    ]
+
   def delete(self, using=None, keep_parents=False):
     """Soft delete : mark the order item as deleted instead of removing it."""
     self.deleted_at = timezone.now()
@@ -2,6 +2,7 @@ from rest_framework import serializers
 from .models import Order, OrderItem
 from offers.serializers import OfferSerializer
 from olympic_events.serializers import OlympicEventSerializer
+from utils.sparse_fields import SparseFieldsMixin
 
 class OrderItemSerializer(serializers.ModelSerializer):
   offer = OfferSerializer(read_only=True)
@@ -11,7 +12,7 @@ class OrderItemSerializer(serializers.ModelSerializer):
     model = OrderItem
     fields = ['id', 'offer', 'olympic_event', 'quantity', 'price', 'amount']
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(SparseFieldsMixin, serializers.ModelSerializer):
   items = OrderItemSerializer(many=True, read_only=True)
   user = serializers.StringRelatedField(read_only=True)
 
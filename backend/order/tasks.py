@@ -0,0 +1,66 @@
+import logging
+from datetime import timedelta
+from celery import shared_task
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from inventory.models import SeatReservation
+from .models import Order
+
+logger = logging.getLogger(__name__)
+
+def cancel_stale_orders(before, batch_size):
+  """
+  Cancel a batch of orders pending since before `before` and release the seats held for them.
+  Orders locked by a concurrent transaction are skipped until the next batch.
+  Deleted orders are included: their seats are held all the same.
+  A payment captured after the cancellation still marks the order as paid.
+
+  @param before: Orders created before this date are cancelled.
+  @param batch_size: Maximum number of orders cancelled.
+  @return: Tuple (orders cancelled, holds released).
+  """
+  with transaction.atomic():
+    order_ids = list(
+      Order.all_objects
+      .select_for_update(skip_locked=True)
+      .filter(status='pending', created_at__lt=before)
+      .order_by('created_at', 'pk')
+      .values_list('pk', flat=True)[:batch_size]
+    )
+    if not order_ids:
+      return 0, 0
+    Order.all_objects.filter(pk__in=order_ids).update(status='cancelled')
+    return len(order_ids), SeatReservation.objects.release_for_orders(order_ids)
+
+@shared_task
+def sweep_stale_orders_task():
+  """
+  Periodic sweep (Celery beat) of the orders left unpaid.
+  Orders pending for more than PENDING_ORDER_RETENTION_HOURS are cancelled, then
+  holds past their expiry are released. Each step runs at most SWEEP_MAX_BATCHES
+  transactions of SWEEP_BATCH_SIZE rows; what is left is swept by the next run.
+
+  @return: Number of rows swept per kind.
+  """
+  batch_size, max_batches = settings.SWEEP_BATCH_SIZE, settings.SWEEP_MAX_BATCHES
+  before = timezone.now() - timedelta(hours=settings.PENDING_ORDER_RETENTION_HOURS)
+  metrics = {'orders_cancelled': 0, 'order_holds_released': 0, 'expired_holds_released': 0}
+
+  for _ in range(max_batches):
+    cancelled, released = cancel_stale_orders(before, batch_size)
+    metrics['orders_cancelled'] += cancelled
+    metrics['order_holds_released'] += released
+    if cancelled < batch_size:
+      break
+  for _ in range(max_batches):
+    released = SeatReservation.objects.release_expired(batch_size=batch_size)
+    metrics['expired_holds_released'] += released
+    if released < batch_size:
+      break
+
+  logger.info(
+    "Stale orders sweep: %(orders_cancelled)s orders cancelled, %(order_holds_released)s "
+    "of their holds and %(expired_holds_released)s expired holds released.", metrics,
+  )
+  return metrics
@@ -0,0 +1,73 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from offers.models import Offer
+from olympic_events.models import OlympicEvent
+from order.models import Order, OrderItem
+from tickets.models import Ticket
+
+User = get_user_model()
+
+class GenerateTicketsTestCase(TestCase):
+    """
+    Test case for the bulk ticket issuance triggered when an order is paid.
+    """
+    def setUp(self):
+        """
+        Set up a user with a pending order.
+        """
+        self.user = User.objects.create_user(
+            email='tickets@example.com',
+            password='securepass'
+        )
+        self.order = Order.objects.create(user=self.user, amount=0, status='pending')
+
+    def add_item(self, quantity, nb_place=1):
+        """
+        Helper method to add an order item with its own offer and event.
+        @return: The created order item.
+        """
+        offer = Offer.objects.create(name=f'Offre {nb_place}', price=10, nb_place=nb_place)
+        event = OlympicEvent.objects.create(name='Finale', date_time=timezone.now())
+        return OrderItem.objects.create(
+            order=self.order,
+            offer=offer,
+            olympic_event=event,
+            quantity=quantity,
+            price=10,
+            amount=10 * quantity,
+        )
+
+    def test_mark_as_paid_issues_one_ticket_per_quantity(self):
+        """
+        Test that each unit of quantity gets its own ticket with a distinct key.
+        """
+        solo = self.add_item(quantity=3)
+        duo = self.add_item(quantity=2, nb_place=2)
+        self.order.mark_as_paid()
+
+        self.assertEqual(Ticket.objects.filter(order_item=solo).count(), 3)
+        self.assertEqual(Ticket.objects.filter(order_item=duo).count(), 2)
+        self.assertTrue(all(t.nb_place == 2 for t in Ticket.objects.filter(order_item=duo)))
+        keys = list(Ticket.objects.values_list('ticket_key', flat=True))
+        self.assertEqual(len(keys), len(set(keys)))
+        self.assertTrue(all(keys))
+        self.assertTrue(all(t.user_id == self.user.id for t in Ticket.objects.all()))
+
+    def test_generate_tickets_query_count_does_not_grow_with_quantity(self):
+        """
+        Test that issuing 40 tickets costs no more queries than issuing one.
+        """
+        self.add_item(quantity=1)
+        with CaptureQueriesContext(connection) as small:
+            self.order.generate_tickets()
+        Ticket.objects.all().delete()
+
+        self.order.items.update(quantity=40)
+        with CaptureQueriesContext(connection) as large:
+            self.order.generate_tickets()
+
+        self.assertEqual(Ticket.objects.count(), 40)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
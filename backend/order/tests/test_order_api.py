@@ -1,10 +1,12 @@
 from django.urls import reverse
 from django.utils import timezone
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.contrib.auth import get_user_model
 from decimal import Decimal
-from order.models import Order
+from order.models import Order, OrderItem
 from offers.models import Offer
 from olympic_events.models import OlympicEvent
 from cart.models import Cart, CartItem
@@ -74,3 +76,51 @@ class OrderAPITestCase(APITestCase):
         item = data['items'][0]
         self.assertEqual(item['offer']['id'], self.offer.id)
         self.assertEqual(item['quantity'], 2)
+
+    def test_order_list_query_count_does_not_grow_with_order_count(self):
+        """
+        Test that the order history runs the same number of queries whatever the number of orders and items.
+        """
+        def add_order(nb_items):
+            order = Order.objects.create(user=self.user, amount=100 * nb_items)
+            for i in range(nb_items):
+                event = OlympicEvent.objects.create(name=f'Épreuve {i}', date_time=timezone.now())
+                OrderItem.objects.create(order=order, offer=self.offer, olympic_event=event, quantity=1, price=100, amount=100)
+
+        def list_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(reverse('order-list'))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(ctx.captured_queries)
+
+        add_order(1)
+        queries = list_queries()
+        for _ in range(4):
+            add_order(3)
+        self.assertEqual(list_queries(), queries)
+
+    def test_order_list_keyset_pagination(self):
+        """
+        Test that the order history can be paginated, newest first.
+        """
+        orders = [Order.objects.create(user=self.user, amount=10) for _ in range(3)]
+        response = self.client.get(reverse('order-list'), {'page_size': 2})
+        self.assertEqual([o['id'] for o in response.data['results']], [orders[2].id, orders[1].id])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([o['id'] for o in response.data['results']], [orders[0].id])
+        self.assertIsNone(response.data['next'])
+
+    def test_soft_deleted_orders_and_items_are_hidden(self):
+        """
+        Test that deleted orders and order items are left out of the history but kept in the database.
+        """
+        order = Order.objects.create(user=self.user, amount=200)
+        kept = OrderItem.objects.create(order=order, offer=self.offer, olympic_event=self.event, quantity=1, price=100, amount=100)
+        OrderItem.objects.create(order=order, offer=self.offer, olympic_event=self.event, quantity=1, price=100, amount=100).delete()
+        Order.objects.create(user=self.user, amount=10).delete()
+
+        response = self.client.get(reverse('order-list'))
+        self.assertEqual([o['id'] for o in response.data], [order.id])
+        self.assertEqual([i['id'] for i in response.data[0]['items']], [kept.id])
+        self.assertEqual(Order.all_objects.filter(user=self.user).count(), 2)
+        self.assertEqual(OrderItem.all_objects.filter(order=order).count(), 2)
@@ -0,0 +1,71 @@
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from inventory.models import SeatInventory, SeatReservation
+from olympic_events.models import OlympicEvent
+from order.models import Order
+from order.tasks import sweep_stale_orders_task
+
+User = get_user_model()
+
+@override_settings(PENDING_ORDER_RETENTION_HOURS=24, SWEEP_BATCH_SIZE=2, SWEEP_MAX_BATCHES=2, SEAT_INVENTORY_SHARDS=2)
+class StaleOrdersSweepTestCase(TestCase):
+    """
+    Test case for the periodic cancellation of the orders left unpaid.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(email='sweep@example.com', password='securepass')
+        self.event = OlympicEvent.objects.create(name='Finale 100m', date_time=timezone.now(), capacity=20)
+
+    def create_pending_order(self, hours_ago, seats=2):
+        """
+        Create a pending order holding seats of the event.
+        @return: The created order.
+        """
+        order = Order.objects.create(user=self.user, amount=100, status='pending')
+        SeatReservation.objects.reserve(self.event.pk, seats, order=order)
+        Order.objects.filter(pk=order.pk).update(created_at=timezone.now() - timedelta(hours=hours_ago))
+        return order
+
+    def test_stale_orders_are_cancelled_and_their_seats_released(self):
+        """
+        Test that orders pending past the retention are cancelled and their seats given back,
+        recent and paid orders being left untouched.
+        """
+        stale = self.create_pending_order(hours_ago=30)
+        recent = self.create_pending_order(hours_ago=1)
+        paid = self.create_pending_order(hours_ago=30)
+        paid.mark_as_paid()
+
+        metrics = sweep_stale_orders_task()
+        self.assertEqual(metrics, {'orders_cancelled': 1, 'order_holds_released': 1, 'expired_holds_released': 0})
+        statuses = dict(Order.all_objects.values_list('pk', 'status'))
+        self.assertEqual((statuses[stale.pk], statuses[recent.pk], statuses[paid.pk]), ('cancelled', 'pending', 'paid'))
+        self.assertEqual(SeatReservation.objects.get(order=stale).status, 'released')
+        self.assertEqual(SeatInventory.objects.available(self.event.pk), 16)
+
+    def test_sweep_is_bounded_and_releases_expired_holds(self):
+        """
+        Test that a run sweeps at most SWEEP_MAX_BATCHES batches, and that expired holds are released.
+        """
+        for _ in range(5):
+            self.create_pending_order(hours_ago=30, seats=1)
+        SeatReservation.objects.reserve(self.event.pk, 3)
+        SeatReservation.objects.filter(order__isnull=True).update(expires_at=timezone.now() - timedelta(minutes=1))
+
+        self.assertEqual(sweep_stale_orders_task()['orders_cancelled'], 4)
+        self.assertEqual(Order.objects.filter(status='pending').count(), 1)
+        self.assertEqual(sweep_stale_orders_task(), {'orders_cancelled': 1, 'order_holds_released': 1, 'expired_holds_released': 0})
+        self.assertEqual(SeatInventory.objects.available(self.event.pk), 20)
+
+    def test_payment_after_cancellation_marks_the_order_paid(self):
+        """
+        Test that a payment captured after the cancellation still marks the order as paid and takes its seats again.
+        """
+        order = self.create_pending_order(hours_ago=30)
+        sweep_stale_orders_task()
+        order.refresh_from_db()
+        self.assertTrue(order.mark_as_paid())
+        self.assertEqual(SeatReservation.objects.get(order=order).status, 'confirmed')
+        self.assertEqual(SeatInventory.objects.available(self.event.pk), 18)
@@ -1,12 +1,19 @@
 from rest_framework import viewsets, permissions
 from .models import Order
 from .serializers import OrderSerializer
+from utils.sparse_fields import eager_load_sparse
+from utils.pagination import CreatedAtCursorPagination
 
 class OrderViewSet(viewsets.ReadOnlyModelViewSet):
-  """Allows authenticated users to view their odrers."""
+  """
+  Allows authenticated users to view their odrers, newest first.
+  Keyset pagination is enabled by the `cursor` or `page_size` query parameters.
+  """
   serializer_class = OrderSerializer
   permission_classes = [permissions.IsAuthenticated]
+  pagination_class = CreatedAtCursorPagination
 
   def get_queryset(self):
-    # Only return orders for the authenticated user
-    return Order.objects.filter(user=self.request.user)
+    # Only return orders for the authenticated user, with everything the serializer reads
+    queryset = Order.objects.filter(user=self.request.user).order_by('-created_at', '-id')
+    return eager_load_sparse(queryset, self)
@@ -1,3 +1,9 @@
 from django.contrib import admin
+from .models import ProcessedStripeEvent
 
-# Register your models here.
+@admin.register(ProcessedStripeEvent)
+class ProcessedStripeEventAdmin(admin.ModelAdmin):
+    list_display = ['event_id', 'type', 'received_at', 'processed_at']
+    list_filter = ['type', 'processed_at']
+    search_fields = ['event_id']
+    readonly_fields = ['event_id', 'type', 'payload', 'received_at', 'processed_at']
@@ -0,0 +1,176 @@
+"""
+Payment gateways used by the payment views.
+
+StripeGateway talks to Stripe. FakeStripeGateway keeps PaymentIntents in memory
+and emits `payment_intent.succeeded` webhooks signed exactly like Stripe does
+(`Stripe-Signature: t=<timestamp>,v1=<HMAC-SHA256>`), so the whole purchase path,
+webhook signature check included, can run offline. The gateway in use is chosen
+with the PAYMENT_GATEWAY setting.
+"""
+import hashlib
+import hmac
+from abc import ABC, abstractmethod
+import json
+import secrets
+import threading
+import time
+from types import SimpleNamespace
+import stripe
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class InvalidSignature(Exception):
+    """Raised when a webhook payload is malformed or its signature does not verify."""
+
+
+class PaymentGateway(ABC):
+    """
+    Interface of a payment gateway. PaymentIntents are returned as objects with
+    at least `id` and `client_secret` attributes.
+    """
+
+    @abstractmethod
+    def create_payment_intent(self, amount, currency, metadata, idempotency_key=None):
+        """
+        Create a PaymentIntent.
+        @param amount: Amount in cents.
+        @param currency: ISO currency code.
+        @param metadata: Dict of metadata stored on the intent.
+        @param idempotency_key: Key making retries of the same creation return the same intent.
+        """
+
+    @abstractmethod
+    def retrieve_payment_intent(self, intent_id):
+        """Fetch an existing PaymentIntent by id."""
+
+    @abstractmethod
+    def construct_event(self, payload, signature):
+        """
+        Verify a webhook and parse its event.
+        @param payload: Raw request body.
+        @param signature: Value of the Stripe-Signature header.
+        @raises InvalidSignature: If the payload or its signature is invalid.
+        @return: The event, a dict-like object with `id`, `type` and `data.object`.
+        """
+
+
+class StripeGateway(PaymentGateway):
+    """Gateway backed by the Stripe API."""
+
+    @property
+    def api_key(self):
+        return settings.STRIPE_SECRET_KEY
+
+    @property
+    def webhook_secret(self):
+        return settings.STRIPE_WEBHOOK_SECRET
+
+    def create_payment_intent(self, amount, currency, metadata, idempotency_key=None):
+        return stripe.PaymentIntent.create(
+            amount=amount,
+            currency=currency,
+            metadata=metadata,
+            idempotency_key=idempotency_key,
+            api_key=self.api_key,
+        )
+
+    def retrieve_payment_intent(self, intent_id):
+        return stripe.PaymentIntent.retrieve(intent_id, api_key=self.api_key)
+
+    def construct_event(self, payload, signature):
+        try:
+            return stripe.Webhook.construct_event(payload, signature, self.webhook_secret)
+        except (ValueError, stripe.error.SignatureVerificationError) as exc:
+            raise InvalidSignature(str(exc)) from exc
+
+
+class FakeStripeGateway(StripeGateway):
+    """
+    In-process stand-in for Stripe. Intents live in memory; succeed() builds the
+    signed webhook Stripe would send once the payment is confirmed. Webhooks are
+    verified by the Stripe library itself, as with StripeGateway.
+    """
+    webhook_secret = 'whsec_fake'
+
+    def __init__(self):
+        self.intents = {}
+        self.idempotency_keys = {}
+        self.lock = threading.Lock()
+
+    def create_payment_intent(self, amount, currency, metadata, idempotency_key=None):
+        with self.lock:
+            if idempotency_key in self.idempotency_keys:
+                return self.intents[self.idempotency_keys[idempotency_key]]
+            intent_id = f"pi_fake_{secrets.token_hex(12)}"
+            intent = SimpleNamespace(
+                id=intent_id,
+                client_secret=f"{intent_id}_secret_{secrets.token_hex(12)}",
+                amount=amount,
+                currency=currency,
+                metadata={key: str(value) for key, value in metadata.items()},
+                status='requires_payment_method',
+            )
+            self.intents[intent_id] = intent
+            if idempotency_key:
+                self.idempotency_keys[idempotency_key] = intent_id
+        return intent
+
+    def retrieve_payment_intent(self, intent_id):
+        try:
+            return self.intents[intent_id]
+        except KeyError:
+            raise stripe.error.InvalidRequestError(f"No such payment_intent: '{intent_id}'", 'id')
+
+    def sign(self, payload, timestamp=None):
+        """
+        Compute the Stripe-Signature header of a webhook payload.
+        @param payload: Raw webhook body.
+        @type payload: bytes
+        @return: Header value `t=<timestamp>,v1=<signature>`.
+        """
+        timestamp = int(timestamp or time.time())
+        signed = f"{timestamp}.".encode() + payload
+        digest = hmac.new(self.webhook_secret.encode(), signed, hashlib.sha256).hexdigest()
+        return f"t={timestamp},v1={digest}"
+
+    def succeed(self, intent_id):
+        """
+        Confirm a PaymentIntent and build the `payment_intent.succeeded` webhook.
+        @param intent_id: Id of an intent created by this gateway.
+        @return: (payload, signature) to POST to the webhook endpoint.
+        """
+        intent = self.retrieve_payment_intent(intent_id)
+        intent.status = 'succeeded'
+        payload = json.dumps({
+            'id': f"evt_fake_{secrets.token_hex(12)}",
+            'object': 'event',
+            'type': 'payment_intent.succeeded',
+            'created': int(time.time()),
+            'data': {'object': {
+                'id': intent.id,
+                'object': 'payment_intent',
+                'amount': intent.amount,
+                'amount_received': intent.amount,
+                'currency': intent.currency,
+                'metadata': intent.metadata,
+                'status': intent.status,
+            }},
+        }).encode()
+        return payload, self.sign(payload)
+
+
+_gateways = {}
+_gateways_lock = threading.Lock()
+
+def get_gateway():
+    """
+    Return the gateway configured by the PAYMENT_GATEWAY setting (dotted path).
+    One instance is kept per path, so the state of the fake gateway is shared.
+    """
+    path = settings.PAYMENT_GATEWAY
+    if path not in _gateways:
+        with _gateways_lock:
+            if path not in _gateways:
+                _gateways[path] = import_string(path)()
+    return _gateways[path]
@@ -0,0 +1,173 @@
+import math
+from decimal import Decimal
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from cart.models import Cart
+from inventory.models import SeatReservation
+from offers.models import Offer
+from olympic_events.models import OlympicEvent
+from ogtickets.celery import app as celery_app
+from order.models import Order, OrderItem
+from payment.gateways import get_gateway
+from payment.models import ProcessedStripeEvent
+from tickets.models import Ticket
+from utils.encryption import encrypt_many
+
+User = get_user_model()
+
+def percentile(values, rank):
+  """Nearest-rank percentile of a list of values."""
+  ordered = sorted(values)
+  return ordered[max(math.ceil(rank / 100 * len(ordered)) - 1, 0)]
+
+class Command(BaseCommand):
+  help = (
+    "Mesure le parcours d'achat complet (panier → checkout → paiement → billets) avec N flux concurrents, "
+    "le paiement passant par la passerelle Stripe factice. À lancer sur une base PostgreSQL locale jetable."
+  )
+
+  def add_arguments(self, parser):
+    parser.add_argument('--flows', type=int, default=100, help="Nombre total de parcours d'achat.")
+    parser.add_argument('--threads', type=int, default=10, help="Nombre de parcours exécutés en parallèle.")
+    parser.add_argument('--quantity', type=int, default=2, help="Nombre de billets achetés par parcours.")
+    parser.add_argument('--capacity', type=int, help="Capacité de l'épreuve (défaut : illimitée).")
+    parser.add_argument(
+      '--worker', action='store_true',
+      help="Laisse les workers Celery traiter les webhooks au lieu de les exécuter dans le processus.",
+    )
+    parser.add_argument('--timeout', type=float, default=30, help="Attente maximale des billets par parcours (secondes).")
+
+  def handle(self, *args, **options):
+    if settings.ENV in ['prod', 'production']:
+      raise CommandError("Refus de lancer le benchmark en production.")
+    if connection.vendor != 'postgresql' and options['threads'] > 1:
+      self.stdout.write(self.style.WARNING(
+        f"Base {connection.vendor} : les flux concurrents ne sont représentatifs que sur PostgreSQL."
+      ))
+
+    run = uuid.uuid4().hex[:8]
+    event = OlympicEvent.objects.create(
+      sport='Benchmark', name=f"Benchmark {run}", description="Épreuve générée par bench_purchase_flow",
+      date_time=timezone.now(), location='Benchmark', capacity=options['capacity'],
+    )
+    offer = Offer.objects.create(name=f"Benchmark {run}", description="Offre de benchmark", price=Decimal('10.00'))
+    users = User.objects.bulk_create([
+      User(email=f"bench-{run}-{i}@bench.invalid", password=make_password(None), is_active=True, user_key=key)
+      for i, key in enumerate(encrypt_many(options['flows']))
+    ])
+
+    eager = not options['worker']
+    previous_eager = celery_app.conf.task_always_eager
+    celery_app.conf.task_always_eager = eager
+    try:
+      # Requests are made in-process by the DRF test client, as on host 'testserver'
+      with override_settings(
+        PAYMENT_GATEWAY='payment.gateways.FakeStripeGateway',
+        ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+      ):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+          results = list(executor.map(
+            lambda user: self.run_flow(user, offer, event, options['quantity'], options['timeout']),
+            users,
+          ))
+        elapsed = time.perf_counter() - started
+    finally:
+      celery_app.conf.task_always_eager = previous_eager
+      self.cleanup(users, event, offer)
+
+    self.report(results, elapsed, eager)
+
+  def cleanup(self, users, event, offer):
+    """
+    Remove everything the run created. The flows commit from their own connections,
+    so the rows are deleted rather than rolled back, children first since the
+    orders and tickets are protected. Queryset deletes bypass the soft delete.
+    The webhook events of the run are found through the intents of its orders.
+    """
+    orders = Order.all_objects.filter(user__in=users)
+    intent_ids = list(orders.exclude(payment_intent_id=None).values_list('payment_intent_id', flat=True))
+    ProcessedStripeEvent.objects.filter(payload__id__in=intent_ids).delete()
+    Ticket.all_objects.filter(user__in=users).delete()
+    SeatReservation.objects.filter(olympic_event=event).delete()
+    OrderItem.all_objects.filter(order__in=orders).delete()
+    orders.delete()
+    Cart.objects.filter(custom_user__in=users).delete()
+    User.all_objects.filter(pk__in=[user.pk for user in users]).delete()
+    event.delete()
+    offer.delete()
+
+  def run_flow(self, user, offer, event, quantity, timeout):
+    """
+    Run one purchase through the API as `user`.
+    @return: dict with the flow latency, the number of queries and the error, if any.
+    """
+    client = APIClient()
+    client.force_authenticate(user=user)
+    gateway = get_gateway()
+    started = time.perf_counter()
+    try:
+      with CaptureQueriesContext(connection) as queries:
+        response = client.post(reverse('cart-item-list'), {
+          'offer_id': offer.id, 'olympic_event_id': event.id,
+          'quantity': quantity, 'amount': str(offer.price * quantity),
+        }, format='json')
+        self.expect(response, 201, 'ajout au panier')
+        cart_id = client.get(reverse('cart-list')).data[0]['id']
+
+        response = client.post(reverse('cart-checkout', args=[cart_id]))
+        self.expect(response, 201, 'checkout')
+        order_id = response.data['id']
+
+        response = client.post(reverse('create-payment-intent'), {'order_id': order_id}, format='json')
+        self.expect(response, 200, 'paiement')
+        intent_id = response.data['clientSecret'].split('_secret_')[0]
+
+        payload, signature = gateway.succeed(intent_id)
+        response = client.post(
+          reverse('stripe-webhook'), data=payload, content_type='application/json',
+          HTTP_STRIPE_SIGNATURE=signature,
+        )
+        self.expect(response, 200, 'webhook')
+
+        deadline = time.perf_counter() + timeout
+        while len(client.get(reverse('ticket-list')).data) < quantity:
+          if time.perf_counter() > deadline:
+            raise CommandError("billets non émis avant le délai")
+          time.sleep(0.05)
+      return {'latency': time.perf_counter() - started, 'queries': len(queries), 'error': None}
+    except Exception as exc:
+      return {'latency': time.perf_counter() - started, 'queries': 0, 'error': str(exc)}
+    finally:
+      connections.close_all()
+
+  def expect(self, response, status_code, step):
+    if response.status_code != status_code:
+      raise CommandError(f"{step} : HTTP {response.status_code} {getattr(response, 'data', '')}")
+
+  def report(self, results, elapsed, eager):
+    succeeded = [r for r in results if r['error'] is None]
+    errors = [r['error'] for r in results if r['error'] is not None]
+    self.stdout.write(f"Parcours : {len(results)} ({len(succeeded)} réussis, {len(errors)} en échec) en {elapsed:.2f} s")
+    if succeeded:
+      latencies = [r['latency'] * 1000 for r in succeeded]
+      self.stdout.write(f"Débit : {len(succeeded) / elapsed:.1f} parcours/s")
+      self.stdout.write(
+        f"Latence par parcours : p50 {percentile(latencies, 50):.0f} ms, "
+        f"p99 {percentile(latencies, 99):.0f} ms, max {max(latencies):.0f} ms"
+      )
+      label = "webhook traité dans le processus" if eager else "attente des workers incluse"
+      self.stdout.write(f"Requêtes SQL par parcours : {statistics.mean(r['queries'] for r in succeeded):.1f} ({label})")
+    for error in sorted(set(errors))[:10]:
+      self.stdout.write(self.style.ERROR(f"  {errors.count(error)} x {error}"))
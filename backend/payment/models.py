@@ -1,3 +1,15 @@
 from django.db import models
 
-# Create your models here.
+class ProcessedStripeEvent(models.Model):
+    """
+    Stripe webhook event received by the platform, keyed by the Stripe event id.
+    The unique event id makes redeliveries of the same event no-ops.
+    """
+    event_id = models.CharField(max_length=255, unique=True)
+    type = models.CharField(max_length=100)
+    payload = models.JSONField(help_text="The `data.object` of the event")
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.type} ({self.event_id})"
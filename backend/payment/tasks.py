@@ -0,0 +1,74 @@
+import logging
+from celery import shared_task
+from django.db import transaction
+from django.utils import timezone
+from order.models import Order
+from .models import ProcessedStripeEvent
+
+logger = logging.getLogger(__name__)
+
+CURRENCY = 'eur'
+"""Currency of the PaymentIntents created for the orders."""
+
+def find_paid_order(intent):
+    """
+    Find the order paid by a PaymentIntent, among deleted ones too.
+    Intents created before orders were bound to them are matched on the order
+    id of their metadata, provided the order is bound to no other intent.
+    @param intent: The PaymentIntent object of the event.
+    @return: The order, or None if none matches.
+    """
+    order = Order.all_objects.filter(payment_intent_id=intent['id']).first()
+    if order is None:
+        try:
+            order_id = int(intent.get('metadata', {}).get('order_id'))
+        except (TypeError, ValueError):
+            return None
+        order = Order.all_objects.filter(pk=order_id, payment_intent_id__isnull=True).first()
+    return order
+
+def handle_payment_intent_succeeded(intent):
+    """
+    Mark the order paid by a PaymentIntent as paid and issue its tickets.
+    The order is looked up among deleted ones too, a captured payment being always recorded.
+    A payment whose amount or currency differs from the order is logged and
+    left for manual review: the order stays unpaid.
+    @param intent: The PaymentIntent object of the event.
+    """
+    order = find_paid_order(intent)
+    if order is None:
+        logger.warning("PaymentIntent %s succeeded without a matching order.", intent['id'])
+        return
+    expected = int(order.amount * 100)  # euros → cents
+    if intent.get('amount_received') != expected or intent.get('currency') != CURRENCY:
+        logger.error(
+            "PaymentIntent %s received %s %s for order #%s, expected %s %s: order not marked as paid.",
+            intent['id'], intent.get('amount_received'), intent.get('currency'), order.pk, expected, CURRENCY,
+        )
+        return
+    order.mark_as_paid()
+
+EVENT_HANDLERS = {
+    'payment_intent.succeeded': handle_payment_intent_succeeded,
+}
+"""Stripe event types processed by the platform; other events are only recorded."""
+
+@shared_task(bind=True, max_retries=5, default_retry_delay=30)
+def process_stripe_event_task(self, event_id):
+    """
+    Process a recorded Stripe event, at most once.
+    The event row is locked while it is processed and flagged as processed in
+    the same transaction, so concurrent or repeated runs cannot handle it twice.
+
+    @param event_id: The Stripe event id.
+    """
+    try:
+        with transaction.atomic():
+            event = ProcessedStripeEvent.objects.select_for_update().get(event_id=event_id)
+            if event.processed_at is not None:
+                return
+            EVENT_HANDLERS[event.type](event.payload)
+            event.processed_at = timezone.now()
+            event.save(update_fields=['processed_at'])
+    except Exception as exc:
+        raise self.retry(exc=exc)
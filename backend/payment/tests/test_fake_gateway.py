@@ -0,0 +1,67 @@
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from offers.models import Offer
+from olympic_events.models import OlympicEvent
+from order.models import Order, OrderItem
+from payment.gateways import FakeStripeGateway, get_gateway
+from tickets.models import Ticket
+
+User = get_user_model()
+
+@override_settings(
+    PAYMENT_GATEWAY='payment.gateways.FakeStripeGateway',
+    CELERY_TASK_ALWAYS_EAGER=True,
+    CELERY_TASK_EAGER_PROPAGATES=True,
+)
+class FakeStripeGatewayTestCase(APITestCase):
+    """
+    Test case for the offline purchase path through the fake Stripe gateway.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(email='fake@example.com', password='securepass')
+        self.client.force_authenticate(user=self.user)
+        self.order = Order.objects.create(user=self.user, amount=30, status='pending')
+        OrderItem.objects.create(
+            order=self.order,
+            offer=Offer.objects.create(name='Trio', price=30, nb_place=3),
+            olympic_event=OlympicEvent.objects.create(name='Finale', date_time=timezone.now()),
+            quantity=1,
+            price=30,
+            amount=30,
+        )
+
+    def pay(self):
+        response = self.client.post(reverse('create-payment-intent'), {'order_id': self.order.id}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.order.refresh_from_db()
+        return get_gateway().succeed(self.order.payment_intent_id)
+
+    def test_signed_webhook_pays_the_order(self):
+        """
+        The webhook emitted by the fake gateway passes the Stripe signature check and pays the order.
+        """
+        self.assertIsInstance(get_gateway(), FakeStripeGateway)
+        payload, signature = self.pay()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('stripe-webhook'), data=payload, content_type='application/json',
+                HTTP_STRIPE_SIGNATURE=signature,
+            )
+        self.assertEqual(response.status_code, 200)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, 'paid')
+        self.assertEqual(Ticket.objects.filter(order_item__order=self.order).count(), 1)
+
+    def test_tampered_webhook_is_rejected(self):
+        """
+        A payload that does not match its signature is rejected.
+        """
+        payload, signature = self.pay()
+        response = self.client.post(
+            reverse('stripe-webhook'), data=payload.replace(b'succeeded', b'canceled'),
+            content_type='application/json', HTTP_STRIPE_SIGNATURE=signature,
+        )
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,74 @@
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from offers.models import Offer
+from olympic_events.models import OlympicEvent
+from order.models import Order, OrderItem
+
+User = get_user_model()
+
+class CreatePaymentIntentTestCase(APITestCase):
+    """
+    Test case for the creation of the PaymentIntent of an order.
+    """
+    def setUp(self):
+        """
+        Set up an authenticated user with a pending order of 2 x 12.50 €.
+        """
+        self.user = User.objects.create_user(email='intent@example.com', password='securepass')
+        self.client.force_authenticate(user=self.user)
+        self.order = Order.objects.create(user=self.user, amount=25, status='pending')
+        OrderItem.objects.create(
+            order=self.order,
+            offer=Offer.objects.create(name='Solo', price='12.50'),
+            olympic_event=OlympicEvent.objects.create(name='Finale', date_time=timezone.now()),
+            quantity=2,
+            price='12.50',
+            amount='25.00',
+        )
+        self.url = reverse('create-payment-intent')
+
+    @mock.patch('payment.gateways.stripe.PaymentIntent.create')
+    def test_intent_is_created_from_the_order(self, create):
+        """
+        The amount comes from the order items and the intent id is stored on the order.
+        """
+        create.return_value = mock.Mock(id='pi_abc', client_secret='secret_abc')
+        response = self.client.post(self.url, {'order_id': self.order.id, 'amount': 1}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['clientSecret'], 'secret_abc')
+        kwargs = create.call_args.kwargs
+        self.assertEqual(kwargs['amount'], 2500)
+        self.assertEqual(kwargs['metadata']['order_id'], self.order.id)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.payment_intent_id, 'pi_abc')
+
+    @mock.patch('payment.gateways.stripe.PaymentIntent.retrieve')
+    @mock.patch('payment.gateways.stripe.PaymentIntent.create')
+    def test_existing_intent_is_reused(self, create, retrieve):
+        """
+        Asking again for the same order returns the PaymentIntent already bound to it.
+        """
+        Order.objects.filter(pk=self.order.pk).update(payment_intent_id='pi_abc')
+        retrieve.return_value = mock.Mock(id='pi_abc', client_secret='secret_abc')
+        response = self.client.post(self.url, {'order_id': self.order.id}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        create.assert_not_called()
+        self.assertEqual(retrieve.call_args.args, ('pi_abc',))
+
+    def test_only_own_pending_orders_can_be_paid(self):
+        """
+        Orders of other users, paid orders and missing ids are rejected.
+        """
+        other = User.objects.create_user(email='other@example.com', password='securepass')
+        foreign = Order.objects.create(user=other, amount=10, status='pending')
+        paid = Order.objects.create(user=self.user, amount=10, status='paid')
+
+        self.assertEqual(self.client.post(self.url, {}, format='json').status_code, 400)
+        for order in (foreign, paid):
+            response = self.client.post(self.url, {'order_id': order.id}, format='json')
+            self.assertEqual(response.status_code, 404)
@@ -0,0 +1,151 @@
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from offers.models import Offer
+from olympic_events.models import OlympicEvent
+from order.models import Order, OrderItem
+from payment.models import ProcessedStripeEvent
+from tickets.models import Ticket
+
+User = get_user_model()
+
+@override_settings(CELERY_TASK_ALWAYS_EAGER=True, CELERY_TASK_EAGER_PROPAGATES=True)
+class StripeWebhookTestCase(APITestCase):
+    """
+    Test case for the recording and asynchronous processing of Stripe webhook events.
+    """
+    def setUp(self):
+        """
+        Set up a user with a pending order of two tickets.
+        """
+        self.user = User.objects.create_user(email='payer@example.com', password='securepass')
+        self.order = Order.objects.create(user=self.user, amount=20, status='pending', payment_intent_id='pi_123')
+        OrderItem.objects.create(
+            order=self.order,
+            offer=Offer.objects.create(name='Solo', price=10),
+            olympic_event=OlympicEvent.objects.create(name='Finale', date_time=timezone.now()),
+            quantity=2,
+            price=10,
+            amount=20,
+        )
+        self.url = reverse('stripe-webhook')
+
+    def send(self, event_id, event_type='payment_intent.succeeded', **intent):
+        """
+        Helper method posting a webhook whose signature check returns the given event.
+        The intent pays the pending order unless overridden by keyword arguments.
+        """
+        event = {
+            'id': event_id,
+            'type': event_type,
+            'data': {'object': {
+                'id': 'pi_123',
+                'amount_received': 2000,
+                'currency': 'eur',
+                'metadata': {'order_id': str(self.order.id)},
+                **intent,
+            }},
+        }
+        with mock.patch('payment.gateways.stripe.Webhook.construct_event', return_value=event), \
+                self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.url, data=b'{}', content_type='application/json', HTTP_STRIPE_SIGNATURE='sig')
+
+    def test_payment_succeeded_marks_order_paid(self):
+        """
+        A payment_intent.succeeded event is recorded, then the order is paid and its tickets issued.
+        """
+        response = self.send('evt_1')
+        self.assertEqual(response.status_code, 200)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, 'paid')
+        self.assertEqual(Ticket.objects.filter(order_item__order=self.order).count(), 2)
+        self.assertIsNotNone(ProcessedStripeEvent.objects.get(event_id='evt_1').processed_at)
+
+    def test_payment_is_bound_to_its_intent(self):
+        """
+        The order paid is the one bound to the PaymentIntent, not the latest pending order of the user.
+        """
+        latest = Order.objects.create(user=self.user, amount=10, status='pending', payment_intent_id='pi_456')
+        self.send('evt_1')
+        self.order.refresh_from_db()
+        latest.refresh_from_db()
+        self.assertEqual((self.order.status, latest.status), ('paid', 'pending'))
+
+    def test_legacy_intent_is_matched_on_its_metadata(self):
+        """
+        An intent created before orders were bound to it pays the order of its metadata.
+        """
+        Order.objects.filter(pk=self.order.pk).update(payment_intent_id=None)
+        self.send('evt_1', id='pi_legacy')
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, 'paid')
+
+    def test_metadata_does_not_pay_an_order_bound_to_another_intent(self):
+        """
+        The metadata fallback leaves alone an order bound to another PaymentIntent.
+        """
+        with self.assertLogs('payment.tasks', level='WARNING'):
+            self.send('evt_1', id='pi_other')
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, 'pending')
+
+    def test_payment_not_matching_the_order_is_refused(self):
+        """
+        A payment whose amount or currency differs from the order is logged and leaves the order unpaid.
+        """
+        for event_id, intent in [('evt_1', {'amount_received': 1000}), ('evt_2', {'currency': 'usd'})]:
+            with self.assertLogs('payment.tasks', level='ERROR'):
+                self.send(event_id, **intent)
+            self.order.refresh_from_db()
+            self.assertEqual(self.order.status, 'pending')
+            self.assertFalse(Ticket.objects.exists())
+
+    def test_redelivered_event_is_processed_once(self):
+        """
+        A redelivery of the same event is acknowledged without issuing tickets again.
+        """
+        self.send('evt_1')
+        with mock.patch('order.models.Order.mark_as_paid') as mark_as_paid:
+            response = self.send('evt_1')
+        self.assertEqual(response.status_code, 200)
+        mark_as_paid.assert_not_called()
+        self.assertEqual(ProcessedStripeEvent.objects.count(), 1)
+        self.assertEqual(Ticket.objects.count(), 2)
+
+    def test_webhook_only_enqueues_processing(self):
+        """
+        The webhook records the event and leaves the order to the Celery task.
+        """
+        with mock.patch('payment.views.process_stripe_event_task.delay') as delay:
+            self.send('evt_2')
+        delay.assert_called_once_with('evt_2')
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, 'pending')
+
+    def test_unhandled_event_is_only_recorded(self):
+        """
+        Event types the platform does not handle are recorded as processed.
+        """
+        with mock.patch('payment.views.process_stripe_event_task.delay') as delay:
+            self.send('evt_3', event_type='charge.refunded')
+        delay.assert_not_called()
+        self.assertIsNotNone(ProcessedStripeEvent.objects.get(event_id='evt_3').processed_at)
+
+    def test_invalid_signature_is_rejected(self):
+        """
+        An event whose signature does not verify is rejected and not recorded.
+        """
+        response = self.client.post(self.url, data=b'{}', content_type='application/json', HTTP_STRIPE_SIGNATURE='bad')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ProcessedStripeEvent.objects.exists())
+
+    def test_mark_as_paid_is_idempotent(self):
+        """
+        Marking an order paid twice issues its tickets once.
+        """
+        self.assertTrue(self.order.mark_as_paid())
+        self.assertFalse(Order.objects.get(pk=self.order.pk).mark_as_paid())
+        self.assertEqual(Ticket.objects.filter(order_item__order=self.order).count(), 2)
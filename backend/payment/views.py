@@ -1,35 +1,55 @@
-import stripe
-from django.conf import settings
-from django.db import transaction
+from decimal import Decimal
+from django.db.models import Sum
+from django.db import IntegrityError, transaction
+from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework import status
 from order.models import Order
+from .gateways import InvalidSignature, get_gateway
+from .models import ProcessedStripeEvent
+from .tasks import CURRENCY, EVENT_HANDLERS, process_stripe_event_task
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def create_payment_intent(request):
     """
-    Creates a Stripe PaymentIntent to initiate a payment.
+    Creates the Stripe PaymentIntent paying a pending order of the user.
     Expects in the request body:
-      - amount (in euros)
+      - order_id
 
-    @param request: The request object containing the amount to charge.
+    The amount is computed from the order items and the intent id is stored on
+    the order, so that the webhook finds the order with a single lookup. Calling
+    it again for the same order returns the same PaymentIntent.
+
+    @param request: The request object containing the id of the order to pay.
     @return: Response with the client secret for the PaymentIntent or an error message.
     """
-    amount = request.data.get('amount')
-    if not amount:
-        return Response({"error": "Amount is required."}, status=status.HTTP_400_BAD_REQUEST)
+    order_id = request.data.get('order_id')
+    if not order_id:
+        return Response({"error": "order_id is required."}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        order = Order.objects.get(pk=int(order_id), user=request.user, status='pending')
+    except (ValueError, TypeError, Order.DoesNotExist):
+        return Response({"error": "Pending order not found."}, status=status.HTTP_404_NOT_FOUND)
+
+    amount = order.items.aggregate(total=Sum('amount'))['total'] or Decimal('0')
+    if amount <= 0:
+        return Response({"error": "The order has nothing to pay."}, status=status.HTTP_400_BAD_REQUEST)
+    gateway = get_gateway()
     try:
-        # Stripe expects the amount in cents
-        stripe.api_key = settings.STRIPE_SECRET_KEY
-        intent = stripe.PaymentIntent.create(
-            amount=int(float(amount) * 100),  # euros → cents
-            currency='eur',
-            metadata={'user_id': request.user.id},
-        )
+        if order.payment_intent_id:
+            intent = gateway.retrieve_payment_intent(order.payment_intent_id)
+        else:
+            intent = gateway.create_payment_intent(
+                amount=int(amount * 100),  # euros → cents
+                currency=CURRENCY,
+                metadata={'order_id': order.pk, 'user_id': request.user.id},
+                idempotency_key=f"order-{order.pk}-payment-intent",
+            )
+            Order.objects.filter(pk=order.pk).update(payment_intent_id=intent.id)
         return Response({
             "clientSecret": intent.client_secret
         })
@@ -40,26 +60,35 @@ def create_payment_intent(request):
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def stripe_webhook(request):
+    """
+    Receives Stripe webhook events.
+    Each event is recorded once under its Stripe event id and acknowledged
+    immediately; handled event types are then processed by a Celery task.
+
+    @param request: The request object containing the signed event.
+    @return: Empty response with status 200, or 400 if the signature is invalid.
+    """
     payload = request.body
     sig_header = request.META.get('HTTP_STRIPE_SIGNATURE')
-    endpoint_secret = settings.STRIPE_WEBHOOK_SECRET
 
     try:
-        event = stripe.Webhook.construct_event(
-            payload, sig_header, endpoint_secret
-        )
-    except ValueError:
-        return Response(status=400)
-    except stripe.error.SignatureVerificationError:
+        event = get_gateway().construct_event(payload, sig_header)
+    except InvalidSignature:
         return Response(status=400)
 
-    # Successful payment event handling
-    if event['type'] == 'payment_intent.succeeded':
-        intent = event['data']['object']
-        user_id = intent['metadata'].get('user_id')
-        order = Order.objects.filter(user_id=user_id, status='pending').order_by('-created_at').first()
-        if order:
-            with transaction.atomic():
-                order.mark_as_paid()
+    # Record the event and acknowledge it right away, the order is processed by a Celery task
+    try:
+        with transaction.atomic():
+            record = ProcessedStripeEvent.objects.create(
+                event_id=event['id'],
+                type=event['type'],
+                payload=event['data']['object'],
+                processed_at=None if event['type'] in EVENT_HANDLERS else timezone.now(),
+            )
+    except IntegrityError:
+        # Redelivery of a recorded event: only enqueue it again if it is still unprocessed
+        record = ProcessedStripeEvent.objects.get(event_id=event['id'])
 
+    if record.processed_at is None:
+        transaction.on_commit(lambda: process_stripe_event_task.delay(record.event_id))
     return Response(status=200)
@@ -2,4 +2,4 @@
 set -e
 
 echo "Lancement léger de Celery"
-exec python -m celery -A ogtickets worker --loglevel=info --concurrency=1 --pool=solo
+exec python -m celery -A ogtickets worker --loglevel=info --concurrency=1 --pool=solo --beat --schedule=/tmp/celerybeat-schedule
@@ -16,6 +16,18 @@ if [[ "$mode" == "django" || "$mode" == "celery" ]]; then
     value=$(cat "/run/secrets/$secret" | tr -d '\n')
     export "$env_var"="$value"
   done
+
+  # Optional secrets (key rotation keyrings): loaded only when present and not empty
+  optional_secrets="ticket_encryption_keys ticket_encryption_key_id ticket_hmac_keys ticket_hmac_key_id"
+  for secret in $optional_secrets; do
+    if [[ -f "/run/secrets/$secret" ]]; then
+      env_var=$(echo "$secret" | tr '[:lower:]' '[:upper:]')
+      value=$(cat "/run/secrets/$secret" | tr -d '\n')
+      if [[ -n "$value" ]]; then
+        export "$env_var"="$value"
+      fi
+    fi
+  done
 fi
 
 # Function to wait for the database to be ready
@@ -1,9 +1,10 @@
 
 from django.contrib import admin
+from utils.soft_delete import SoftDeleteAdminMixin
 from .models import Ticket
 
 @admin.register(Ticket)
-class TicketAdmin(admin.ModelAdmin):
+class TicketAdmin(SoftDeleteAdminMixin, admin.ModelAdmin):
     list_display = (
         'id',
         'user',
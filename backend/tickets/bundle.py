@@ -0,0 +1,137 @@
+"""
+Offline validation bundles for gate scanners.
+
+A bundle is a flat binary file that a scanner can memory-map and search without
+any database access. It starts with a fixed-size header followed by one record
+per valid ticket, sorted by ticket id:
+
+    header: magic (4 bytes) | version (1 byte) | digest size (1 byte) | key count (1 byte) | event id (8 bytes)
+    record: ticket UUID (16 bytes) | truncated ticket HMAC (DIGEST_SIZE bytes) per HMAC key
+
+Each record holds the ticket HMAC under every key of the HMAC keyring, the
+current key first, so that QR codes issued before a key rotation still verify
+offline. Records being fixed-size and sorted, a lookup is a binary search in O(log n).
+"""
+import bisect
+import hmac
+import struct
+import uuid
+from utils.encryption import generate_ticket_hmac_candidates, hmac_secrets_in_order
+from .models import Ticket
+
+MAGIC = b'OGTB'
+VERSION = 2
+DIGEST_SIZE = 16
+HEADER = struct.Struct('>4sBBBQ')
+
+def record_size(key_count):
+    """
+    Size in bytes of a bundle record holding the digests of key_count HMAC keys.
+    """
+    return 16 + key_count * DIGEST_SIZE
+
+def truncate_hmac(hmac_hex):
+    """
+    Convert a ticket HMAC (hex string) to the truncated digest stored in bundles.
+
+    @param hmac_hex: HMAC as returned by generate_ticket_hmac().
+    @type hmac_hex: str
+    @return: The first DIGEST_SIZE bytes of the HMAC, or None if it is not valid hex.
+    @rtype: bytes
+    """
+    try:
+        return bytes.fromhex(hmac_hex)[:DIGEST_SIZE]
+    except (TypeError, ValueError):
+        return None
+
+def bundle_tickets(olympic_event_id):
+    """
+    Queryset of the tickets included in the bundle of an event, in bundle order.
+    """
+    return (
+        Ticket.objects
+        .filter(olympic_event_id=olympic_event_id, status='valid')
+        .select_related('user')
+        .order_by('id')
+    )
+
+def iter_bundle(olympic_event_id, chunk_size=2000):
+    """
+    Stream the validation bundle of an event as byte chunks.
+    Tickets are read with a server-side iterator and their HMACs are computed one
+    chunk at a time, so memory stays bounded whatever the number of tickets.
+
+    @param olympic_event_id: Primary key of the OlympicEvent.
+    @param chunk_size: Number of tickets fetched and hashed per chunk.
+    @return: Generator of bytes, the header first, then one block of records per chunk.
+    """
+    yield HEADER.pack(MAGIC, VERSION, DIGEST_SIZE, len(hmac_secrets_in_order()), olympic_event_id)
+    chunk = []
+    for ticket in bundle_tickets(olympic_event_id).iterator(chunk_size=chunk_size):
+        chunk.append(ticket)
+        if len(chunk) == chunk_size:
+            yield _pack_records(chunk)
+            chunk = []
+    if chunk:
+        yield _pack_records(chunk)
+
+def _pack_records(tickets):
+    return b''.join(
+        ticket.id.bytes + b''.join(truncate_hmac(hmac_hex) for hmac_hex in candidates)
+        for ticket, candidates in zip(tickets, generate_ticket_hmac_candidates(tickets))
+    )
+
+class BundleReader:
+    """
+    Read-only view over a validation bundle (bytes, bytearray or mmap).
+    """
+
+    def __init__(self, buffer):
+        self.buffer = memoryview(buffer)
+        magic, version, digest_size, self.key_count, self.olympic_event_id = HEADER.unpack_from(self.buffer)
+        if magic != MAGIC or version != VERSION or digest_size != DIGEST_SIZE or not self.key_count:
+            raise ValueError("Invalid validation bundle header.")
+        self.record_size = record_size(self.key_count)
+        self.records = self.buffer[HEADER.size:]
+        if len(self.records) % self.record_size:
+            raise ValueError("Truncated validation bundle.")
+
+    def __len__(self):
+        return len(self.records) // self.record_size
+
+    def __getitem__(self, index):
+        offset = index * self.record_size
+        return bytes(self.records[offset:offset + 16])
+
+    def lookup(self, ticket_id):
+        """
+        Find the truncated HMACs of a ticket by binary search.
+
+        @param ticket_id: The ticket id.
+        @type ticket_id: uuid.UUID or str
+        @return: The stored digests, current key first, or None if the ticket is not in the bundle.
+        @rtype: list[bytes]
+        """
+        key = uuid.UUID(str(ticket_id)).bytes
+        index = bisect.bisect_left(self, key)
+        if index < len(self) and self[index] == key:
+            offset = index * self.record_size + 16
+            return [
+                bytes(self.records[start:start + DIGEST_SIZE])
+                for start in range(offset, offset + self.key_count * DIGEST_SIZE, DIGEST_SIZE)
+            ]
+        return None
+
+    def verify(self, ticket_id, hmac_hex):
+        """
+        Check a scanned ticket against the bundle, in constant time for each digest.
+        @return: True if the ticket is in the bundle and the HMAC matches one of its digests.
+        @rtype: bool
+        """
+        digests = self.lookup(ticket_id)
+        presented = truncate_hmac(hmac_hex)
+        if digests is None or presented is None:
+            return False
+        # Every digest is compared, so the timing does not tell which key matched
+        matches = [hmac.compare_digest(digest, presented) for digest in digests]
+        return any(matches)
@@ -0,0 +1,28 @@
+import os
+from django.core.management.base import BaseCommand, CommandError
+from olympic_events.models import OlympicEvent
+from tickets.bundle import iter_bundle, record_size, HEADER
+from utils.encryption import hmac_secrets_in_order
+
+class Command(BaseCommand):
+  help = "Exporte le bundle de validation hors ligne (billets valides triés + HMAC tronqué) d'une épreuve pour les scanners."
+
+  def add_arguments(self, parser):
+    parser.add_argument('olympic_event_id', type=int, help="Identifiant de l'épreuve.")
+    parser.add_argument('--output', '-o', help="Fichier de sortie (défaut : bundle-event-<id>.bin).")
+    parser.add_argument('--chunk-size', type=int, default=2000, help="Nombre de billets lus et chiffrés par lot.")
+
+  def handle(self, *args, **options):
+    event_id = options['olympic_event_id']
+    if not OlympicEvent.objects.filter(pk=event_id).exists():
+      raise CommandError(f"Épreuve {event_id} introuvable.")
+
+    output = options['output'] or f"bundle-event-{event_id}.bin"
+    with open(output, 'wb') as bundle_file:
+      for chunk in iter_bundle(event_id, chunk_size=options['chunk_size']):
+        bundle_file.write(chunk)
+
+    count = (os.path.getsize(output) - HEADER.size) // record_size(len(hmac_secrets_in_order()))
+    self.stdout.write(self.style.SUCCESS(
+      f"{count} billets valides exportés dans {output}."
+    ))
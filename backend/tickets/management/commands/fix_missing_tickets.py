@@ -1,39 +1,72 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, F
 from order.models import OrderItem
 from tickets.models import Ticket
-from django.db import transaction, IntegrityError
+
+def incomplete_items(after_pk, batch_size):
+  """
+  Next batch of paid order items with fewer tickets than their quantity.
+  The missing counts come from one grouped aggregate; items are walked in
+  primary key order (keyset), so every batch resumes where the previous one stopped.
+  Deleted tickets were issued too and count as such.
+
+  @param after_pk: Primary key of the last item of the previous batch.
+  @param batch_size: Maximum number of items returned.
+  @return: List of OrderItem, with their order and offer loaded and a `missing` attribute.
+  """
+  return list(
+    OrderItem.objects
+    .filter(pk__gt=after_pk, order__status='paid', order__deleted_at__isnull=True)
+    .annotate(missing=F('quantity') - Count('tickets'))
+    .filter(missing__gt=0)
+    .select_related('order', 'offer')
+    .order_by('pk')[:batch_size]
+  )
 
 class Command(BaseCommand):
-  help = "Génère tous les tickets manquants pour les OrderItems payés (avec toutes les infos et la clé chiffrée)."
+  help = (
+    "Génère les billets manquants des articles de commande payés, par lots "
+    "(un agrégat groupé et des insertions en masse par transaction)."
+  )
+
+  def add_arguments(self, parser):
+    parser.add_argument('--dry-run', action='store_true', help="Compte les billets manquants sans les générer.")
+    parser.add_argument('--batch-size', type=int, default=1000, help="Nombre d'articles de commande traités par transaction.")
 
   def handle(self, *args, **options):
-    created_count = 0
-    skipped_count = 0
-    with transaction.atomic():
-      paid_items = OrderItem.objects.filter(order__status='paid')
-      for item in paid_items:
-        expected = item.quantity
-        existing = Ticket.objects.filter(order_item=item).count()
-        missing = expected - existing
-        if missing > 0:
-          for _ in range(missing):
-            try:
-              ticket = Ticket.objects.create(
-                user=item.order.user,
-                order_item=item,
-                olympic_event=item.olympic_event,
-                nb_place=getattr(item.offer, "nb_place", 1),
-                status='valid',
-              )
-              created_count += 1
-            except IntegrityError:
-              skipped_count += 1
+    batch_size = options['batch_size']
+    if batch_size < 1:
+      raise CommandError("--batch-size doit être strictement positif.")
+    dry_run = options['dry_run']
 
-    if created_count == 0:
+    last_pk = 0
+    items_count = tickets_count = 0
+    while batch := incomplete_items(last_pk, batch_size):
+      last_pk = batch[-1].pk
+      missing = sum(item.missing for item in batch)
+      if not dry_run:
+        # One transaction per batch: locks are held for one batch only and an
+        # interrupted run keeps the batches already committed
+        with transaction.atomic():
+          Ticket.objects.bulk_issue((item, item.missing) for item in batch)
+      items_count += len(batch)
+      tickets_count += missing
+      if options['verbosity']:
+        self.stdout.write(
+          f"{items_count} articles traités, {tickets_count} billets "
+          f"{'manquants' if dry_run else 'générés'} (dernier article : {last_pk})."
+        )
+
+    if tickets_count == 0:
       self.stdout.write(self.style.SUCCESS(
         "Aucun ticket manquant trouvé. Tous les billets sont déjà générés."
       ))
+    elif dry_run:
+      self.stdout.write(self.style.WARNING(
+        f"{tickets_count} billets manquants sur {items_count} articles de commande payés (aucun billet généré)."
+      ))
     else:
       self.stdout.write(self.style.SUCCESS(
-        f"{created_count} tickets générés pour les commandes déjà payées. ({skipped_count} ignorés pour duplicata éventuel)"
+        f"{tickets_count} tickets générés pour {items_count} articles de commande déjà payés."
       ))
@@ -0,0 +1,69 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from accounts.models import CustomUser
+from tickets.models import Ticket
+from utils import encryption
+
+ENCRYPTED_FIELDS = (
+  (CustomUser, 'user_key'),
+  (Ticket, 'ticket_key'),
+)
+"""Models and columns holding keys encrypted with the keyring."""
+
+def stale_rows(model, field, after_pk, batch_size):
+  """
+  Next batch of (pk, blob) pairs of a model not encrypted with the current key,
+  walked in primary key order. Soft-deleted rows are included.
+  """
+  rows = model.all_objects.exclude(**{f'{field}__isnull': True}).exclude(**{field: ''})
+  if after_pk is not None:
+    rows = rows.filter(pk__gt=after_pk)
+  if encryption.keyring.prefix:
+    rows = rows.exclude(**{f'{field}__startswith': encryption.keyring.prefix})
+  else:
+    rows = rows.filter(**{f'{field}__contains': ':'})
+  return list(rows.order_by('pk').values_list('pk', field)[:batch_size])
+
+class Command(BaseCommand):
+  help = (
+    "Rechiffre les user_key et ticket_key avec la clé courante du trousseau (TICKET_ENCRYPTION_KEY_ID), "
+    "par lots et à débit limité pour pouvoir tourner en production."
+  )
+
+  def add_arguments(self, parser):
+    parser.add_argument('--batch-size', type=int, default=500, help="Nombre de lignes rechiffrées par transaction.")
+    parser.add_argument('--rate', type=float, default=2000, help="Débit maximal, en lignes par seconde (0 : illimité).")
+    parser.add_argument('--dry-run', action='store_true', help="Compte les lignes à rechiffrer sans les modifier.")
+
+  def handle(self, *args, **options):
+    batch_size, rate = options['batch_size'], options['rate']
+    if batch_size < 1 or rate < 0:
+      raise CommandError("--batch-size doit être strictement positif et --rate positif.")
+
+    total = 0
+    for model, field in ENCRYPTED_FIELDS:
+      count, last_pk = 0, None
+      while rows := stale_rows(model, field, last_pk, batch_size):
+        started = time.monotonic()
+        last_pk = rows[-1][0]
+        if options['dry_run']:
+          count += len(rows)
+        else:
+          blobs = encryption.reencrypt_many([blob for _, blob in rows])
+          # The raw keys are unchanged: ticket HMACs and updated_at stay the same.
+          # Each update only applies if the blob is still the one read, so a key
+          # changed meanwhile is not overwritten with its previous value.
+          with transaction.atomic():
+            for (pk, old_blob), blob in zip(rows, blobs):
+              count += model.all_objects.filter(pk=pk, **{field: old_blob}).update(**{field: blob})
+        if options['verbosity']:
+          self.stdout.write(f"{model._meta.verbose_name_plural} : {count} lignes traitées.")
+        if rate:
+          time.sleep(max(len(rows) / rate - (time.monotonic() - started), 0))
+      total += count
+
+    verb = "à rechiffrer" if options['dry_run'] else "rechiffrées"
+    self.stdout.write(self.style.SUCCESS(
+      f"{total} clés {verb} avec la clé « {encryption.keyring.current_id or 'legacy'} »."
+    ))
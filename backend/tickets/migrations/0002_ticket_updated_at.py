@@ -0,0 +1,33 @@
+# Generated by Django 5.1.6 on 2026-10-18 15:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("olympic_events", "0001_initial"),
+        ("order", "0002_order_deleted_at_order_paid_at_orderitem_deleted_at_and_more"),
+        ("tickets", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ticket",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True,
+                help_text="Last change, used as delta-sync watermark by gate scanners",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                condition=models.Q(("deleted_at__isnull", True)),
+                fields=["olympic_event", "updated_at"],
+                name="ticket_event_updated_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.6 on 2026-10-18 15:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("olympic_events", "0003_olympicevent_capacity"),
+        ("order", "0004_order_order_user_created_idx"),
+        ("tickets", "0002_ticket_updated_at"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                condition=models.Q(("deleted_at__isnull", True)),
+                fields=["user", "created_at", "id"],
+                name="ticket_user_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                condition=models.Q(("deleted_at__isnull", True)),
+                fields=["created_at", "id"],
+                name="ticket_created_idx",
+            ),
+        ),
+    ]
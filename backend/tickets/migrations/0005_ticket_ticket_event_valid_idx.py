@@ -0,0 +1,25 @@
+# Generated by Django 5.1.6 on 2026-10-18 16:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("olympic_events", "0003_olympicevent_capacity"),
+        ("order", "0006_order_order_pending_created_idx"),
+        ("tickets", "0003_ticket_ticket_user_created_idx_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                condition=models.Q(("deleted_at__isnull", True), ("status", "valid")),
+                fields=["olympic_event", "id"],
+                name="ticket_event_valid_idx",
+            ),
+        ),
+    ]
@@ -1,11 +1,45 @@
 import uuid
 from django.db import models
+from django.db.models import Q
 from accounts.models import CustomUser
 from order.models import OrderItem
 from olympic_events.models import OlympicEvent
-from utils.encryption import generate_and_encrypt_key
+from utils.encryption import generate_and_encrypt_key, encrypt_many
+from utils.soft_delete import SoftDeleteManager, SoftDeleteQuerySet
 from django.utils import timezone
 
+class TicketManager(SoftDeleteManager):
+    """Manager of the live tickets, providing bulk issuance."""
+
+    def bulk_issue(self, allocations, batch_size=500):
+        """
+        Create tickets in bulk for the given order items.
+        Encrypted ticket keys are generated up front and the tickets are
+        inserted with chunked bulk_create, bypassing the per-row save().
+
+        @param allocations: Iterable of (order_item, count) pairs. Each order item
+            must have its order and offer loaded to avoid extra queries.
+        @param batch_size: Maximum number of rows per INSERT statement.
+        @return: List of the created Ticket instances.
+        """
+        allocations = [(item, count) for item, count in allocations if count > 0]
+        # Keys are 32 random bytes: a collision is caught by the unique constraint on ticket_key
+        keys = iter(encrypt_many(sum(count for _, count in allocations)))
+        tickets = [
+            self.model(
+                user_id=item.order.user_id,
+                order_item=item,
+                olympic_event_id=item.olympic_event_id,
+                nb_place=item.offer.nb_place,
+                ticket_key=next(keys),
+                status='valid',
+            )
+            for item, count in allocations
+            for _ in range(count)
+        ]
+        return self.bulk_create(tickets, batch_size=batch_size)
+
+
 class Ticket(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(CustomUser, on_delete=models.PROTECT, related_name='tickets')
@@ -25,8 +59,37 @@ class Ticket(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     used_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, help_text="Last change, used as delta-sync watermark by gate scanners")
     deleted_at = models.DateTimeField(null=True, blank=True)
 
+    objects = TicketManager()
+    all_objects = SoftDeleteQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['olympic_event', 'updated_at'],
+                name='ticket_event_updated_idx',
+                condition=Q(deleted_at__isnull=True),
+            ),
+            models.Index(
+                fields=['user', 'created_at', 'id'],
+                name='ticket_user_created_idx',
+                condition=Q(deleted_at__isnull=True),
+            ),
+            models.Index(
+                fields=['created_at', 'id'],
+                name='ticket_created_idx',
+                condition=Q(deleted_at__isnull=True),
+            ),
+            # Validation bundle of an event (tickets.bundle), in id order
+            models.Index(
+                fields=['olympic_event', 'id'],
+                name='ticket_event_valid_idx',
+                condition=Q(status='valid', deleted_at__isnull=True),
+            ),
+        ]
+
     def save(self, *args, **kwargs):
         if not self.ticket_key:
             self.ticket_key = generate_and_encrypt_key()
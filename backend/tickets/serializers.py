@@ -2,12 +2,13 @@ from rest_framework import serializers
 from .models import Ticket
 from offers.serializers import OfferSerializer
 from olympic_events.serializers import OlympicEventSerializer
+from utils.sparse_fields import SparseFieldsMixin
 
-class TicketListSerializer(serializers.ModelSerializer):
+class TicketListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     offer = OfferSerializer(source='order_item.offer', read_only=True)
     olympic_event = OlympicEventSerializer(source='order_item.olympic_event', read_only=True)
     price = serializers.DecimalField(source='order_item.price', max_digits=10, decimal_places=2, read_only=True)
-    nb_place = serializers.SerializerMethodField()
+    nb_place = serializers.IntegerField(source='order_item.offer.nb_place', read_only=True)
 
     class Meta:
         model = Ticket
@@ -21,6 +22,3 @@ class TicketListSerializer(serializers.ModelSerializer):
             'olympic_event',
             'price',
         ]
-
-    def get_nb_place(self, obj):
-        return obj.order_item.offer.nb_place if hasattr(obj.order_item.offer, "nb_place") else None
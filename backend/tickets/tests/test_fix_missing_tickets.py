@@ -0,0 +1,50 @@
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from tickets.models import Ticket
+from .test_ticket_api import create_paid_order, create_ticket_owner
+
+class FixMissingTicketsTestCase(TestCase):
+    """
+    Test case for the reconciliation of the tickets of paid orders.
+    """
+    def setUp(self):
+        """
+        Set up three paid orders of 3 tickets, then remove some of their tickets.
+        """
+        self.user = create_ticket_owner('owner@example.com')
+        self.orders = [create_paid_order(self.user, 3) for _ in range(3)]
+        Ticket.objects.filter(order_item__order=self.orders[0]).delete()
+        Ticket.all_objects.filter(pk__in=Ticket.objects.filter(order_item__order=self.orders[1]).values('pk')[:1]).delete()
+
+    def run_command(self, **options):
+        out = StringIO()
+        call_command('fix_missing_tickets', stdout=out, **options)
+        return out.getvalue()
+
+    def test_fills_missing_tickets_by_batch(self):
+        """
+        Test that every paid item gets back to one ticket per unit, in batches of one item.
+        """
+        output = self.run_command(batch_size=1)
+        self.assertIn("4 tickets générés pour 2 articles", output)
+        self.assertIn("dernier article", output)
+        for order in self.orders:
+            item = order.items.get()
+            self.assertEqual(Ticket.all_objects.filter(order_item=item).count(), item.quantity)
+        self.assertIn("Aucun ticket manquant", self.run_command())
+
+    def test_dry_run_creates_nothing(self):
+        """
+        Test that a dry run reports the missing tickets without creating them.
+        """
+        output = self.run_command(dry_run=True)
+        self.assertIn("4 billets manquants sur 2 articles", output)
+        self.assertEqual(Ticket.all_objects.count(), 5)
+
+    def test_deleted_orders_are_skipped(self):
+        """
+        Test that the items of a deleted order are not reconciled.
+        """
+        self.orders[0].delete()
+        self.assertIn("1 tickets générés pour 1 articles", self.run_command())
@@ -0,0 +1,68 @@
+from io import StringIO
+from unittest import mock
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from django.core.management import call_command
+from django.test import TestCase
+from accounts.models import CustomUser
+from tickets.models import Ticket
+from utils import encryption
+from utils.encryption import Keyring, generate_ticket_hmac
+from .test_ticket_api import create_paid_order, create_ticket_owner
+
+class ReencryptKeysTestCase(TestCase):
+    """
+    Test case for the re-encryption of the stored keys after a key rotation.
+    """
+    def setUp(self):
+        """
+        Set up 3 tickets encrypted with the legacy key, one of them deleted, then make 'k2' the current key.
+        """
+        create_paid_order(create_ticket_owner('owner@example.com'), 3)
+        Ticket.objects.first().delete()
+        self.tickets = list(Ticket.all_objects.select_related('user'))
+        self.hmacs = [generate_ticket_hmac(ticket) for ticket in self.tickets]
+        keyring = Keyring({'': encryption.key_bytes, 'k2': AESGCM.generate_key(256)}, 'k2')
+        patcher = mock.patch.object(encryption, 'keyring', keyring)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_command(self, **options):
+        out = StringIO()
+        call_command('reencrypt_keys', rate=0, stdout=out, **options)
+        return out.getvalue()
+
+    def test_dry_run_counts_stale_keys(self):
+        """
+        Test that a dry run counts the user and ticket keys to rotate without changing them.
+        """
+        self.assertIn("4 clés à rechiffrer", self.run_command(dry_run=True))
+        self.assertFalse(Ticket.all_objects.filter(ticket_key__startswith='k2:').exists())
+
+    def test_keys_are_rotated_without_changing_tickets(self):
+        """
+        Test that every key moves to the current key, keeping the HMACs and the sync watermark.
+        """
+        self.assertIn("4 clés rechiffrées avec la clé « k2 »", self.run_command(batch_size=2))
+        self.assertFalse(Ticket.all_objects.exclude(ticket_key__startswith='k2:').exists())
+        self.assertFalse(CustomUser.objects.exclude(user_key__startswith='k2:').exists())
+        for ticket, expected in zip(self.tickets, self.hmacs):
+            rotated = Ticket.all_objects.select_related('user').get(pk=ticket.pk)
+            self.assertEqual(rotated.updated_at, ticket.updated_at)
+            self.assertEqual(generate_ticket_hmac(rotated), expected)
+        self.assertIn("0 clés rechiffrées", self.run_command())
+
+    def test_keys_changed_during_the_run_are_not_overwritten(self):
+        """
+        Test that a key replaced between the read and the update of its batch keeps its new value.
+        """
+        ticket = self.tickets[0]
+        replaced = encryption.generate_and_encrypt_key()
+        reencrypt_many = encryption.reencrypt_many
+
+        def replace_then_reencrypt(blobs):
+            Ticket.all_objects.filter(pk=ticket.pk).update(ticket_key=replaced)
+            return reencrypt_many(blobs)
+
+        with mock.patch.object(encryption, 'reencrypt_many', side_effect=replace_then_reencrypt):
+            self.run_command()
+        self.assertEqual(Ticket.all_objects.get(pk=ticket.pk).ticket_key, replaced)
@@ -0,0 +1,72 @@
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from olympic_events.models import OlympicEvent
+from tickets.models import Ticket
+from utils.encryption import generate_ticket_hmac
+from .test_ticket_api import create_paid_order, create_ticket_owner
+
+class GateScanTestCase(APITestCase):
+    """
+    Test case for scans sent by a gate controlling one event.
+    """
+    def setUp(self):
+        """
+        Set up 4 tickets for one event, 1 for another, and a staff member.
+        """
+        self.event = OlympicEvent.objects.create(name='Finale', date_time=timezone.now())
+        self.other_event = OlympicEvent.objects.create(name='Demi-finale', date_time=timezone.now())
+        create_paid_order(create_ticket_owner('fan@example.com'), 4, event=self.event)
+        create_paid_order(create_ticket_owner('other@example.com'), 1, event=self.other_event)
+        self.tickets = list(Ticket.objects.filter(olympic_event=self.event).select_related('user'))
+        self.client.force_authenticate(user=create_ticket_owner('gate@example.com', is_staff=True))
+
+    def scan(self, ticket, event):
+        payload = {'ticket_id': str(ticket.id), 'hmac': generate_ticket_hmac(ticket), 'olympic_event': event.id}
+        return self.client.post(reverse('ticket-scan'), payload, format='json')
+
+    def test_duplicate_scan_is_rejected(self):
+        """
+        Test that a ticket scanned twice at the same gate is rejected the second time.
+        """
+        ticket = self.tickets[0]
+        self.assertEqual(self.scan(ticket, self.event).data['result'], 'accepted')
+        response = self.scan(ticket, self.event)
+        self.assertEqual(response.data['result'], 'already_used')
+        self.assertIsNotNone(response.data['used_at'])
+
+    def test_used_state_is_only_told_for_genuine_tickets(self):
+        """
+        Test that a used ticket presented with a forged HMAC is reported invalid, not already used.
+        """
+        ticket = self.tickets[0]
+        self.scan(ticket, self.event)
+        payload = {'ticket_id': str(ticket.id), 'hmac': '0' * 64, 'olympic_event': self.event.id}
+        response = self.client.post(reverse('ticket-scan'), payload, format='json')
+        self.assertEqual(response.data['result'], 'invalid')
+
+    def test_ticket_set_back_to_valid_is_accepted_again(self):
+        """
+        Test that a used ticket set back to valid is accepted by the next scan.
+        """
+        ticket = self.tickets[0]
+        self.scan(ticket, self.event)
+        Ticket.objects.filter(pk=ticket.pk).update(status='valid', used_at=None)
+        self.assertEqual(self.scan(ticket, self.event).data['result'], 'accepted')
+
+    def test_unknown_event_is_refused(self):
+        """
+        Test that a gate sending an unknown event is refused.
+        """
+        payload = {'ticket_id': str(self.tickets[0].id), 'hmac': generate_ticket_hmac(self.tickets[0]), 'olympic_event': 999999}
+        response = self.client.post(reverse('ticket-scan'), payload, format='json')
+        self.assertEqual(response.status_code, 404)
+
+    def test_tickets_of_another_event_are_refused(self):
+        """
+        Test that a gate refuses tickets issued for another event.
+        """
+        foreign = Ticket.objects.select_related('user').get(olympic_event=self.other_event)
+        self.assertEqual(self.scan(foreign, self.event).data['result'], 'wrong_event')
+        foreign.refresh_from_db()
+        self.assertEqual(foreign.status, 'valid')
@@ -0,0 +1,215 @@
+import json
+import uuid
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from offers.models import Offer
+from olympic_events.models import OlympicEvent
+from order.models import Order, OrderItem
+from tickets.models import Ticket
+from utils.encryption import generate_and_encrypt_key, generate_ticket_hmac
+
+User = get_user_model()
+
+def create_paid_order(user, quantity, offer=None, event=None):
+    """
+    Create a paid order of `quantity` tickets for the given user.
+    @return: The created order.
+    """
+    offer = offer or Offer.objects.create(name='Solo', description='1 place', price=50, nb_place=1)
+    event = event or OlympicEvent.objects.create(name='Finale', date_time=timezone.now())
+    order = Order.objects.create(user=user, amount=50 * quantity, status='pending')
+    OrderItem.objects.create(
+        order=order, offer=offer, olympic_event=event,
+        quantity=quantity, price=50, amount=50 * quantity
+    )
+    order.mark_as_paid()
+    return order
+
+def create_ticket_owner(email, **extra_fields):
+    """
+    Create an active user with an encrypted user key.
+    @return: The created user.
+    """
+    return User.objects.create_user(
+        email=email,
+        password='securepass',
+        is_active=True,
+        user_key=generate_and_encrypt_key(),
+        **extra_fields
+    )
+
+class TicketQrBatchTestCase(APITestCase):
+    """
+    Test case for the batch QR endpoint of the ticket wallet.
+    """
+    def setUp(self):
+        """
+        Set up a user owning 5 tickets and another user owning 2 tickets.
+        """
+        self.user = create_ticket_owner('wallet@example.com')
+        self.other = create_ticket_owner('other@example.com')
+        create_paid_order(self.user, 5)
+        create_paid_order(self.other, 2)
+        self.url = reverse('ticket-qr-batch')
+        self.client.force_authenticate(user=self.user)
+
+    def test_returns_hmac_of_every_ticket_of_the_caller(self):
+        """
+        Test that the batch endpoint returns the same HMACs as the single QR endpoint.
+        """
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 5)
+        for payload in response.data:
+            ticket = Ticket.objects.get(pk=payload['ticket_id'])
+            self.assertEqual(ticket.user, self.user)
+            self.assertEqual(payload['hmac'], generate_ticket_hmac(ticket))
+
+    def test_query_count_does_not_grow_with_ticket_count(self):
+        """
+        Test that the whole wallet is loaded with a single query.
+        """
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.data), 5)
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+    def test_filters_by_ids_and_hides_other_users_tickets(self):
+        """
+        Test that only the requested tickets owned by the caller are returned.
+        """
+        own = list(Ticket.objects.filter(user=self.user).values_list('id', flat=True)[:2])
+        foreign = Ticket.objects.filter(user=self.other).values_list('id', flat=True).first()
+        response = self.client.post(self.url, {'ids': [str(i) for i in own] + [str(foreign)]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual({p['ticket_id'] for p in response.data}, {str(i) for i in own})
+
+        response = self.client.get(self.url, {'ids': f"{own[0]},{uuid.uuid4()}"})
+        self.assertEqual([p['ticket_id'] for p in response.data], [str(own[0])])
+
+    def test_rejects_invalid_ids(self):
+        """
+        Test that malformed ticket ids are rejected.
+        """
+        response = self.client.get(self.url, {'ids': 'not-a-uuid'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(self.url, {'ids': 'not-a-list'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class TicketListTestCase(APITestCase):
+    """
+    Test case for the ticket wallet listing.
+    """
+    def setUp(self):
+        self.user = create_ticket_owner('list@example.com')
+        self.client.force_authenticate(user=self.user)
+
+    def test_query_count_does_not_grow_with_ticket_count(self):
+        """
+        Test that listing tickets runs the same number of queries whatever their number and events.
+        """
+        def list_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(reverse('ticket-list'))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(response.data), len(ctx.captured_queries)
+
+        create_paid_order(self.user, 1)
+        count, queries = list_queries()
+        for _ in range(3):
+            create_paid_order(self.user, 4)
+        self.assertEqual(list_queries(), (count + 12, queries))
+
+    def test_nb_place_comes_from_the_offer(self):
+        """
+        Test that each ticket exposes the number of places of its offer.
+        """
+        offer = Offer.objects.create(name='Famille', description='4 places', price=50, nb_place=4)
+        create_paid_order(self.user, 1, offer=offer)
+        response = self.client.get(reverse('ticket-list'))
+        self.assertEqual(response.data[0]['nb_place'], 4)
+        self.assertEqual(response.data[0]['offer']['name'], 'Famille')
+
+    def test_sparse_fields(self):
+        """
+        Test that ?fields= prunes the ticket representation and collapses unexpanded relations to primary keys.
+        """
+        offer = Offer.objects.create(name='Famille', description='4 places', price=50, nb_place=4)
+        create_paid_order(self.user, 1, offer=offer)
+        ticket = Ticket.objects.get(user=self.user)
+        response = self.client.get(reverse('ticket-list'), {'fields': 'id,status,offer'})
+        self.assertEqual(response.data[0], {'id': str(ticket.id), 'status': 'valid', 'offer': offer.id})
+        response = self.client.get(reverse('ticket-list'), {'fields': 'id,offer', 'expand': 'offer'})
+        self.assertEqual(response.data[0]['offer']['name'], 'Famille')
+
+class TicketPaginationTestCase(APITestCase):
+    """
+    Test case for the keyset pagination and the streaming mode of the ticket list.
+    """
+    def setUp(self):
+        self.user = create_ticket_owner('pages@example.com')
+        self.staff = create_ticket_owner('gate@example.com', is_staff=True)
+        create_paid_order(self.user, 5)
+        create_paid_order(self.staff, 2)
+        self.url = reverse('ticket-list')
+
+    def collect_pages(self, params):
+        """
+        Helper method following the `next` links from the first page.
+        @return: The ids of every ticket, in page order.
+        """
+        ids, response = [], self.client.get(self.url, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids += [ticket['id'] for ticket in response.data['results']]
+            if not response.data['next']:
+                return ids
+            response = self.client.get(response.data['next'])
+
+    def test_pages_are_ordered_by_creation_date(self):
+        """
+        Test that pages cover every ticket once, newest first.
+        """
+        self.client.force_authenticate(user=self.user)
+        ids = self.collect_pages({'page_size': 2})
+        expected = Ticket.objects.filter(user=self.user).order_by('-created_at', '-id').values_list('id', flat=True)
+        self.assertEqual(ids, [str(ticket_id) for ticket_id in expected])
+
+    def test_plain_list_without_pagination_parameters(self):
+        """
+        Test that users get a plain list unless they ask for a page.
+        """
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.data), 5)
+
+    def test_staff_lists_are_always_paginated(self):
+        """
+        Test that the staff listing of every ticket is paginated by default.
+        """
+        self.client.force_authenticate(user=self.staff)
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.data['results']), 7)
+        self.assertIsNone(response.data['next'])
+
+    def test_staff_stream(self):
+        """
+        Test that the streaming mode returns every ticket as one JSON array, whatever the chunk size.
+        """
+        self.client.force_authenticate(user=self.staff)
+        with mock.patch('tickets.views.TicketViewSet.stream_chunk_size', 3):
+            response = self.client.get(self.url, {'stream': '1'})
+        self.assertTrue(response.streaming)
+        tickets = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(tickets), 7)
+        self.assertEqual(set(tickets[0]), {'id', 'status', 'created_at', 'used_at', 'nb_place', 'offer', 'olympic_event', 'price'})
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(self.url, {'stream': '1'})
+        self.assertFalse(response.streaming)
@@ -0,0 +1,108 @@
+import json
+import uuid
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from tickets.models import Ticket
+from utils.encryption import generate_ticket_hmac
+from .test_ticket_api import create_paid_order, create_ticket_owner
+
+class TicketScanTestCase(APITestCase):
+    """
+    Test case for the staff ticket scan endpoint used at venue gates.
+    """
+    def setUp(self):
+        """
+        Set up a customer owning 3 tickets and an authenticated staff member.
+        """
+        self.customer = create_ticket_owner('fan@example.com')
+        create_paid_order(self.customer, 3)
+        self.tickets = list(Ticket.objects.filter(user=self.customer).select_related('user'))
+        self.staff = create_ticket_owner('gate@example.com', is_staff=True)
+        self.client.force_authenticate(user=self.staff)
+        self.url = reverse('ticket-scan')
+
+    def scan_payload(self, ticket):
+        return {'ticket_id': str(ticket.id), 'hmac': generate_ticket_hmac(ticket)}
+
+    def test_scan_requires_staff(self):
+        """
+        Test that customers cannot validate tickets.
+        """
+        self.client.force_authenticate(user=self.customer)
+        response = self.client.post(self.url, self.scan_payload(self.tickets[0]), format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_valid_scan_marks_ticket_used_once(self):
+        """
+        Test that a genuine ticket is accepted once, then reported as already used.
+        """
+        ticket = self.tickets[0]
+        response = self.client.post(self.url, self.scan_payload(ticket), format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['result'], 'accepted')
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.status, 'used')
+        self.assertIsNotNone(ticket.used_at)
+
+        response = self.client.post(self.url, self.scan_payload(ticket), format='json')
+        self.assertEqual(response.data['result'], 'already_used')
+        self.assertEqual(response.data['used_at'], ticket.used_at)
+
+    def test_raw_qr_content_is_accepted(self):
+        """
+        Test that the QR content produced by the frontend can be sent as is.
+        """
+        ticket = self.tickets[0]
+        qr = json.dumps({'id': str(ticket.id), 'hmac': generate_ticket_hmac(ticket)})
+        response = self.client.post(self.url, {'qr': qr}, format='json')
+        self.assertEqual(response.data['result'], 'accepted')
+
+        ticket = self.tickets[1]
+        response = self.client.post(self.url, {'qr': f"{ticket.id}:{generate_ticket_hmac(ticket)}"}, format='json')
+        self.assertEqual(response.data['result'], 'accepted')
+
+    def test_forged_or_unknown_tickets_are_rejected(self):
+        """
+        Test that wrong HMACs, unknown ids and cancelled tickets are not accepted.
+        """
+        ticket = self.tickets[0]
+        response = self.client.post(self.url, {'ticket_id': str(ticket.id), 'hmac': '0' * 64}, format='json')
+        self.assertEqual(response.data['result'], 'invalid')
+        response = self.client.post(self.url, {'ticket_id': str(uuid.uuid4()), 'hmac': '0' * 64}, format='json')
+        self.assertEqual(response.data['result'], 'not_found')
+        response = self.client.post(self.url, {'ticket_id': 'garbage'}, format='json')
+        self.assertEqual(response.data['result'], 'invalid')
+
+        Ticket.objects.filter(pk=ticket.pk).update(status='cancelled')
+        response = self.client.post(self.url, self.scan_payload(ticket), format='json')
+        self.assertEqual(response.data['result'], 'rejected')
+        self.assertEqual(response.data['status'], 'cancelled')
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.status, 'cancelled')
+
+    def test_batch_scan(self):
+        """
+        Test that a batch is validated with one query per accepted ticket plus one load.
+        """
+        payloads = [self.scan_payload(t) for t in self.tickets]
+        payloads.append(payloads[0])
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(self.url, {'scans': payloads}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [r['result'] for r in response.data],
+            ['accepted', 'accepted', 'accepted', 'already_used']
+        )
+        self.assertEqual(len(ctx.captured_queries), 1 + len(payloads))
+        self.assertFalse(Ticket.objects.filter(user=self.customer, status='valid').exists())
+
+    def test_batch_size_is_bounded(self):
+        """
+        Test that oversized batches are refused.
+        """
+        with self.settings(TICKET_SCAN_MAX_BATCH_SIZE=2):
+            response = self.client.post(self.url, {'scans': [{}, {}, {}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,166 @@
+import os
+from io import StringIO
+import tempfile
+import uuid
+from unittest import mock
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from olympic_events.models import OlympicEvent
+from tickets.bundle import BundleReader, truncate_hmac
+from tickets.models import Ticket
+from utils import encryption
+from utils.encryption import generate_ticket_hmac
+from .test_ticket_api import create_paid_order, create_ticket_owner
+
+class ValidationBundleTestCase(APITestCase):
+    """
+    Test case for the offline validation bundle export and the delta-sync endpoint.
+    """
+    def setUp(self):
+        """
+        Set up 6 tickets for one event, 2 for another, and a staff member.
+        """
+        self.event = OlympicEvent.objects.create(name='Finale', date_time=timezone.now())
+        self.other_event = OlympicEvent.objects.create(name='Demi-finale', date_time=timezone.now())
+        create_paid_order(create_ticket_owner('a@example.com'), 4, event=self.event)
+        create_paid_order(create_ticket_owner('b@example.com'), 2, event=self.event)
+        create_paid_order(create_ticket_owner('c@example.com'), 2, event=self.other_event)
+        self.tickets = list(Ticket.objects.filter(olympic_event=self.event).select_related('user'))
+        self.staff = create_ticket_owner('gate@example.com', is_staff=True)
+        self.client.force_authenticate(user=self.staff)
+
+    def download_bundle(self):
+        response = self.client.get(reverse('ticket-bundle'), {'olympic_event': self.event.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('X-Bundle-Watermark', response)
+        return BundleReader(b''.join(response.streaming_content))
+
+    def test_bundle_contains_sorted_valid_tickets_of_the_event(self):
+        """
+        Test that the bundle holds every valid ticket of the event, sorted by id.
+        """
+        Ticket.objects.filter(pk=self.tickets[0].pk).update(status='cancelled')
+        reader = self.download_bundle()
+        self.assertEqual(reader.olympic_event_id, self.event.id)
+        self.assertEqual(len(reader), 5)
+        ids = [reader[i] for i in range(len(reader))]
+        self.assertEqual(ids, sorted(ids))
+        self.assertIsNone(reader.lookup(self.tickets[0].id))
+
+    def test_reader_verifies_hmacs_offline(self):
+        """
+        Test that the scanner-side lookup accepts genuine HMACs and rejects others.
+        """
+        reader = self.download_bundle()
+        for ticket in self.tickets:
+            self.assertTrue(reader.verify(ticket.id, generate_ticket_hmac(ticket)))
+        self.assertFalse(reader.verify(self.tickets[0].id, generate_ticket_hmac(self.tickets[1])))
+        self.assertFalse(reader.verify(self.tickets[0].id, 'not-hex'))
+        self.assertFalse(reader.verify(uuid.uuid4(), generate_ticket_hmac(self.tickets[0])))
+
+    def test_bundle_requires_staff_and_existing_event(self):
+        """
+        Test access control and event validation of the bundle endpoint.
+        """
+        response = self.client.get(reverse('ticket-bundle'), {'olympic_event': 999999})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.client.force_authenticate(user=self.tickets[0].user)
+        response = self.client.get(reverse('ticket-bundle'), {'olympic_event': self.event.id})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_management_command_streams_in_chunks(self):
+        """
+        Test that the command output equals the API bundle, whatever the chunk size.
+        """
+        expected = b''.join(self.client.get(reverse('ticket-bundle'), {'olympic_event': self.event.id}).streaming_content)
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, 'bundle.bin')
+            call_command('export_validation_bundle', self.event.id, output=output, chunk_size=4, stdout=StringIO())
+            with open(output, 'rb') as bundle_file:
+                self.assertEqual(bundle_file.read(), expected)
+
+    def test_management_command_exports_an_event_without_tickets(self):
+        """
+        Test that an event without valid tickets is exported as a header-only bundle.
+        """
+        event = OlympicEvent.objects.create(name='Qualifications', date_time=timezone.now())
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, 'bundle.bin')
+            out = StringIO()
+            call_command('export_validation_bundle', event.id, output=output, stdout=out)
+            with open(output, 'rb') as bundle_file:
+                reader = BundleReader(bundle_file.read())
+        self.assertEqual(len(reader), 0)
+        self.assertIsNone(reader.lookup(self.tickets[0].id))
+        self.assertIn("0 billets valides exportés", out.getvalue())
+
+    @override_settings(TICKET_SYNC_OVERLAP=0)
+    def test_sync_returns_tickets_changed_since_watermark(self):
+        """
+        Test that used tickets show up in the delta after the bundle watermark.
+        """
+        response = self.client.get(reverse('ticket-bundle'), {'olympic_event': self.event.id})
+        watermark = response['X-Bundle-Watermark']
+        ticket = self.tickets[0]
+        self.client.post(reverse('ticket-scan'), {'ticket_id': str(ticket.id), 'hmac': generate_ticket_hmac(ticket)}, format='json')
+
+        response = self.client.get(reverse('ticket-sync'), {'olympic_event': self.event.id, 'since': watermark})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(t['ticket_id'], t['status']) for t in response.data['tickets']],
+            [(str(ticket.id), 'used')]
+        )
+        self.assertIsNone(response.data['tickets'][0]['digests'])
+
+        response = self.client.get(reverse('ticket-sync'), {'olympic_event': self.event.id, 'since': response.data['watermark']})
+        self.assertEqual(response.data['tickets'], [])
+
+        response = self.client.get(reverse('ticket-sync'), {'olympic_event': self.event.id, 'since': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_sync_reports_deleted_tickets_and_overlaps_watermarks(self):
+        """
+        Test that deleted tickets are sent as blocked, and that a ticket changed just before
+        the watermark is sent again by the next delta.
+        """
+        response = self.client.get(reverse('ticket-bundle'), {'olympic_event': self.event.id})
+        watermark = response['X-Bundle-Watermark']
+        ticket = self.tickets[0]
+        ticket.delete()
+
+        response = self.client.get(reverse('ticket-sync'), {'olympic_event': self.event.id, 'since': watermark})
+        changes = {t['ticket_id']: (t['status'], t['digests']) for t in response.data['tickets']}
+        self.assertEqual(changes[str(ticket.id)], ('deleted', None))
+        response = self.client.get(reverse('ticket-sync'), {'olympic_event': self.event.id, 'since': response.data['watermark']})
+        self.assertIn(str(ticket.id), [t['ticket_id'] for t in response.data['tickets']])
+
+    def test_bundle_and_sync_keep_hmacs_of_retired_keys(self):
+        """
+        Test that after an HMAC key rotation, QR codes signed with the old key still verify offline.
+        """
+        old_hmacs = {ticket.id: generate_ticket_hmac(ticket) for ticket in self.tickets}
+        new_secret = b'\x01' * 32
+        with mock.patch.multiple(
+            encryption,
+            hmac_secrets={'': encryption.hmac_secret, 'h2': new_secret},
+            hmac_key_id='h2',
+            hmac_secret=new_secret,
+        ):
+            reader = self.download_bundle()
+            self.assertEqual(reader.key_count, 2)
+            for ticket in self.tickets:
+                self.assertTrue(reader.verify(ticket.id, old_hmacs[ticket.id]))
+                self.assertTrue(reader.verify(ticket.id, generate_ticket_hmac(ticket)))
+
+            ticket = self.tickets[0]
+            since = timezone.now()
+            Ticket.objects.filter(pk=ticket.pk).update(updated_at=timezone.now())
+            response = self.client.get(reverse('ticket-sync'), {'olympic_event': self.event.id, 'since': since.isoformat()})
+            self.assertEqual(
+                [t['digests'] for t in response.data['tickets'] if t['ticket_id'] == str(ticket.id)],
+                [[truncate_hmac(generate_ticket_hmac(ticket)).hex(), truncate_hmac(old_hmacs[ticket.id]).hex()]]
+            )
@@ -0,0 +1,91 @@
+import json
+import uuid
+from django.utils import timezone
+from utils.encryption import generate_ticket_hmac_candidates, verify_ticket_hmac
+from .models import Ticket
+
+SCAN_ACCEPTED = 'accepted'
+SCAN_ALREADY_USED = 'already_used'
+SCAN_REJECTED = 'rejected'
+SCAN_INVALID = 'invalid'
+SCAN_NOT_FOUND = 'not_found'
+SCAN_WRONG_EVENT = 'wrong_event'
+
+def parse_scan(scan):
+    """
+    Extracts the ticket id and HMAC from a scan.
+    A scan is either a {"ticket_id", "hmac"} object or a {"qr": ...} object holding
+    the raw QR content, itself a JSON {"id", "hmac"} object or a "ticket_id:hmac" string.
+
+    @param scan: The scan as sent by the gate device.
+    @type scan: dict
+    @return: Tuple (ticket_id, hmac), ticket_id being None if it cannot be parsed.
+    @rtype: tuple
+    """
+    if not isinstance(scan, dict):
+        return None, None
+    ticket_id, presented = scan.get('ticket_id'), scan.get('hmac')
+    qr = scan.get('qr')
+    if isinstance(qr, str):
+        try:
+            content = json.loads(qr)
+            ticket_id, presented = content.get('id'), content.get('hmac')
+        except (ValueError, AttributeError):
+            ticket_id, _, presented = qr.partition(':')
+    try:
+        return uuid.UUID(str(ticket_id).strip()), presented
+    except ValueError:
+        return None, presented
+
+def scan_tickets(scans, olympic_event_id=None):
+    """
+    Validates scanned tickets and marks the genuine ones as used.
+    Tickets are loaded with one query and their HMACs computed in one batch, under
+    every key of the HMAC keyring. Each
+    accepted ticket is flipped from 'valid' to 'used' with a single conditional
+    UPDATE, so two gates scanning the same ticket can never both accept it.
+    When the gate event is given, tickets of other events are refused. Nothing is
+    told about a ticket before its HMAC is verified.
+
+    @param scans: List of scans (see parse_scan).
+    @type scans: list
+    @param olympic_event_id: Primary key of the event the gate is controlling, if known.
+    @type olympic_event_id: int
+    @return: One result dict per scan, in the same order.
+    @rtype: list
+    """
+    parsed = [parse_scan(scan) for scan in scans]
+    ids = {ticket_id for ticket_id, _ in parsed if ticket_id is not None}
+    tickets = list(Ticket.objects.filter(pk__in=ids).select_related('user'))
+    expected_hmacs = dict(zip((t.id for t in tickets), generate_ticket_hmac_candidates(tickets)))
+    tickets = {ticket.id: ticket for ticket in tickets}
+
+    results = []
+    for ticket_id, presented in parsed:
+        result = {'ticket_id': str(ticket_id) if ticket_id else None}
+        ticket = tickets.get(ticket_id)
+        if ticket_id is None:
+            result['result'] = SCAN_INVALID
+        elif ticket is None:
+            result['result'] = SCAN_NOT_FOUND
+        elif not any(verify_ticket_hmac(expected, presented) for expected in expected_hmacs[ticket_id]):
+            result['result'] = SCAN_INVALID
+        elif olympic_event_id is not None and ticket.olympic_event_id != olympic_event_id:
+            result['result'] = SCAN_WRONG_EVENT
+        else:
+            now = timezone.now()
+            updated = Ticket.objects.filter(pk=ticket_id, status='valid').update(
+                status='used', used_at=now, updated_at=now
+            )
+            if updated:
+                ticket.status, ticket.used_at = 'used', now
+                result.update(result=SCAN_ACCEPTED, used_at=now, nb_place=ticket.nb_place)
+            elif ticket.status in ('valid', 'used'):
+                # Either used before this request or by a concurrent scan
+                if ticket.status == 'valid':
+                    ticket.refresh_from_db(fields=['status', 'used_at'])
+                result.update(result=SCAN_ALREADY_USED, used_at=ticket.used_at)
+            else:
+                result.update(result=SCAN_REJECTED, status=ticket.status)
+        results.append(result)
+    return results
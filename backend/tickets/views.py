@@ -1,20 +1,61 @@
-from rest_framework import viewsets, permissions
+import uuid
+from datetime import timedelta
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from .models import Ticket
+from django.conf import settings
 from .serializers import TicketListSerializer
-from utils.encryption import generate_ticket_hmac
+from .utils import scan_tickets
+from .bundle import iter_bundle, truncate_hmac
+from olympic_events.models import OlympicEvent
+from utils.sparse_fields import eager_load_sparse
+from utils.pagination import StaffCursorPagination
+from utils.streaming import stream_json_list
+from utils.encryption import generate_ticket_hmac, generate_ticket_hmac_candidates, generate_ticket_hmacs
 
 class TicketViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Ticket wallet of the authenticated user; staff users see every ticket.
+    Lists are ordered newest first, with keyset pagination enabled by the `cursor`
+    or `page_size` query parameters, and always enabled for staff users.
+    """
     queryset = Ticket.objects.all()
     serializer_class = TicketListSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = StaffCursorPagination
+    stream_chunk_size = 1000
 
     def get_queryset(self):
         user = self.request.user
-        if user.is_staff:
-            return Ticket.objects.all()
-        return Ticket.objects.filter(user=user)
+        queryset = Ticket.objects.all() if user.is_staff else Ticket.objects.filter(user=user)
+        if self.action in ('list', 'retrieve'):
+            queryset = eager_load_sparse(queryset.order_by('-created_at', '-id'), self)
+        elif self.action == 'qr':
+            queryset = queryset.select_related('user')
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        """
+        List tickets. Staff users can pass `stream=1` to receive every ticket as a
+        streamed JSON array, read and rendered by chunks instead of paginated.
+        @param request: The request object.
+        @return: Response with the tickets, a page of tickets, or a streaming response.
+        """
+        if request.user.is_staff and request.query_params.get('stream') in ('1', 'true'):
+            return StreamingHttpResponse(
+                stream_json_list(
+                    self.filter_queryset(self.get_queryset()),
+                    self.get_serializer_class(),
+                    chunk_size=self.stream_chunk_size,
+                    context=self.get_serializer_context(),
+                ),
+                content_type='application/json',
+            )
+        return super().list(request, *args, **kwargs)
 
     @action(detail=True, methods=['get'], url_path='qr')
     def qr(self, request, pk=None):
@@ -27,3 +68,140 @@ class TicketViewSet(viewsets.ReadOnlyModelViewSet):
             "ticket_id": str(ticket.id),
             "hmac": hmac_val
         })
+
+    @action(detail=False, methods=['get', 'post'], url_path='qr-batch')
+    def qr_batch(self, request):
+        """
+        Return the QR payloads of several tickets in one round trip.
+        Without ids, every ticket of the caller is returned. Ids can be given
+        as a comma-separated `ids` query parameter or as an `ids` list in the body.
+        @param request: The request object.
+        @return: Response with a list of {ticket_id, hmac} objects.
+        """
+        if request.method == 'POST':
+            ids = request.data.get('ids')
+        else:
+            ids = request.query_params.get('ids')
+            ids = ids.split(',') if ids else None
+
+        if ids is None:
+            queryset = Ticket.objects.filter(user=request.user)
+        else:
+            if not isinstance(ids, list):
+                return Response({'detail': "Liste d'identifiants invalide."}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                ids = [uuid.UUID(str(ticket_id).strip()) for ticket_id in ids]
+            except ValueError:
+                return Response({'detail': "Identifiant de billet invalide."}, status=status.HTTP_400_BAD_REQUEST)
+            queryset = self.get_queryset().filter(pk__in=ids)
+
+        tickets = list(queryset.select_related('user').order_by('created_at', 'id'))
+        return Response([
+            {"ticket_id": str(ticket.id), "hmac": hmac_val}
+            for ticket, hmac_val in zip(tickets, generate_ticket_hmacs(tickets))
+        ])
+
+    @action(detail=False, methods=['post'], url_path='scan', permission_classes=[permissions.IsAdminUser])
+    def scan(self, request):
+        """
+        Validate tickets scanned at a venue gate (staff only).
+        Accepts a single scan ({"ticket_id", "hmac"} or {"qr"}) or a batch
+        {"scans": [...]} sent by a gate device. Gates should also send the
+        `olympic_event` they control, so that tickets of other events are refused;
+        an unknown event is refused.
+        @param request: The request object.
+        @return: Response with the scan result, or the list of results for a batch.
+        """
+        olympic_event_id = request.data.get('olympic_event')
+        if olympic_event_id is not None:
+            try:
+                olympic_event_id = int(olympic_event_id)
+            except (TypeError, ValueError):
+                return Response({'detail': "Épreuve invalide."}, status=status.HTTP_400_BAD_REQUEST)
+            if not OlympicEvent.objects.filter(pk=olympic_event_id).exists():
+                return Response({'detail': "Épreuve introuvable."}, status=status.HTTP_404_NOT_FOUND)
+        scans = request.data.get('scans')
+        if scans is None:
+            return Response(scan_tickets([request.data], olympic_event_id)[0])
+        if not isinstance(scans, list):
+            return Response({'detail': "Liste de scans invalide."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(scans) > settings.TICKET_SCAN_MAX_BATCH_SIZE:
+            return Response(
+                {'detail': f"Trop de scans (maximum {settings.TICKET_SCAN_MAX_BATCH_SIZE})."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(scan_tickets(scans, olympic_event_id))
+
+    def _get_olympic_event_id(self, request):
+        """Read and check the mandatory `olympic_event` query parameter."""
+        try:
+            event_id = int(request.query_params.get('olympic_event', ''))
+        except ValueError:
+            return None
+        return event_id if OlympicEvent.objects.filter(pk=event_id).exists() else None
+
+    def _get_watermark(self):
+        """Watermark of a bundle or delta, moved back by TICKET_SYNC_OVERLAP seconds."""
+        return timezone.now() - timedelta(seconds=settings.TICKET_SYNC_OVERLAP)
+
+    @action(detail=False, methods=['get'], url_path='bundle', permission_classes=[permissions.IsAdminUser])
+    def bundle(self, request):
+        """
+        Download the offline validation bundle of an event (staff only).
+        The watermark to pass to the sync endpoint is sent in the X-Bundle-Watermark header.
+        @param request: The request object, with the `olympic_event` query parameter.
+        @return: Streaming binary response (see tickets.bundle for the format).
+        """
+        event_id = self._get_olympic_event_id(request)
+        if event_id is None:
+            return Response({'detail': "Épreuve introuvable."}, status=status.HTTP_404_NOT_FOUND)
+        watermark = self._get_watermark()
+        response = StreamingHttpResponse(iter_bundle(event_id), content_type='application/octet-stream')
+        response['Content-Disposition'] = f'attachment; filename="bundle-event-{event_id}.bin"'
+        response['X-Bundle-Watermark'] = watermark.isoformat()
+        return response
+
+    @action(detail=False, methods=['get'], url_path='sync', permission_classes=[permissions.IsAdminUser])
+    def sync(self, request):
+        """
+        Return the tickets of an event changed since a watermark (staff only).
+        Used, cancelled and deleted tickets (status 'deleted') must be blocked by
+        offline scanners; tickets issued after the bundle export come with their
+        truncated HMACs (hex) under every HMAC key, current key first, as in the
+        bundle records. Successive deltas overlap by TICKET_SYNC_OVERLAP
+        seconds: scanners apply them idempotently.
+        @param request: The request object, with `olympic_event` and `since` (ISO 8601) query parameters.
+        @return: Response with the new watermark and the changed tickets.
+        """
+        event_id = self._get_olympic_event_id(request)
+        if event_id is None:
+            return Response({'detail': "Épreuve introuvable."}, status=status.HTTP_404_NOT_FOUND)
+        since = parse_datetime(request.query_params.get('since', '').replace(' ', '+'))
+        if since is None:
+            return Response({'detail': "Paramètre since invalide."}, status=status.HTTP_400_BAD_REQUEST)
+
+        watermark = self._get_watermark()
+        # Deleted tickets may already be in a bundle: they are sent to be blocked
+        tickets = list(
+            Ticket.all_objects
+            .filter(olympic_event_id=event_id, updated_at__gte=since)
+            .select_related('user')
+            .order_by('updated_at', 'id')
+        )
+        new_tickets = [ticket for ticket in tickets if ticket.status == 'valid' and ticket.deleted_at is None]
+        digests = {
+            ticket.id: [truncate_hmac(hmac_val).hex() for hmac_val in candidates]
+            for ticket, candidates in zip(new_tickets, generate_ticket_hmac_candidates(new_tickets))
+        }
+        return Response({
+            "watermark": watermark.isoformat(),
+            "tickets": [
+                {
+                    "ticket_id": str(ticket.id),
+                    "status": 'deleted' if ticket.deleted_at else ticket.status,
+                    "used_at": ticket.used_at,
+                    "digests": digests.get(ticket.id),
+                }
+                for ticket in tickets
+            ],
+        })
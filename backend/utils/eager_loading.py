@@ -0,0 +1,98 @@
+"""
+Eager-loading plans derived from serializers.
+
+A nested serializer, a related field or a dotted `source` walking a foreign key
+reads related rows; left to Django, each of them costs one query per serialized
+object. The plan of a serializer lists the relations to join (select_related) and
+the ones to fetch in one extra query each (prefetch_related), so that serializing
+a list runs a constant number of queries whatever its length.
+"""
+from functools import lru_cache
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField
+
+def _relations(model, source_attrs):
+    """
+    Follow the attributes of a source on a model for as long as they are relations.
+    @return: List of (name, field) of the relations walked.
+    """
+    path = []
+    for attr in source_attrs:
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            break
+        if not field.is_relation:
+            break
+        path.append((attr, field))
+        model = field.related_model
+    return path
+
+def _collect(serializer, model, prefix, select, prefetch):
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            continue
+        path = _relations(model, field.source_attrs)
+        if not path:
+            continue
+        lookup = prefix + '__'.join(name for name, _ in path)
+        related_model = path[-1][1].related_model
+        to_many = any(rel.many_to_many or rel.one_to_many for _, rel in path)
+
+        if isinstance(field, serializers.ListSerializer):
+            prefetch.append((lookup, related_model, build_plan(field.child, related_model)))
+        elif to_many or isinstance(field, ManyRelatedField):
+            prefetch.append((lookup, related_model, None))
+        elif isinstance(field, serializers.BaseSerializer):
+            select.add(lookup)
+            _collect(field, related_model, lookup + '__', select, prefetch)
+        elif isinstance(field, PrimaryKeyRelatedField) and len(path) == 1:
+            continue  # Served by the foreign key column
+        else:
+            select.add(lookup)
+
+def build_plan(serializer, model=None):
+    """
+    Derive the eager-loading plan of a serializer instance.
+
+    @param serializer: The serializer instance.
+    @param model: Model serialized, defaults to the serializer Meta.model.
+    @return: (select_related paths, prefetches) where each prefetch is a
+        (lookup, related model, plan of the nested serializer or None) tuple.
+    """
+    select, prefetch = set(), []
+    _collect(serializer, model or serializer.Meta.model, '', select, prefetch)
+    return tuple(sorted(select)), tuple(prefetch)
+
+@lru_cache(maxsize=None)
+def get_eager_loading_plan(serializer_class):
+    """
+    Eager-loading plan of a serializer class, computed once per class.
+    """
+    return build_plan(serializer_class())
+
+def apply_plan(queryset, plan):
+    """
+    Apply an eager-loading plan to a queryset. Prefetch objects are built on every
+    call, a nested plan becoming the queryset of its Prefetch.
+    """
+    select, prefetch = plan
+    if select:
+        queryset = queryset.select_related(*select)
+    lookups = [
+        Prefetch(lookup, queryset=apply_plan(model._default_manager.all(), nested)) if nested else lookup
+        for lookup, model, nested in prefetch
+    ]
+    return queryset.prefetch_related(*lookups) if lookups else queryset
+
+def eager_load(queryset, serializer_class):
+    """
+    Load with a queryset everything its serializer reads from related rows.
+
+    @param queryset: Queryset of the serializer model.
+    @param serializer_class: Serializer class used to render the queryset.
+    @return: The queryset with its select_related and prefetch_related set.
+    """
+    return apply_plan(queryset, get_eager_loading_plan(serializer_class))
@@ -1,33 +1,177 @@
 import os
+import re
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 import secrets
 import base64
 import hmac
 import hashlib
 
-# The AES-GCM encryption key for user/ticket secure key generation must be set as 
-# environment variable TICKET_ENCRYPTION_KEY (base64-encoded 32 bytes).
-TICKET_ENCRYPTION_KEY = os.getenv("TICKET_ENCRYPTION_KEY")
-if TICKET_ENCRYPTION_KEY is None:
+NONCE_SIZE = 12  # AES-GCM nonce is 12 bytes
+
+LEGACY_KEY_ID = ''
+"""Id of the key set by TICKET_ENCRYPTION_KEY / TICKET_HMAC_KEY; its blobs carry no prefix."""
+
+KEY_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]+$')
+
+
+def parse_keyring(value: str) -> dict[str, bytes]:
+    """
+    Parses a keyring environment variable.
+    Args:
+        value (str): Comma-separated `<key id>:<base64 key>` entries.
+    Returns:
+        dict[str, bytes]: The raw keys by key id.
+    """
+    keys = {}
+    for entry in filter(None, (part.strip() for part in value.split(','))):
+        key_id, _, key_b64 = entry.partition(':')
+        if not KEY_ID_PATTERN.match(key_id) or not key_b64:
+            raise RuntimeError(f"Invalid keyring entry for key id {key_id!r} (expected <key id>:<base64 key>)")
+        keys[key_id] = base64.b64decode(key_b64)
+    return keys
+
+
+def load_keys(legacy_var: str, keyring_var: str, key_id_var: str) -> tuple[dict[str, bytes], str]:
+    """
+    Loads the keys of a keyring from the environment.
+    The legacy single key variable, when set, is the key with id LEGACY_KEY_ID.
+    Returns:
+        tuple: (raw keys by key id, id of the current key).
+    """
+    keys = parse_keyring(os.getenv(keyring_var, ''))
+    if os.getenv(legacy_var):
+        keys[LEGACY_KEY_ID] = base64.b64decode(os.getenv(legacy_var))
+    current_id = os.getenv(key_id_var, LEGACY_KEY_ID)
+    if keys and current_id not in keys:
+        raise RuntimeError(f"{key_id_var} {current_id!r} is not in {keyring_var}")
+    return keys, current_id
+
+
+class Keyring:
+    """
+    Versioned AES-GCM keys used for user and ticket keys.
+
+    New blobs are encrypted with the current key and prefixed with its id
+    (`<key id>:<base64 nonce + ciphertext + tag>`); blobs of every key of the ring
+    decrypt, unprefixed ones with the legacy key. Rotating a key is adding it to
+    the ring, making it current, re-encrypting the stored blobs (see the
+    reencrypt_keys command) and only then removing the old key.
+    """
+
+    def __init__(self, keys: dict[str, bytes], current_id: str):
+        # Key material is decoded and the ciphers are built once, then shared by every call.
+        self.ciphers = {key_id: AESGCM(key) for key_id, key in keys.items()}
+        self.current_id = current_id
+        self.prefix = f"{current_id}:" if current_id != LEGACY_KEY_ID else ''
+
+    def encrypt(self, raw_keys: list[bytes], nonces: bytes = None) -> list[str]:
+        """
+        Encrypts raw keys with the current key.
+        Args:
+            raw_keys (list[bytes]): Keys to encrypt.
+            nonces (bytes): NONCE_SIZE random bytes per key, drawn here if not given.
+        Returns:
+            list[str]: The prefixed base64 blobs, in the same order.
+        """
+        if nonces is None:
+            nonces = secrets.token_bytes(len(raw_keys) * NONCE_SIZE)
+        encrypt = self.ciphers[self.current_id].encrypt
+        b64encode = base64.b64encode
+        prefix = self.prefix
+        encrypted_keys = []
+        for offset, raw_key in zip(range(0, len(nonces), NONCE_SIZE), raw_keys):
+            nonce = nonces[offset:offset + NONCE_SIZE]
+            encrypted_keys.append(prefix + b64encode(nonce + encrypt(nonce, raw_key, None)).decode('utf-8'))
+        return encrypted_keys
+
+    def decrypt(self, encrypted_keys: list[str]) -> list[bytes]:
+        """
+        Decrypts blobs of any key of the ring.
+        Raises:
+            KeyError: If a blob was encrypted with a key missing from the ring.
+        """
+        ciphers = self.ciphers
+        b64decode = base64.b64decode
+        raw_keys = []
+        for encrypted_key in encrypted_keys:
+            key_id, _, encrypted_b64 = encrypted_key.rpartition(':')
+            encrypted = b64decode(encrypted_b64)
+            raw_keys.append(ciphers[key_id].decrypt(encrypted[:NONCE_SIZE], encrypted[NONCE_SIZE:], None))
+        return raw_keys
+
+    def is_current(self, encrypted_key: str) -> bool:
+        """
+        Tells whether a blob is encrypted with the current key.
+        """
+        if self.prefix:
+            return encrypted_key.startswith(self.prefix)
+        return ':' not in encrypted_key
+
+
+# The AES-GCM keys for user/ticket secure key generation are set as environment
+# variables (base64-encoded 32 bytes): TICKET_ENCRYPTION_KEY for the legacy key,
+# TICKET_ENCRYPTION_KEYS (`<key id>:<base64 key>,...`) for versioned keys, and
+# TICKET_ENCRYPTION_KEY_ID for the id of the key encrypting new blobs.
+encryption_keys, encryption_key_id = load_keys(
+    "TICKET_ENCRYPTION_KEY", "TICKET_ENCRYPTION_KEYS", "TICKET_ENCRYPTION_KEY_ID"
+)
+if not encryption_keys:
     raise RuntimeError("TICKET_ENCRYPTION_KEY environment variable not set")
+keyring = Keyring(encryption_keys, encryption_key_id)
+key_bytes = encryption_keys.get(LEGACY_KEY_ID)
+
+# HMAC keys follow the same scheme: TICKET_HMAC_KEY, TICKET_HMAC_KEYS and
+# TICKET_HMAC_KEY_ID. Ticket HMACs are computed with the current key and
+# verified against every key of the ring.
+hmac_secrets, hmac_key_id = load_keys("TICKET_HMAC_KEY", "TICKET_HMAC_KEYS", "TICKET_HMAC_KEY_ID")
+hmac_secret = hmac_secrets.get(hmac_key_id)
+
+
+def encrypt_many(n: int, length: int = 32) -> list[str]:
+    """
+    Generates n random keys and encrypts each of them using AES-GCM with the current key.
+    The random material for all keys and nonces is drawn in a single call.
+    Args:
+        n (int): Number of keys to generate.
+        length (int): Size in bytes of each raw key.
+    Returns:
+        list[str]: Key id prefixed base64 strings containing nonce + ciphertext + tag.
+    """
+    random_bytes = secrets.token_bytes(n * (NONCE_SIZE + length))
+    raw_keys = [random_bytes[offset:offset + length] for offset in range(n * NONCE_SIZE, len(random_bytes), length)]
+    return keyring.encrypt(raw_keys, nonces=random_bytes[:n * NONCE_SIZE])
+
+
+def decrypt_many(encrypted_keys_b64: list[str]) -> list[bytes]:
+    """
+    Decrypts keys previously encrypted with encrypt_many() or generate_and_encrypt_key(),
+    with any key of the keyring.
+    Args:
+        encrypted_keys_b64 (list[str]): Base64 strings containing nonce + ciphertext + tag.
+    Returns:
+        list[bytes]: The original random keys (raw bytes), in the same order.
+    """
+    return keyring.decrypt(encrypted_keys_b64)
 
-TICKET_HMAC_KEY = os.getenv("TICKET_HMAC_KEY")
 
-# Convert from base64 (if you stock it in base64 for easy env management)
-key_bytes = base64.b64decode(TICKET_ENCRYPTION_KEY)
+def reencrypt_many(encrypted_keys_b64: list[str]) -> list[str]:
+    """
+    Re-encrypts blobs with the current key, the raw keys being unchanged.
+    Args:
+        encrypted_keys_b64 (list[str]): Blobs of any key of the keyring.
+    Returns:
+        list[str]: The blobs encrypted with the current key, in the same order.
+    """
+    return keyring.encrypt(keyring.decrypt(encrypted_keys_b64))
+
 
 def generate_and_encrypt_key(length: int = 32) -> str:
     """
     Generates a random key and encrypts it using AES-GCM.
-    The encryption key is loaded from environment variable TICKET_ENCRYPTION_KEY.
-    Returns a base64-encoded string containing nonce + ciphertext + tag.
+    The current key of the keyring is used.
+    Returns a key id prefixed base64 string containing nonce + ciphertext + tag.
     """
-    raw_key = secrets.token_bytes(length)
-    aesgcm = AESGCM(key_bytes)
-    nonce = secrets.token_bytes(12)
-    ciphertext = aesgcm.encrypt(nonce, raw_key, None)
-    encrypted = nonce + ciphertext
-    return base64.b64encode(encrypted).decode('utf-8')
+    return encrypt_many(1, length)[0]
 
 
 def decrypt_key(encrypted_key_b64: str) -> bytes:
@@ -38,24 +182,81 @@ def decrypt_key(encrypted_key_b64: str) -> bytes:
     Returns:
         bytes: The original random key (raw bytes).
     """
-    encrypted = base64.b64decode(encrypted_key_b64)
-    nonce = encrypted[:12]  # AES-GCM nonce is 12 bytes
-    ciphertext = encrypted[12:]
-    aesgcm = AESGCM(key_bytes)
-    raw_key = aesgcm.decrypt(nonce, ciphertext, None)
-    return raw_key
+    return decrypt_many([encrypted_key_b64])[0]
 
 
-def generate_ticket_hmac(ticket):
+def compute_ticket_hmac(ticket_id, user_key: bytes, ticket_key: bytes, secret: bytes = None) -> str:
     """
-    Calculate HMAC for a ticket using its ID, user key, and ticket key.
+    Calculate HMAC for a ticket from its ID and its already decrypted keys,
+    with the current HMAC key unless another one is given.
     """
-    if TICKET_HMAC_KEY is None:
+    secret = secret or hmac_secret
+    if secret is None:
         raise RuntimeError("TICKET_HMAC_KEY environment variable not set")
-    secret = base64.b64decode(TICKET_HMAC_KEY)
-    ticket_id = str(ticket.id)
-    user_key = decrypt_key(ticket.user.user_key)
-    ticket_key = decrypt_key(ticket.ticket_key)
     payload = f"{ticket_id}:{user_key}:{ticket_key}"
-    h = hmac.new(secret, payload.encode(), hashlib.sha256)
-    return h.hexdigest()
+    return hmac.new(secret, payload.encode(), hashlib.sha256).hexdigest()
+
+
+def verify_ticket_hmac(expected: str, presented: str) -> bool:
+    """
+    Compare a presented ticket HMAC with the expected one in constant time.
+    """
+    if not isinstance(presented, str):
+        return False
+    return hmac.compare_digest(expected.encode(), presented.strip().lower().encode())
+
+
+def generate_ticket_hmac(ticket):
+    """
+    Calculate HMAC for a ticket using its ID, user key, and ticket key.
+    """
+    user_key, ticket_key = decrypt_many([ticket.user.user_key, ticket.ticket_key])
+    return compute_ticket_hmac(ticket.id, user_key, ticket_key)
+
+
+def _decrypt_ticket_keys(tickets) -> list[tuple[bytes, bytes]]:
+    """
+    Decrypt the (user key, ticket key) pairs of tickets in a single batch,
+    each distinct user key being decrypted only once.
+    """
+    user_keys = {}
+    for ticket in tickets:
+        user_keys.setdefault(ticket.user_id, ticket.user.user_key)
+    user_ids = list(user_keys)
+    raw_keys = decrypt_many([user_keys[user_id] for user_id in user_ids] + [t.ticket_key for t in tickets])
+    raw_user_keys = dict(zip(user_ids, raw_keys))
+    return [(raw_user_keys[ticket.user_id], ticket_key) for ticket, ticket_key in zip(tickets, raw_keys[len(user_ids):])]
+
+
+def generate_ticket_hmacs(tickets) -> list[str]:
+    """
+    Calculate the HMAC of several tickets in one pass.
+    Each distinct user key is decrypted only once and all keys are decrypted
+    in a single batch. Tickets must have their user loaded.
+    Returns the HMACs in the same order as the tickets.
+    """
+    return [
+        compute_ticket_hmac(ticket.id, user_key, ticket_key)
+        for ticket, (user_key, ticket_key) in zip(tickets, _decrypt_ticket_keys(tickets))
+    ]
+
+
+def hmac_secrets_in_order() -> list[bytes]:
+    """
+    The keys of the HMAC keyring, the current key first.
+    """
+    return [hmac_secret] + [secret for key_id, secret in hmac_secrets.items() if key_id != hmac_key_id]
+
+
+def generate_ticket_hmac_candidates(tickets) -> list[tuple[str, ...]]:
+    """
+    Calculate the HMACs of several tickets under every key of the HMAC keyring,
+    the current key first, so that QR codes issued before a rotation still verify.
+    Tickets must have their user loaded.
+    Returns one tuple of HMACs per ticket, in the same order as the tickets.
+    """
+    secrets_in_order = hmac_secrets_in_order()
+    return [
+        tuple(compute_ticket_hmac(ticket.id, user_key, ticket_key, secret) for secret in secrets_in_order)
+        for ticket, (user_key, ticket_key) in zip(tickets, _decrypt_ticket_keys(tickets))
+    ]
@@ -0,0 +1,111 @@
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework.renderers import JSONRenderer
+
+# Catalog responses are cached per namespace under a version number. Bumping the
+# version (on every save/delete of a catalog model) makes all cached bodies of the
+# namespace unreachable at once, without having to know their keys.
+# The version is a Unix time in whole seconds, bumped with atomic increments: it
+# grows by at least one on every invalidation, so it can serve as Last-Modified
+# even for several invalidations within the same second.
+
+def _version_key(namespace: str) -> str:
+    return f"catalog:{namespace}:version"
+
+
+def get_catalog_version(namespace: str) -> int:
+    """
+    Return the current version of a catalog namespace.
+    The version is the time of the last invalidation (seconds), also used as Last-Modified.
+    """
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        version = int(time.time())
+        if not cache.add(_version_key(namespace), version, None):
+            version = cache.get(_version_key(namespace), version)
+    return version
+
+
+def invalidate_catalog(namespace: str) -> None:
+    """
+    Invalidate every cached response of a catalog namespace.
+    The version is incremented by one, then caught up with the current time if it
+    lags behind, both with atomic increments.
+    """
+    key = _version_key(namespace)
+    try:
+        version = cache.incr(key)
+    except ValueError:
+        # Version evicted: start again from the current time
+        if cache.add(key, int(time.time()) + 1, None):
+            return
+        version = cache.incr(key)
+    lag = int(time.time()) - version
+    if lag > 0:
+        cache.incr(key, lag)
+
+
+def invalidate_catalog_on_change(namespace: str):
+    """
+    Build a post_save/post_delete signal receiver invalidating a catalog namespace.
+    The namespace is invalidated right away and again once the transaction commits,
+    so a response rendered from not yet committed data cannot stay cached.
+    """
+    def receiver(sender, **kwargs):
+        invalidate_catalog(namespace)
+        transaction.on_commit(lambda: invalidate_catalog(namespace))
+    return receiver
+
+
+class CachedCatalogMixin:
+    """
+    Serve GET responses of public catalog views from a pre-rendered JSON body.
+
+    The rendered body is stored in Django's cache under the namespace version and
+    the absolute URL, paginated bodies linking to their pages with absolute URLs.
+    Responses carry a strong ETag, Last-Modified and a public Cache-Control for
+    the CDN, and conditional requests get a 304.
+    Without CATALOG_CACHE_ENABLED (no shared cache), the view is served as is.
+    """
+    cache_namespace = None
+
+    def get(self, request, *args, **kwargs):
+        if not settings.CATALOG_CACHE_ENABLED:
+            return super().get(request, *args, **kwargs)
+        version = get_catalog_version(self.cache_namespace)
+        query = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+        key = f"catalog:{self.cache_namespace}:{version}:{query}"
+
+        entry = cache.get(key)
+        if entry is None:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            body = JSONRenderer().render(response.data)
+            entry = {
+                'body': body,
+                'etag': '"%s"' % hashlib.sha256(body).hexdigest()[:32],
+                'last_modified': version,
+            }
+            cache.set(key, entry, settings.CATALOG_CACHE_TIMEOUT)
+
+        response = get_conditional_response(
+            request, etag=entry['etag'], last_modified=entry['last_modified']
+        )
+        if response is None:
+            response = HttpResponse(entry['body'], content_type='application/json')
+        response['ETag'] = entry['etag']
+        response['Last-Modified'] = http_date(entry['last_modified'])
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=settings.CATALOG_CACHE_MAX_AGE,
+            s_maxage=settings.CATALOG_CACHE_S_MAXAGE,
+        )
+        return response
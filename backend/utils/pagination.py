@@ -0,0 +1,37 @@
+from rest_framework.pagination import CursorPagination
+
+class OptionalCursorPagination(CursorPagination):
+    """
+    Keyset (cursor) pagination enabled on demand.
+
+    Requests sending a `cursor` or `page_size` query parameter get a page of
+    results wrapped in {"next", "previous", "results"}; other requests keep
+    receiving the plain list, so existing clients are not broken.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+    def is_requested(self, request):
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+class CreatedAtCursorPagination(OptionalCursorPagination):
+    """
+    Optional keyset pagination of user histories, newest first.
+    The id breaks ties between rows created at the same instant.
+    """
+    ordering = ('-created_at', '-id')
+
+class StaffCursorPagination(CreatedAtCursorPagination):
+    """
+    Same as CreatedAtCursorPagination, but always enabled for staff users,
+    whose listings span every row of the system.
+    """
+    def is_requested(self, request):
+        return request.user.is_staff or super().is_requested(request)
@@ -0,0 +1,51 @@
+"""
+Managers of the soft-deletable models.
+
+Order, OrderItem, Ticket and CustomUser are never removed: delete() stamps their
+`deleted_at` column. Their default manager (`objects`) only sees the live rows,
+so views, reverse relations and commands leave deleted rows out without
+filtering on `deleted_at` themselves; `all_objects` sees every row, and the
+admin lists through it.
+Foreign keys are followed through the base manager, so a live ticket still
+reaches its order or user once they are deleted.
+"""
+from django.contrib import admin
+from django.db import models
+
+
+class SoftDeleteQuerySet(models.QuerySet):
+
+    def alive(self):
+        """Rows that are not soft-deleted."""
+        return self.filter(deleted_at__isnull=True)
+
+    def deleted(self):
+        """Soft-deleted rows."""
+        return self.filter(deleted_at__isnull=False)
+
+
+class SoftDeleteManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
+    """Default manager excluding the soft-deleted rows."""
+
+    def get_queryset(self):
+        return super().get_queryset().alive()
+
+
+class SoftDeleteAdminMixin:
+    """
+    ModelAdmin listing the soft-deleted rows too.
+
+    Reads through `all_objects` instead of the default manager, and adds a
+    `deleted_at` filter so the deleted rows can be told apart.
+    """
+    deleted_at_filter = ('deleted_at', admin.EmptyFieldListFilter)
+
+    def get_queryset(self, request):
+        queryset = self.model.all_objects.get_queryset()
+        ordering = self.get_ordering(request)
+        if ordering:
+            queryset = queryset.order_by(*ordering)
+        return queryset
+
+    def get_list_filter(self, request):
+        return (*super().get_list_filter(request), self.deleted_at_filter)
@@ -0,0 +1,105 @@
+"""
+Sparse fieldsets selected by the client.
+
+`?fields=id,amount,items.quantity` keeps only the listed fields, a dotted name
+selecting fields inside a nested serializer. A nested serializer listed by its
+bare name is rendered as primary keys, unless it is listed in `?expand=` too
+(`?fields=id,items&expand=items`). Without `fields`, the full representation
+is returned. The selection only applies to reads (safe methods): writes keep
+every field of the serializer, so that no writable field is pruned.
+"""
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+from .eager_loading import apply_plan, build_plan, eager_load
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+def _split(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+def is_selecting(request):
+    """
+    Tell whether a request selects a sparse fieldset.
+    @param request: The request, or None.
+    @return: True for a read request with a `fields` query parameter.
+    """
+    return request is not None and request.method in SAFE_METHODS and FIELDS_PARAM in request.query_params
+
+def parse_selection(query_params):
+    """
+    Read the sparse fieldset of a request.
+
+    @param query_params: The request query parameters.
+    @return: (tree, expand) where tree maps each selected field name to the tree of
+        its selected subfields (empty to keep the field whole), or (None, None)
+        when the request selects no fields.
+    """
+    if FIELDS_PARAM not in query_params:
+        return None, None
+    tree = {}
+    for path in _split(query_params[FIELDS_PARAM]):
+        node = tree
+        for name in path.split('.'):
+            node = node.setdefault(name, {})
+    return tree, set(_split(query_params.get(EXPAND_PARAM, '')))
+
+def apply_selection(fields, tree, expand, prefix=''):
+    """
+    Drop the fields of a serializer that are not selected, in place.
+    Nested serializers are pruned recursively, or collapsed to primary keys
+    when selected by their bare name without being expanded.
+
+    @param fields: The fields of the serializer, by name.
+    @param tree: Selection tree, as returned by parse_selection().
+    @param expand: Dotted names of the nested serializers to render whole.
+    @param prefix: Dotted path of the serializer, for nested serializers.
+    """
+    for name in list(fields):
+        if name not in tree:
+            del fields[name]
+            continue
+        field = fields[name]
+        nested = field.child if isinstance(field, serializers.ListSerializer) else field
+        if not isinstance(nested, serializers.BaseSerializer):
+            continue
+        path = prefix + name
+        # The selection is applied from the outermost serializer only
+        nested._sparse_selected = True
+        if tree[name]:
+            apply_selection(nested.fields, tree[name], expand, path + '.')
+        elif path not in expand:
+            fields[name] = serializers.PrimaryKeyRelatedField(
+                read_only=True,
+                many=nested is not field,
+                source=field.source,
+            )
+
+class SparseFieldsMixin:
+    """
+    Serializer mixin applying the `fields` / `expand` query parameters of the
+    request in the context. Only the outermost serializer reads the request;
+    nested serializers are pruned by it.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if getattr(self, '_sparse_selected', False):
+            return fields
+        request = self.context.get('request')
+        if is_selecting(request):
+            apply_selection(fields, *parse_selection(request.query_params))
+        return fields
+
+def eager_load_sparse(queryset, view):
+    """
+    Eager load a queryset for the serializer of a view, honouring the sparse fieldset
+    of the request: relations of fields left out are not loaded.
+
+    @param queryset: Queryset of the serializer model.
+    @param view: The view rendering the queryset.
+    @return: The queryset with its select_related and prefetch_related set.
+    """
+    if is_selecting(view.request):
+        return apply_plan(queryset, build_plan(view.get_serializer()))
+    return eager_load(queryset, view.get_serializer_class())
@@ -0,0 +1,33 @@
+from rest_framework.renderers import JSONRenderer
+
+def stream_json_list(queryset, serializer_class, chunk_size=1000, context=None):
+    """
+    Render a queryset as a JSON array, one chunk of rows at a time.
+
+    Rows are read with a server-side cursor (`iterator(chunk_size=...)`) and each
+    chunk is serialized and rendered before the next one is fetched, so memory
+    stays bounded whatever the number of rows.
+
+    @param queryset: The queryset to render.
+    @param serializer_class: Serializer class of one row.
+    @param chunk_size: Number of rows fetched and rendered at once.
+    @param context: Serializer context.
+    @return: Generator of bytes, to be used as the content of a StreamingHttpResponse.
+    """
+    renderer = JSONRenderer()
+    separator = b''
+    chunk = []
+
+    def render(rows):
+        # Render the rows as an array and drop its brackets
+        return renderer.render(serializer_class(rows, many=True, context=context).data)[1:-1]
+
+    yield b'['
+    for row in queryset.iterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield separator + render(chunk)
+            separator, chunk = b',', []
+    if chunk:
+        yield separator + render(chunk)
+    yield b']'
@@ -0,0 +1,164 @@
+import base64
+import hashlib
+import hmac
+import os
+import uuid
+from types import SimpleNamespace
+from unittest import mock
+from django.test import SimpleTestCase
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from utils import encryption
+from utils.eager_loading import get_eager_loading_plan
+from utils.encryption import (
+    encrypt_many,
+    decrypt_many,
+    generate_and_encrypt_key,
+    decrypt_key,
+    generate_ticket_hmac,
+    generate_ticket_hmac_candidates,
+    Keyring,
+    parse_keyring,
+    load_keys,
+    reencrypt_many,
+)
+
+class EncryptionTests(SimpleTestCase):
+    """
+    Tests for the batch AES-GCM helpers and the ticket HMAC.
+    """
+
+    def test_encrypt_many_round_trip(self):
+        """
+        Ensure batch-encrypted keys decrypt back to distinct keys of the requested length.
+        """
+        encrypted = encrypt_many(50, length=16)
+        self.assertEqual(len(encrypted), 50)
+        self.assertEqual(len(set(encrypted)), 50)
+        raw_keys = decrypt_many(encrypted)
+        self.assertEqual(len(set(raw_keys)), 50)
+        self.assertTrue(all(len(raw_key) == 16 for raw_key in raw_keys))
+
+    def test_single_key_helpers_are_compatible_with_batch_api(self):
+        """
+        Ensure single and batch helpers share the same blob format.
+        """
+        encrypted = generate_and_encrypt_key()
+        self.assertEqual(decrypt_many([encrypted]), [decrypt_key(encrypted)])
+        self.assertEqual(encrypt_many(0), [])
+
+    def test_decrypts_keys_encrypted_with_a_fresh_cipher(self):
+        """
+        Ensure blobs produced by a per-call AESGCM instance still decrypt.
+        """
+        nonce, raw_key = b'\x01' * 12, b'\x02' * 32
+        blob = base64.b64encode(nonce + AESGCM(encryption.key_bytes).encrypt(nonce, raw_key, None)).decode()
+        self.assertEqual(decrypt_key(blob), raw_key)
+
+    def test_ticket_hmac_matches_reference_payload(self):
+        """
+        Ensure the ticket HMAC payload format is unchanged.
+        """
+        user_key, ticket_key = encrypt_many(2)
+        ticket = SimpleNamespace(id=uuid.uuid4(), ticket_key=ticket_key, user=SimpleNamespace(user_key=user_key))
+        payload = f"{ticket.id}:{decrypt_key(user_key)}:{decrypt_key(ticket_key)}"
+        expected = hmac.new(encryption.hmac_secret, payload.encode(), hashlib.sha256).hexdigest()
+        self.assertEqual(generate_ticket_hmac(ticket), expected)
+
+
+class KeyringTests(SimpleTestCase):
+    """
+    Tests for the versioned keyring and the key rotation helpers.
+    """
+
+    def rotated_keyring(self):
+        """
+        Keyring holding the legacy key and a new current key 'k2'.
+        """
+        return Keyring({'': encryption.key_bytes, 'k2': AESGCM.generate_key(256)}, 'k2')
+
+    def test_new_blobs_carry_the_current_key_id(self):
+        """
+        Ensure blobs are prefixed with the current key id and legacy blobs still decrypt.
+        """
+        legacy_blob = generate_and_encrypt_key()
+        with mock.patch.object(encryption, 'keyring', self.rotated_keyring()):
+            blob = generate_and_encrypt_key()
+            self.assertTrue(blob.startswith('k2:'))
+            self.assertTrue(encryption.keyring.is_current(blob))
+            self.assertFalse(encryption.keyring.is_current(legacy_blob))
+            self.assertEqual(len(decrypt_many([blob, legacy_blob])[0]), 32)
+
+            rotated = reencrypt_many([legacy_blob])
+            self.assertTrue(rotated[0].startswith('k2:'))
+            self.assertEqual(decrypt_many(rotated), decrypt_many([legacy_blob]))
+
+    def test_unknown_key_id_fails(self):
+        """
+        Ensure a blob of a key missing from the ring cannot be decrypted.
+        """
+        with mock.patch.object(encryption, 'keyring', self.rotated_keyring()):
+            blob = generate_and_encrypt_key()
+        with self.assertRaises(KeyError):
+            decrypt_key(blob)
+
+    def test_keyring_configuration(self):
+        """
+        Ensure keyring variables are parsed and the current key id must be in the ring.
+        """
+        key = base64.b64encode(b'\x00' * 32).decode()
+        self.assertEqual(parse_keyring(f" k1:{key}, k2:{key} "), {'k1': b'\x00' * 32, 'k2': b'\x00' * 32})
+        with self.assertRaises(RuntimeError):
+            parse_keyring(f"bad id:{key}")
+        env = {'TEST_KEY': '', 'TEST_KEYS': f"k1:{key}", 'TEST_KEY_ID': 'k2'}
+        with mock.patch.dict(os.environ, env), self.assertRaises(RuntimeError):
+            load_keys('TEST_KEY', 'TEST_KEYS', 'TEST_KEY_ID')
+
+    def test_hmacs_of_retired_keys_still_match(self):
+        """
+        Ensure candidates hold the HMAC under the current key first, then under the older keys.
+        """
+        user_key, ticket_key = encrypt_many(2)
+        ticket = SimpleNamespace(id=uuid.uuid4(), user_id=1, ticket_key=ticket_key, user=SimpleNamespace(user_key=user_key))
+        old_hmac = generate_ticket_hmac(ticket)
+        new_secret = b'\x01' * 32
+        with mock.patch.multiple(
+            encryption,
+            hmac_secrets={'': encryption.hmac_secret, 'h2': new_secret},
+            hmac_key_id='h2',
+            hmac_secret=new_secret,
+        ):
+            new_hmac = generate_ticket_hmac(ticket)
+            self.assertEqual(generate_ticket_hmac_candidates([ticket]), [(new_hmac, old_hmac)])
+
+
+class EagerLoadingPlanTests(SimpleTestCase):
+    """
+    Tests for the eager-loading plans derived from serializer fields.
+    """
+
+    def test_dotted_sources_are_joined(self):
+        """
+        Ensure nested serializers and dotted sources walking foreign keys become select_related paths.
+        """
+        from tickets.serializers import TicketListSerializer
+        select, prefetch = get_eager_loading_plan(TicketListSerializer)
+        self.assertEqual(select, ('order_item', 'order_item__offer', 'order_item__olympic_event'))
+        self.assertEqual(prefetch, ())
+
+    def test_nested_lists_are_prefetched_with_their_own_plan(self):
+        """
+        Ensure a many=True nested serializer becomes a prefetch joining what its child reads.
+        """
+        from order.models import OrderItem
+        from order.serializers import OrderSerializer
+        select, prefetch = get_eager_loading_plan(OrderSerializer)
+        self.assertEqual(select, ('user',))
+        self.assertEqual(prefetch, (('items', OrderItem, (('offer', 'olympic_event'), ())),))
+
+    def test_primary_key_fields_need_no_join(self):
+        """
+        Ensure primary key related fields are served by the foreign key column.
+        """
+        from cart.serializers import CartItemSerializer
+        select, _ = get_eager_loading_plan(CartItemSerializer)
+        self.assertNotIn('cart', select)
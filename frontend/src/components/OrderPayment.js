@@ -1,67 +1,59 @@
-import React, { useEffect, useState, useContext } from 'react';
+import React, { useCallback, useRef, useState, useContext } from 'react';
 import { UserCartContext } from '../context/UserCartContext';
 import { useStripePayment } from '../hooks/useStripePayment';
 import { CardElement } from '@stripe/react-stripe-js';
 import { useStripeSubmit } from '../hooks/useStripeSubmit';
-import LoadingSpinner from './LoadingSpinner.js';
 
 export default function OrderPayment({ onPaymentSuccess }) {
   const { totalCart, handleCheckout } = useContext(UserCartContext);
   const { createPaymentIntent } = useStripePayment();
-  const [clientSecret, setClientSecret] = useState(null);
+  const [order, setOrder] = useState(null);
+  const pending = useRef({ order: null, clientSecret: null });
   const [error, setError] = useState('');
   const [loading, setLoading] = useState(false);
   const [isCardComplete, setIsCardComplete] = useState(false);
 
-  // Crée un PaymentIntent au montage
-  useEffect(() => {
-    async function fetchIntent() {
+  // La commande n'est validée (checkout) qu'au clic sur « Payer » ; après un
+  // paiement refusé, la même commande et le même PaymentIntent sont réutilisés
+  const prepareOrder = useCallback(async () => {
+    if (!pending.current.order) {
+      const newOrder = await handleCheckout();
+      if (!newOrder) throw new Error('Impossible de valider la commande.');
+      pending.current.order = newOrder;
+      setOrder(newOrder);
+    }
+    if (!pending.current.clientSecret) {
       try {
-        setLoading(true);
-        const { clientSecret } = await createPaymentIntent(totalCart, 'eur');
-        setClientSecret(clientSecret);
+        const { clientSecret } = await createPaymentIntent(pending.current.order.id);
+        pending.current.clientSecret = clientSecret;
       } catch (err) {
-        setError('Impossible d’initialiser le paiement Stripe.');
-      } finally {
-        setLoading(false);
+        throw new Error('Impossible d’initialiser le paiement Stripe.');
       }
     }
-    if (totalCart > 0) fetchIntent();
-  }, [createPaymentIntent, totalCart]);
+    return pending.current.clientSecret;
+  }, [handleCheckout, createPaymentIntent]);
 
-  const onSuccess = async (paymentIntent) => {
-    setLoading(true);
-    try {
-      // Valider la commande backend (checkout)
-      const order = await handleCheckout();
-      onPaymentSuccess(order);
-    } catch (err) {
-      setError(
-        "Le paiement a réussi mais l'enregistrement de la commande a échoué."
-      );
-    } finally {
+  // La commande est marquée payée par le webhook Stripe
+  const onSuccess = useCallback(
+    async () => {
       setLoading(false);
-    }
-  };
-
-  const onError = (err) => setError(err.message || String(err));
+      onPaymentSuccess(pending.current.order);
+    },
+    [onPaymentSuccess]
+  );
 
-  const handleSubmit = useStripeSubmit(clientSecret, onSuccess, onError);
+  const onError = useCallback((err) => {
+    setLoading(false);
+    setError(err.message || String(err));
+  }, []);
 
-  if (loading) return <LoadingSpinner />;
-  if (error)
-    return (
-      <div className='error-container' data-testid='error'>
-        <div className='error-message'>{error}</div>
-      </div>
-    );
+  const submitPayment = useStripeSubmit(prepareOrder, onSuccess, onError);
 
-  if (!clientSecret)
-    return (
-      <div>
-        Préparation du paiement… <LoadingSpinner />
-      </div>
-    );
+  const handleSubmit = (e) => {
+    setLoading(true);
+    setError('');
+    return submitPayment(e);
+  };
 
   return (
     <form className='card-form' onSubmit={handleSubmit}>
@@ -94,12 +86,17 @@ export default function OrderPayment({ onPaymentSuccess }) {
           else setError('');
         }}
       />
+      {error && (
+        <div className='error-container' data-testid='error'>
+          <div className='error-message'>{error}</div>
+        </div>
+      )}
       <button
         className='button'
         type='submit'
         disabled={loading || !isCardComplete}
       >
-        Payer {totalCart}&nbsp;€
+        {loading ? 'Paiement en cours…' : <>Payer {order?.amount ?? totalCart}&nbsp;€</>}
       </button>
     </form>
   );
@@ -1,10 +1,21 @@
 import React, { useContext } from 'react';
 import { Link } from 'react-router-dom';
 import { AuthContext } from '../../context/AuthContext';
+import { UserCartContext } from '../../context/UserCartContext';
+import { GuestCartContext } from '../../context/GuestCartContext';
 import { FaShoppingBag, FaChild } from 'react-icons/fa';
 
 const NavLinks = ({ onLinkClick }) => {
   const { accessToken } = useContext(AuthContext);
+  const userCart = useContext(UserCartContext);
+  const guestCart = useContext(GuestCartContext);
+  // Seats in the cart: the user cart totals come from the cart summary endpoint
+  const cartCount = accessToken
+    ? userCart?.itemsQuantity ?? 0
+    : (guestCart?.cart ?? []).reduce(
+        (count, item) => count + item.quantity,
+        0
+      );
 
   return (
     <>
@@ -30,7 +41,9 @@ const NavLinks = ({ onLinkClick }) => {
             <span className='nav-link-icon cart'>
               <FaShoppingBag />
             </span>
-            <span className='nav-link-text'>Panier</span>
+            <span className='nav-link-text'>
+              Panier{cartCount > 0 && ` (${cartCount})`}
+            </span>
           </Link>
         </li>
         <li>
@@ -35,6 +35,7 @@ export const UserCartProvider = ({ children }) => {
    */
   const {
     getCurrentCart,
+    getCartSummary,
     getCartItems,
     addCartItem,
     updateCartItem,
@@ -60,11 +61,30 @@ export const UserCartProvider = ({ children }) => {
    */
   const [cartMeta, setCartMeta] = useState(null);
 
+  /**
+   * State to store the totals of the cart (amount, items_count, items_quantity),
+   * read from the cart summary endpoint.
+   * @type {Object|null}
+   */
+  const [summary, setSummary] = useState(null);
+
+  /**
+   * Function to reload the totals of the cart from the server.
+   */
+  const refreshSummary = useCallback(() => {
+    if (isAuthenticated) {
+      getCartSummary()
+        .then(setSummary)
+        .catch((e) => console.error('Failed to load cart summary:', e));
+    }
+  }, [isAuthenticated, getCartSummary]);
+
   /**
    * Effect to load the cart from the server when the user is authenticated.
    */
   useEffect(() => {
     if (isAuthenticated) {
+      refreshSummary();
       getCurrentCart()
         .then((meta) => {
           setCartMeta(meta);
@@ -82,6 +102,7 @@ export const UserCartProvider = ({ children }) => {
     } else {
       setCart([]);
       setCartMeta(null);
+      setSummary(null);
     }
     // eslint-disable-next-line
   }, [isAuthenticated]);
@@ -121,11 +142,12 @@ export const UserCartProvider = ({ children }) => {
           });
           setCart((prev) => [...prev, newItem]);
         }
+        refreshSummary();
       } catch (e) {
         showNotification('Échec de la modification du panier', 'error', 3000);
       }
     },
-    [cart, addCartItem, updateCartItem, showNotification]
+    [cart, addCartItem, updateCartItem, showNotification, refreshSummary]
   );
 
   /**
@@ -153,8 +175,9 @@ export const UserCartProvider = ({ children }) => {
           prev.map((i) => (i.id === found.id ? updatedItem : i))
         );
       }
+      refreshSummary();
     },
-    [cart, updateCartItem, removeCartItem]
+    [cart, updateCartItem, removeCartItem, refreshSummary]
   );
 
   /**
@@ -170,9 +193,10 @@ export const UserCartProvider = ({ children }) => {
       if (found) {
         await removeCartItem(found.id);
         setCart((prev) => prev.filter((i) => i.id !== found.id));
+        refreshSummary();
       }
     },
-    [cart, removeCartItem]
+    [cart, removeCartItem, refreshSummary]
   );
 
   /**
@@ -183,14 +207,16 @@ export const UserCartProvider = ({ children }) => {
   }, []);
 
   /**
-   * Memoized total price of the cart.
+   * Memoized total price of the cart, as computed by the server.
    * @type {number}
    */
-  const totalCart = useMemo(
-    () =>
-      cart.reduce((total, item) => total + item.offer.price * item.quantity, 0),
-    [cart]
-  );
+  const totalCart = useMemo(() => Number(summary?.amount ?? 0), [summary]);
+
+  /**
+   * Number of seats in the cart, shown by the header badge.
+   * @type {number}
+   */
+  const itemsQuantity = summary?.items_quantity ?? 0;
 
   /**
    * Function to handle the checkout process.
@@ -215,6 +241,7 @@ export const UserCartProvider = ({ children }) => {
    */
   const refreshCart = useCallback(() => {
     if (isAuthenticated) {
+      refreshSummary();
       getCurrentCart()
         .then((meta) => {
           setCartMeta(meta);
@@ -230,7 +257,13 @@ export const UserCartProvider = ({ children }) => {
           );
         });
     }
-  }, [isAuthenticated, getCurrentCart, getCartItems, showNotification]);
+  }, [
+    isAuthenticated,
+    getCurrentCart,
+    getCartItems,
+    showNotification,
+    refreshSummary,
+  ]);
 
   return (
     <UserCartContext.Provider
@@ -242,6 +275,7 @@ export const UserCartProvider = ({ children }) => {
         removeOffer,
         clearCart,
         totalCart,
+        itemsQuantity,
         handleCheckout,
         refreshCart,
       }}
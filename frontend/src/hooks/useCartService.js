@@ -39,6 +39,21 @@ export const useCartService = () => {
     return Array.isArray(data) ? data[0] : data;
   }, [secureFetch]);
 
+  /**
+   * Function to get the totals of the open cart, without its items.
+   * @returns {Promise<Object>} The cart id, amount, number of lines (items_count)
+   * and number of seats (items_quantity).
+   */
+  const getCartSummary = useCallback(async () => {
+    const res = await secureFetch(`${BASE_URL}/summary/`, {});
+    if (!res.ok) {
+      throw new Error(
+        `Erreur ${res.status} lors de la récupération du panier.`
+      );
+    }
+    return res.json();
+  }, [secureFetch]);
+
   /**
    * Function to get the items in the cart.
    * @returns {Promise<Array>} The items in the cart.
@@ -148,6 +163,31 @@ export const useCartService = () => {
     [secureFetch]
   );
 
+  /**
+   * Function to merge a guest cart into the user cart in a single request.
+   * Quantities of lines already in the user cart are added up by the backend.
+   * @param {Array<Object>} items - The guest cart lines.
+   * @param {number} items[].offer_id - The ID of the offer.
+   * @param {number} items[].olympic_event_id - The ID of the Olympic event.
+   * @param {number} items[].quantity - The quantity of the offer.
+   * @param {number} [items[].amount] - The total amount of the line.
+   * @returns {Promise<Object>} The merged cart, with the lines the backend skipped as `skipped`.
+   */
+  const mergeCart = useCallback(
+    async (items) => {
+      const res = await secureFetch(`${BASE_URL}/merge/`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ items }),
+      });
+      if (!res.ok) {
+        throw new Error(`Erreur ${res.status} lors de la fusion du panier.`);
+      }
+      return res.json();
+    },
+    [secureFetch]
+  );
+
   /**
    * Function to checkout the cart.
    * @param {number} cartId - The ID of the cart to checkout.
@@ -169,10 +209,12 @@ export const useCartService = () => {
 
   return {
     getCurrentCart,
+    getCartSummary,
     getCartItems,
     addCartItem,
     updateCartItem,
     removeCartItem,
+    mergeCart,
     checkoutCart,
   };
 };
@@ -27,7 +27,7 @@ export function useCartSyncOnLogin() {
    * Custom hook to access cart service functions.
    * @type {Object}
    */
-  const { getCartItems, updateCartItem, addCartItem } = useCartService();
+  const { mergeCart } = useCartService();
 
   /**
    * Context to refresh the user cart.
@@ -49,48 +49,26 @@ export function useCartSyncOnLogin() {
       alreadyImported.current = true;
 
       (async () => {
-        // Get the updated user cart from the backend
-        let userCartItems = await getCartItems();
+        // Send the whole guest cart in one request (quantities are added up).
+        // Amounts are left out: the backend prices each line from its offer.
+        const items = guestCart
+          .filter((item) => item && item.offer && item.olympic_event)
+          .map((item) => ({
+            offer_id: extractId(item.offer),
+            olympic_event_id: extractId(item.olympic_event),
+            quantity: item.quantity,
+          }));
 
-        for (const guestItem of guestCart) {
-          if (!guestItem || !guestItem.offer || !guestItem.olympic_event)
-            continue;
-          const guestOfferId = extractId(guestItem.offer);
-          const guestOlympicEventId = extractId(guestItem.olympic_event);
-
-          const match = userCartItems.find(
-            (i) =>
-              extractId(i.offer) === guestOfferId &&
-              extractId(i.olympic_event) === guestOlympicEventId
-          );
-
-          try {
-            if (match && match.offer && match.olympic_event) {
-              const nouvelleQuantite = match.quantity + guestItem.quantity;
-              // PATCH
-              await updateCartItem(match.id, {
-                quantity: nouvelleQuantite,
-                offer: match.offer,
-                olympic_event: match.olympic_event,
-                amount: match.amount,
-              });
-            } else {
-              // POST
-              await addCartItem({
-                offer_id: extractId(guestItem.offer),
-                olympic_event_id: extractId(guestItem.olympic_event),
-                quantity: guestItem.quantity,
-                amount:
-                  guestItem.amount ??
-                  (guestItem.offer.price
-                    ? guestItem.offer.price * guestItem.quantity
-                    : undefined),
-              });
-            }
-          } catch (e) {
-            // Log but continue the merge
-            console.error('Erreur lors de la fusion du panier :', e);
+        try {
+          const { skipped } = await mergeCart(items);
+          if (skipped?.length) {
+            console.warn('Lignes du panier invité ignorées :', skipped);
           }
+        } catch (e) {
+          // The guest cart is kept, the merge is tried again on its next change
+          console.error('Erreur lors de la fusion du panier :', e);
+          alreadyImported.current = false;
+          return;
         }
         clearGuestCart();
         refreshCart();
@@ -9,12 +9,17 @@ export function useStripePayment() {
    */
   const BASE_URL = `${process.env.REACT_APP_BACKEND_BASE_URL}api/payment`;
 
+  /**
+   * Creates (or gets back) the Stripe PaymentIntent of a pending order.
+   * The amount is computed by the backend from the order items.
+   * @param {number} orderId - Id of the order to pay.
+   */
   const createPaymentIntent = useCallback(
-    async (amount, currency = 'eur') => {
+    async (orderId) => {
       const res = await secureFetch(`${BASE_URL}/create/`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ amount, currency }),
+        body: JSON.stringify({ order_id: orderId }),
       });
       if (!res.ok)
         throw new Error('Erreur lors de la création du paiement Stripe');
@@ -1,15 +1,31 @@
 import { useStripe, useElements } from '@stripe/react-stripe-js';
 import { useCallback } from 'react';
 
-export function useStripeSubmit(clientSecret, onSuccess, onError) {
+/**
+ * Builds the submit handler of a card payment form.
+ * @param {Function} getClientSecret - Async function returning the client secret of the PaymentIntent to confirm.
+ * @param {Function} onSuccess - Called with the PaymentIntent once it succeeded.
+ * @param {Function} onError - Called with the error otherwise.
+ */
+export function useStripeSubmit(getClientSecret, onSuccess, onError) {
   const stripe = useStripe();
   const elements = useElements();
 
   return useCallback(
     async (e) => {
       e.preventDefault();
-      if (!stripe || !elements) return;
+      if (!stripe || !elements) {
+        onError(new Error('Le module de paiement n’est pas encore chargé.'));
+        return;
+      }
       const cardElement = elements.getElement('card');
+      let clientSecret;
+      try {
+        clientSecret = await getClientSecret();
+      } catch (err) {
+        onError(err);
+        return;
+      }
       const { error, paymentIntent } = await stripe.confirmCardPayment(
         clientSecret,
         {
@@ -21,6 +37,6 @@ export function useStripeSubmit(clientSecret, onSuccess, onError) {
         onSuccess(paymentIntent);
       else onError(new Error('Le paiement n’a pas été validé.'));
     },
-    [stripe, elements, clientSecret, onSuccess, onError]
+    [stripe, elements, getClientSecret, onSuccess, onError]
   );
 }
@@ -1,5 +1,6 @@
 import { useSecureFetch } from './useSecureFetch';
 import { useState, useCallback } from 'react';
+import { getTickets } from '../services/ticketsService';
 
 const BASE_URL = process.env.REACT_APP_BACKEND_BASE_URL + 'api/tickets/';
 
@@ -12,9 +13,7 @@ export function useTickets() {
     setLoading(true);
     setError(null);
     try {
-      const res = await secureFetch(BASE_URL, {});
-      if (!res.ok) throw new Error('Erreur lors du chargement des billets');
-      return await res.json();
+      return await getTickets(secureFetch);
     } catch (e) {
       setError(e);
       throw e;
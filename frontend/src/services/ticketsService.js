@@ -1,10 +1,20 @@
+/**
+ * Fetch every ticket visible to the user.
+ * Staff listings are paginated ({ next, previous, results }): the pages are
+ * followed until the last one. Other users receive a plain list.
+ */
 export async function getTickets(secureFetch) {
-  const res = await secureFetch(
-    `${process.env.REACT_APP_BACKEND_BASE_URL}api/tickets/`,
-    {}
-  );
-  if (!res.ok) throw new Error('Erreur lors de la récupération des tickets.');
-  return res.json();
+  const tickets = [];
+  let url = `${process.env.REACT_APP_BACKEND_BASE_URL}api/tickets/`;
+  while (url) {
+    const res = await secureFetch(url, {});
+    if (!res.ok) throw new Error('Erreur lors de la récupération des tickets.');
+    const data = await res.json();
+    if (Array.isArray(data)) return data;
+    tickets.push(...data.results);
+    url = data.next;
+  }
+  return tickets;
 }
 
 export async function getTicketQRCode(secureFetch, ticketId) {
@@ -15,3 +25,4 @@ export async function getTicketQRCode(secureFetch, ticketId) {
   if (!res.ok) throw new Error('Erreur lors de la récupération du QR code.');
   return res.json();
 }
+
@@ -0,0 +1,38 @@
+import { getTickets } from '../../services/ticketsService';
+
+describe('getTickets service', () => {
+  const response = (data, ok = true) => ({ ok, json: async () => data });
+
+  test('should return the plain list of a customer', async () => {
+    const tickets = [{ id: 'a' }, { id: 'b' }];
+    const secureFetch = jest.fn().mockResolvedValueOnce(response(tickets));
+
+    await expect(getTickets(secureFetch)).resolves.toEqual(tickets);
+    expect(secureFetch).toHaveBeenCalledTimes(1);
+  });
+
+  test('should follow every page of a staff listing', async () => {
+    const secureFetch = jest
+      .fn()
+      .mockResolvedValueOnce(
+        response({ next: 'page-2', previous: null, results: [{ id: 'a' }] })
+      )
+      .mockResolvedValueOnce(
+        response({ next: null, previous: 'page-1', results: [{ id: 'b' }] })
+      );
+
+    await expect(getTickets(secureFetch)).resolves.toEqual([
+      { id: 'a' },
+      { id: 'b' },
+    ]);
+    expect(secureFetch).toHaveBeenLastCalledWith('page-2', {});
+  });
+
+  test('should throw when a page fails to load', async () => {
+    const secureFetch = jest.fn().mockResolvedValueOnce(response(null, false));
+
+    await expect(getTickets(secureFetch)).rejects.toThrow(
+      'Erreur lors de la récupération des tickets.'
+    );
+  });
+});